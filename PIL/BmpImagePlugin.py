@@ -287,6 +287,7 @@ def _save(im, fp, filename, check=0):
 # Registry
 
 Image.register_open(BmpImageFile.format, BmpImageFile, _accept)
+Image.register_magic(BmpImageFile.format, b"BM")
 Image.register_save(BmpImageFile.format, _save)
 
 Image.register_extension(BmpImageFile.format, ".bmp")
@@ -67,6 +67,8 @@ def _save(im, fp, filename):
 # Registry
 
 Image.register_open(BufrStubImageFile.format, BufrStubImageFile, _accept)
+Image.register_magic(BufrStubImageFile.format, b"BUFR")
+Image.register_magic(BufrStubImageFile.format, b"ZCZC")
 Image.register_save(BufrStubImageFile.format, _save)
 
 Image.register_extension(BufrStubImageFile.format, ".bufr")
@@ -84,5 +84,6 @@ class CurImageFile(BmpImagePlugin.BmpImageFile):
 # --------------------------------------------------------------------
 
 Image.register_open(CurImageFile.format, CurImageFile, _accept)
+Image.register_magic(CurImageFile.format, b"\0\0\2\0")
 
 Image.register_extension(CurImageFile.format, ".cur")
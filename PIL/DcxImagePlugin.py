@@ -82,5 +82,6 @@ class DcxImageFile(PcxImageFile):
 
 
 Image.register_open(DcxImageFile.format, DcxImageFile, _accept)
+Image.register_magic(DcxImageFile.format, _binary.o32le(MAGIC))
 
 Image.register_extension(DcxImageFile.format, ".dcx")
@@ -265,4 +265,5 @@ def _validate(prefix):
 
 
 Image.register_open(DdsImageFile.format, DdsImageFile, _validate)
+Image.register_magic(DdsImageFile.format, b"DDS ")
 Image.register_extension(DdsImageFile.format, ".dds")
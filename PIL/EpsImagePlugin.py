@@ -419,6 +419,8 @@ def _save(im, fp, filename, eps=1):
 # --------------------------------------------------------------------
 
 Image.register_open(EpsImageFile.format, EpsImageFile, _accept)
+Image.register_magic(EpsImageFile.format, b"%!PS")
+Image.register_magic(EpsImageFile.format, b"\xC5\xD0\xD3\xC6")
 
 Image.register_save(EpsImageFile.format, _save)
 
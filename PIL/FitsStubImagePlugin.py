@@ -70,6 +70,7 @@ def _save(im, fp, filename):
 # Registry
 
 Image.register_open(FITSStubImageFile.format, FITSStubImageFile, _accept)
+Image.register_magic(FITSStubImageFile.format, b"SIMPLE")
 Image.register_save(FITSStubImageFile.format, _save)
 
 Image.register_extension(FITSStubImageFile.format, ".fit")
@@ -212,15 +212,17 @@ class FpxImageFile(ImageFile.ImageFile):
 
     def load(self):
 
-        if not self.fp:
-            self.fp = self.ole.openstream(self.stream[:2] +
-                                          ["Subimage 0000 Data"])
+        with self._load_lock:
+            if not self.fp and self.tile:
+                self.fp = self.ole.openstream(self.stream[:2] +
+                                              ["Subimage 0000 Data"])
 
-        ImageFile.ImageFile.load(self)
+            ImageFile.ImageFile.load(self)
 
 #
 # --------------------------------------------------------------------
 
 Image.register_open(FpxImageFile.format, FpxImageFile, _accept)
+Image.register_magic(FpxImageFile.format, MAGIC)
 
 Image.register_extension(FpxImageFile.format, ".fpx")
@@ -92,5 +92,6 @@ def _validate(prefix):
 
 
 Image.register_open(FtexImageFile.format, FtexImageFile, _validate)
+Image.register_magic(FtexImageFile.format, MAGIC)
 Image.register_extension(FtexImageFile.format, ".ftc")
 Image.register_extension(FtexImageFile.format, ".ftu")
@@ -669,11 +669,53 @@ def getdata(im, offset=(0, 0), **params):
     return fp.data
 
 
+def _probe(fp):
+    # read the screen descriptor, and look for a palette up to the
+    # first image
+    s = fp.read(13)
+    if s[:6] not in [b"GIF87a", b"GIF89a"]:
+        raise SyntaxError("not a GIF file")
+
+    size = i16(s[6:]), i16(s[8:])
+    flags = i8(s[10])
+    mode = "L"
+
+    if flags & 128:
+        # a global palette not holding colour indices
+        p = fp.read(3 << ((flags & 7) + 1))
+        for i in range(0, len(p), 3):
+            if not (i//3 == i8(p[i]) == i8(p[i+1]) == i8(p[i+2])):
+                mode = "P"
+                break
+
+    while True:
+        s = fp.read(1)
+        if not s or s == b";":
+            raise EOFError("no image data")
+        elif s == b"!":
+            # skip extension
+            fp.read(1)
+            while True:
+                n = i8(fp.read(1))
+                if not n:
+                    break
+                fp.seek(n, 1)
+        elif s == b",":
+            if i8(fp.read(9)[8]) & 128:
+                # local palette
+                mode = "P"
+            return Image.ProbeResult(GifImageFile.format, size, mode,
+                                     None, None)
+
+
 # --------------------------------------------------------------------
 # Registry
 
 Image.register_open(GifImageFile.format, GifImageFile, _accept)
+Image.register_magic(GifImageFile.format, b"GIF87a")
+Image.register_magic(GifImageFile.format, b"GIF89a")
 Image.register_save(GifImageFile.format, _save)
+Image.register_probe(GifImageFile.format, _probe)
 Image.register_save_all(GifImageFile.format, _save_all)
 Image.register_extension(GifImageFile.format, ".gif")
 Image.register_mime(GifImageFile.format, "image/gif")
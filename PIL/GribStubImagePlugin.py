@@ -67,6 +67,7 @@ def _save(im, fp, filename):
 # Registry
 
 Image.register_open(GribStubImageFile.format, GribStubImageFile, _accept)
+Image.register_magic(GribStubImageFile.format, b"GRIB")
 Image.register_save(GribStubImageFile.format, _save)
 
 Image.register_extension(GribStubImageFile.format, ".grib")
@@ -67,6 +67,7 @@ def _save(im, fp, filename):
 # Registry
 
 Image.register_open(HDF5StubImageFile.format, HDF5StubImageFile, _accept)
+Image.register_magic(HDF5StubImageFile.format, b"\x89HDF\r\n\x1a\n")
 Image.register_save(HDF5StubImageFile.format, _save)
 
 Image.register_extension(HDF5StubImageFile.format, ".h5")
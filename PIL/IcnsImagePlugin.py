@@ -345,6 +345,7 @@ def _save(im, fp, filename):
 
 Image.register_open(IcnsImageFile.format, IcnsImageFile,
                     lambda x: x[:4] == b'icns')
+Image.register_magic(IcnsImageFile.format, b'icns')
 Image.register_extension(IcnsImageFile.format, '.icns')
 
 if sys.platform == 'darwin':
@@ -279,5 +279,6 @@ class IcoImageFile(ImageFile.ImageFile):
 # --------------------------------------------------------------------
 
 Image.register_open(IcoImageFile.format, IcoImageFile, _accept)
+Image.register_magic(IcoImageFile.format, _MAGIC)
 Image.register_save(IcoImageFile.format, _save)
 Image.register_extension(IcoImageFile.format, ".ico")
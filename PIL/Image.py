@@ -27,11 +27,11 @@
 from __future__ import print_function
 
 from PIL import VERSION, PILLOW_VERSION, _plugins
+from PIL._util import deferred_logger
 
-import logging
 import warnings
 
-logger = logging.getLogger(__name__)
+logger = deferred_logger(__name__)
 
 
 class DecompressionBombWarning(RuntimeWarning):
@@ -68,6 +68,10 @@ try:
         raise ImportError("The _imaging extension was built for another "
                           " version of Pillow or PIL")
 
+    # raised when the memory budget set with core.set_memory_budget
+    # runs out
+    MemoryBudgetError = core.MemoryBudgetError
+
 except ImportError as v:
     core = _imaging_not_installed()
     # Explanations for ways that we know we might have an import error
@@ -125,11 +129,19 @@ import numbers
 
 # works everywhere, win for pypy, not cpython
 USE_CFFI_ACCESS = hasattr(sys, 'pypy_version_info')
-try:
-    import cffi
-    HAS_CFFI = True
-except ImportError:
-    HAS_CFFI = False
+# None until cffi is first needed
+HAS_CFFI = None
+
+
+def _has_cffi():
+    global HAS_CFFI
+    if HAS_CFFI is None:
+        try:
+            import cffi
+            HAS_CFFI = True
+        except ImportError:
+            HAS_CFFI = False
+    return HAS_CFFI
 
 
 def isImageType(t):
@@ -208,6 +220,12 @@ MIME = {}
 SAVE = {}
 SAVE_ALL = {}
 EXTENSION = {}
+PROBE = {}
+MAGIC = {}
+
+# formats registering magic numbers, and the lengths of those numbers
+_MAGIC_IDS = set()
+_MAGIC_LENGTHS = []
 
 # --------------------------------------------------------------------
 # Modes supported by this version
@@ -287,6 +305,11 @@ MODES = sorted(_MODEINFO.keys())
 # may have to modify the stride calculation in map.c too!
 _MAPMODES = ("L", "P", "RGBX", "RGBA", "CMYK", "I;16", "I;16L", "I;16B")
 
+# modes whose in-memory layout can be exported through the array
+# interface as is (see the buffer interface in _imaging.c)
+_ARRAYMODES = ("L", "LA", "I", "F", "P", "RGB", "RGBX", "RGBA", "CMYK",
+               "YCbCr", "LAB", "HSV", "I;16", "I;16L", "I;16B")
+
 
 def getmodebase(mode):
     """
@@ -477,6 +500,24 @@ def _getscaleoffset(expr):
     raise ValueError("illegal expression")
 
 
+# --------------------------------------------------------------------
+# Output images
+
+def _getoutput(out):
+    # get the core image an operation should store its result in (see
+    # the out argument of convert, point etc), or None for a new image
+    if out is None:
+        return None
+    out.load()
+    if out.readonly:
+        # never write to mapped memory; the old pixels are about to be
+        # replaced anyway, so there is no need to copy them
+        out.im = core.new(out.mode, out.size)
+        out.pyaccess = None
+        out.readonly = 0
+    return out.im
+
+
 # --------------------------------------------------------------------
 # Implementation wrapper
 
@@ -493,6 +534,7 @@ class Image(object):
     """
     format = None
     format_description = None
+    _shared = None
 
     def __init__(self):
         # FIXME: take "new" parameters / other image?
@@ -514,8 +556,28 @@ class Image(object):
     def height(self):
         return self.size[1]
 
-    def _new(self, im):
-        new = Image()
+    @property
+    def nbytes(self):
+        """
+        The size of the pixel data of this image, in bytes.  This is 0
+        for images that have not been loaded yet.  Copies and crops that
+        share memory with another image report the size of the shared
+        region.  See also ``Image.core.get_stats()``.
+        """
+        if self.im is None:
+            return 0
+        return self.im.nbytes
+
+    def _new(self, im, out=None):
+        if out is None:
+            new = Image()
+        else:
+            # store the result in an existing image
+            if im is not out.im:
+                core.copy(_getoutput(out), im)
+            new = out
+            new.palette = None
+            im = new.im
         new.im = im
         new.mode = im.mode
         new.size = im.size
@@ -563,6 +625,19 @@ class Image(object):
         # object is gone.
         self.im = deferred_error(ValueError("Operation on closed image"))
 
+        if self._shared:
+            # the mapping is gone, so the segment can be closed too
+            unlink, shm = self._shared[:2]
+            self._shared = None
+            try:
+                shm.close()
+            except BufferError as msg:
+                # still referenced, e.g. by an array view
+                logger.debug("Error closing shared memory: %s", msg)
+            if unlink:
+                shm.unlink()
+                _tracked_segments.discard(shm.name)
+
     def _copy(self):
         self.load()
         self.im = self.im.copy()
@@ -627,11 +702,57 @@ class Image(object):
             shape, typestr = _conv_type_shape(self)
             new['shape'] = shape
             new['typestr'] = typestr
-            new['data'] = self.tobytes()
             new['version'] = 3
+            self.load()
+            if self.mode in _ARRAYMODES and self.im.isblock():
+                # expose the pixel memory itself, without copying.  the
+                # arrays are read-only snapshots, like the copies they
+                # replace; memoryview(im.im) gives write access
+                rows = self.im.rowbuffer(0, self.size[1], 1)
+                stride = len(memoryview(rows)) // max(self.size[1], 1)
+                if len(shape) == 2:
+                    new['strides'] = (stride, int(typestr[2:]))
+                else:
+                    # pixels take four bytes; the second band of an LA
+                    # image is stored in the last one
+                    new['strides'] = (stride, 4, 3 if shape[2] == 2 else 1)
+                new['data'] = rows
+            else:
+                new['data'] = self.tobytes()
             return new
         raise AttributeError(name)
 
+    def __reduce_ex__(self, protocol):
+        # images backed by shared memory are pickled by segment name, and
+        # protocol 5 passes the pixel memory as is, as an out-of-band
+        # buffer.  anything else goes through __getstate__.
+        state = None
+        if protocol >= 2 and self._shared and self._shared[2] is self.im:
+            state = self._getstate_raw(self._shared[1].name)
+        elif protocol >= 5:
+            from pickle import PickleBuffer
+            self.load()
+            try:
+                rows = self.im.rowbuffer()
+            except BufferError:
+                pass
+            else:
+                # rows may be padded
+                stride = len(memoryview(rows)) // max(self.size[1], 1)
+                state = self._getstate_raw(PickleBuffer(rows), stride)
+        if state is None:
+            return object.__reduce_ex__(self, protocol)
+        import copyreg
+        return copyreg.__newobj__, (self.__class__,), state
+
+    def __deepcopy__(self, memo):
+        # pickling may share the pixels, so copy them explicitly
+        import copy
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        new.__setstate__(copy.deepcopy(self.__getstate__(), memo))
+        return new
+
     def __getstate__(self):
         return [
             self.info,
@@ -640,17 +761,46 @@ class Image(object):
             self.getpalette(),
             self.tobytes()]
 
+    def _getstate_raw(self, data, stride=0):
+        # like __getstate__, but the pixel data is in the in-memory
+        # layout, described by raw decoder arguments (see frombuffer)
+        return [
+            self.info,
+            self.mode,
+            self.size,
+            self.getpalette(),
+            data,
+            (self.mode, stride, 1)]
+
     def __setstate__(self, state):
         Image.__init__(self)
         self.tile = []
-        info, mode, size, palette, data = state
+        info, mode, size, palette, data = state[:5]
         self.info = info
         self.mode = mode
         self.size = size
-        self.im = core.new(mode, size)
+        if len(state) > 5:
+            # map the pixel memory instead of decoding it
+            args = state[5]
+            if isStringType(data):
+                shm = _attach_shared_memory(data)
+                self.im = core.map_buffer(
+                    shm.buf, size, "raw", None, 0, args, 0)
+                self._shared = (False, shm, self.im)
+            else:
+                try:
+                    self.im = core.map_buffer(
+                        data, size, "raw", None, 0, args, 0)
+                except (TypeError, BufferError):
+                    self.im = core.map_buffer(
+                        data, size, "raw", None, 0, args)
+                    self.readonly = 1
+        else:
+            self.im = core.new(mode, size)
         if mode in ("L", "P") and palette:
             self.putpalette(palette)
-        self.frombytes(data)
+        if len(state) == 5:
+            self.frombytes(data)
 
     def tobytes(self, encoder_name="raw", *args):
         """
@@ -775,7 +925,7 @@ class Image(object):
                 self.palette.mode = "RGBA"
 
         if self.im:
-            if HAS_CFFI and USE_CFFI_ACCESS:
+            if USE_CFFI_ACCESS and _has_cffi():
                 if self.pyaccess:
                     return self.pyaccess
                 from PIL import PyAccess
@@ -796,7 +946,7 @@ class Image(object):
         pass
 
     def convert(self, mode=None, matrix=None, dither=None,
-                palette=WEB, colors=256):
+                palette=WEB, colors=256, out=None):
         """
         Returns a converted copy of this image. For the "P" mode, this
         method translates pixels through the palette.  If mode is
@@ -829,8 +979,12 @@ class Image(object):
            to "P".  Available palettes are WEB or ADAPTIVE.
         :param colors: Number of colors to use for the ADAPTIVE palette.
            Defaults to 256.
+        :param out: An optional image to store the result in, instead of
+           creating a new image.  It must have the requested mode and the
+           same size as this image.
         :rtype: :py:class:`~PIL.Image.Image`
-        :returns: An :py:class:`~PIL.Image.Image` object.
+        :returns: An :py:class:`~PIL.Image.Image` object.  If **out** is
+           given, this is **out**.
         """
 
         if not mode:
@@ -841,6 +995,9 @@ class Image(object):
                     mode = self.palette.mode
                 else:
                     mode = "RGB"
+            elif out is not None:
+                self.load()
+                return self._new(self.im, out)
             else:
                 return self.copy()
 
@@ -851,10 +1008,13 @@ class Image(object):
             if mode not in ("L", "RGB"):
                 raise ValueError("illegal conversion")
             im = self.im.convert_matrix(mode, matrix)
-            return self._new(im)
+            return self._new(im, out)
 
         if mode == "P" and self.mode == "RGBA":
-            return self.quantize(colors)
+            im = self.quantize(colors)
+            if out is not None:
+                im = im._new(im.im, out)
+            return im
 
         trns = None
         delete_trns = False
@@ -865,7 +1025,7 @@ class Image(object):
                 # Use transparent conversion to promote from transparent
                 # color to an alpha channel.
                 return self._new(self.im.convert_transparent(
-                    mode, self.info['transparency']))
+                    mode, self.info['transparency']), out)
             elif self.mode in ('L', 'RGB', 'P') and mode in ('L', 'RGB', 'P'):
                 t = self.info['transparency']
                 if isinstance(t, bytes):
@@ -910,7 +1070,7 @@ class Image(object):
 
         if mode == "P" and palette == ADAPTIVE:
             im = self.im.quantize(colors)
-            new = self._new(im)
+            new = self._new(im, out)
             from PIL import ImagePalette
             new.palette = ImagePalette.raw("RGB", new.im.getpalette("RGB"))
             if delete_trns:
@@ -933,16 +1093,16 @@ class Image(object):
             dither = FLOYDSTEINBERG
 
         try:
-            im = self.im.convert(mode, dither)
+            im = self.im.convert(mode, dither, None, _getoutput(out))
         except ValueError:
             try:
                 # normalize source image and try again
                 im = self.im.convert(getmodebase(self.mode))
-                im = im.convert(mode, dither)
+                im = im.convert(mode, dither, None, _getoutput(out))
             except KeyError:
                 raise ValueError("illegal conversion")
 
-        new_im = self._new(im)
+        new_im = self._new(im, out)
         if delete_trns:
             # crash fail if we leave a bytes transparency in an rgb/l mode.
             del(new_im.info['transparency'])
@@ -1006,6 +1166,9 @@ class Image(object):
         Copies this image. Use this method if you wish to paste things
         into an image, but still retain the original.
 
+        The copy shares memory with this image until either of them is
+        modified, so copies that are only read are cheap.
+
         :rtype: :py:class:`~PIL.Image.Image`
         :returns: An :py:class:`~PIL.Image.Image` object.
         """
@@ -1021,10 +1184,9 @@ class Image(object):
         4-tuple defining the left, upper, right, and lower pixel
         coordinate.
 
-        This is a lazy operation.  Changes to the source image may or
-        may not be reflected in the cropped image.  To break the
-        connection, call the :py:meth:`~PIL.Image.Image.load` method on
-        the cropped copy.
+        The cropped image shares memory with this image until either of
+        them is modified.  Changes made to either image are not
+        reflected in the other.
 
         :param box: The crop rectangle, as a (left, upper, right, lower)-tuple.
         :rtype: :py:class:`~PIL.Image.Image`
@@ -1035,7 +1197,6 @@ class Image(object):
         if box is None:
             return self.copy()
 
-        # lazy operation
         return _ImageCrop(self, box)
 
     def draft(self, mode, size):
@@ -1061,13 +1222,16 @@ class Image(object):
         self.load()
         return self._new(self.im.expand(xmargin, ymargin, 0))
 
-    def filter(self, filter):
+    def filter(self, filter, out=None):
         """
         Filters this image using the given filter.  For a list of
         available filters, see the :py:mod:`~PIL.ImageFilter` module.
 
         :param filter: Filter kernel.
-        :returns: An :py:class:`~PIL.Image.Image` object.  """
+        :param out: An optional image of the same mode and size as this
+           image to store the result in, instead of creating a new image.
+        :returns: An :py:class:`~PIL.Image.Image` object.  If **out** is
+           given, this is **out**.  """
 
         self.load()
 
@@ -1078,11 +1242,18 @@ class Image(object):
                             "instance or class")
 
         if self.im.bands == 1:
-            return self._new(filter.filter(self.im))
+            return self._new(filter.filter(self.im), out)
         # fix to handle multiband images since _imaging doesn't
         ims = []
         for c in range(self.im.bands):
             ims.append(self._new(filter.filter(self.im.getband(c))))
+        if out is not None:
+            if out.mode != self.mode:
+                raise ValueError("images do not match")
+            im = _getoutput(out)
+            for c in range(self.im.bands):
+                im.putband(ims[c].im, c)
+            return self._new(im, out)
         return merge(self.mode, ims)
 
     def getbands(self):
@@ -1342,7 +1513,7 @@ class Image(object):
         else:
             self.im.paste(im, box)
 
-    def point(self, lut, mode=None):
+    def point(self, lut, mode=None, out=None):
         """
         Maps this image through a lookup table or function.
 
@@ -1356,13 +1527,20 @@ class Image(object):
            current version, this can only be used if the source image
            has mode "L" or "P", and the output has mode "1" or the
            source image mode is "I" and the output mode is "L".
-        :returns: An :py:class:`~PIL.Image.Image` object.
+        :param out: An optional image to store the result in, instead of
+           creating a new image.  It must have the output mode and the
+           same size as this image.
+        :returns: An :py:class:`~PIL.Image.Image` object.  If **out** is
+           given, this is **out**.
         """
 
         self.load()
 
         if isinstance(lut, ImagePointHandler):
-            return lut.point(self)
+            im = lut.point(self)
+            if out is not None:
+                im = im._new(im.im, out)
+            return im
 
         if callable(lut):
             # if it isn't a list, it should be a function
@@ -1371,7 +1549,8 @@ class Image(object):
                 # UNDONE wiredfool -- I think this prevents us from ever doing
                 # a gamma function point transform on > 8bit images.
                 scale, offset = _getscaleoffset(lut)
-                return self._new(self.im.point_transform(scale, offset))
+                return self._new(self.im.point_transform(
+                    scale, offset, _getoutput(out)), out)
             # for other modes, convert the function to a table
             lut = [lut(i) for i in range(256)] * self.im.bands
 
@@ -1379,7 +1558,7 @@ class Image(object):
             # FIXME: _imaging returns a confusing error message for this case
             raise ValueError("point operation not supported for this mode")
 
-        return self._new(self.im.point(lut, mode))
+        return self._new(self.im.point(lut, mode, _getoutput(out)), out)
 
     def putalpha(self, alpha):
         """
@@ -1517,7 +1696,7 @@ class Image(object):
             return self.pyaccess.putpixel(xy, value)
         return self.im.putpixel(xy, value)
 
-    def resize(self, size, resample=NEAREST):
+    def resize(self, size, resample=NEAREST, out=None):
         """
         Returns a resized copy of this image.
 
@@ -1530,7 +1709,11 @@ class Image(object):
            :py:attr:`PIL.Image.LANCZOS` (a high-quality downsampling filter).
            If omitted, or if the image has mode "1" or "P", it is
            set :py:attr:`PIL.Image.NEAREST`.
-        :returns: An :py:class:`~PIL.Image.Image` object.
+        :param out: An optional image of the same mode as this image and
+           the requested size to store the result in, instead of creating
+           a new image.
+        :returns: An :py:class:`~PIL.Image.Image` object.  If **out** is
+           given, this is **out**.
         """
 
         if resample not in (NEAREST, BILINEAR, BICUBIC, LANCZOS):
@@ -1540,15 +1723,16 @@ class Image(object):
 
         size = tuple(size)
         if self.size == size:
-            return self._new(self.im)
+            return self._new(self.im, out)
 
         if self.mode in ("1", "P"):
             resample = NEAREST
 
         if self.mode == 'RGBA':
-            return self.convert('RGBa').resize(size, resample).convert('RGBA')
+            return self.convert('RGBa').resize(size, resample).convert(
+                'RGBA', out=out)
 
-        return self._new(self.im.resize(size, resample))
+        return self._new(self.im.resize(size, resample, _getoutput(out)), out)
 
     def rotate(self, angle, resample=NEAREST, expand=0):
         """
@@ -1665,8 +1849,6 @@ class Image(object):
         self.encoderinfo = params
         self.encoderconfig = ()
 
-        preinit()
-
         ext = os.path.splitext(filename)[1].lower()
 
         if not format:
@@ -1675,7 +1857,7 @@ class Image(object):
             format = EXTENSION[ext]
 
         if format.upper() not in SAVE:
-            init()
+            _import_plugin(format.upper(), save=True)
         if save_all:
             save_handler = SAVE_ALL[format.upper()]
         else:
@@ -1946,7 +2128,7 @@ class Image(object):
 
 
 # --------------------------------------------------------------------
-# Lazy operations
+# Views
 
 class _ImageCrop(Image):
 
@@ -1965,23 +2147,14 @@ class _ImageCrop(Image):
         self.mode = im.mode
         self.size = x1-x0, y1-y0
 
-        self.__crop = x0, y0, x1, y1
-
-        self.im = im.im
+        # shares memory with the source image (copy on write)
+        self.im = im.im.crop((x0, y0, x1, y1))
 
     def load(self):
 
-        # lazy evaluation!
-        if self.__crop:
-            self.im = self.im.crop(self.__crop)
-            self.__crop = None
-
         if self.im:
             return self.im.pixel_access(self.readonly)
 
-        # FIXME: future versions should optimize crop/paste
-        # sequences!
-
 
 # --------------------------------------------------------------------
 # Abstract handlers.
@@ -2037,6 +2210,104 @@ def new(mode, size, color=0):
     return Image()._new(core.fill(mode, size, color))
 
 
+def new_shared(mode, size, color=0, memory=None):
+    """
+    Creates a new image with its pixels stored in shared memory, which
+    other processes can use without copying the pixel data.
+
+    An image stored in a :py:class:`~multiprocessing.shared_memory.SharedMemory`
+    segment is pickled by the name of the segment, so sending it to a
+    :py:mod:`multiprocessing` worker gives the worker an image mapping
+    the same memory.  Changes made by either process are seen by the
+    other.  Close the image with :py:meth:`~PIL.Image.Image.close` when
+    done with it; a segment created by this function is removed when
+    the image is closed.
+
+    With pickle protocol 5, other images also pass their pixels out of
+    band, as long as they are stored in a single block of memory.  The
+    pixels of images larger than the block size of the allocator are
+    copied into the pickle.
+
+    :param mode: The mode to use for the new image. See:
+       :ref:`concept-modes`.
+    :param size: A 2-tuple, containing (width, height) in pixels.
+    :param color: What color to use for the image.  Default is black.
+       If the color is None, the memory is not initialised.
+    :param memory: Where to store the pixels: a
+       :py:class:`~multiprocessing.shared_memory.SharedMemory` instance,
+       or a writable buffer such as an anonymous :py:class:`mmap.mmap`.
+       It must hold the image as laid out in memory, with 4 bytes per
+       pixel for most multiband modes.  If omitted, a new segment is
+       created, or an anonymous mmap on Python versions without
+       :py:mod:`multiprocessing.shared_memory`.
+    :returns: An :py:class:`~PIL.Image.Image` object.
+    """
+
+    shm = None
+    unlink = False
+    if memory is None:
+        rowsize = len(memoryview(core.new(mode, (size[0], 1)).rowbuffer()))
+        nbytes = max(rowsize * size[1], 1)
+        try:
+            from multiprocessing import shared_memory
+        except ImportError:
+            import mmap
+            memory = mmap.mmap(-1, nbytes)
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            _tracked_segments.add(shm.name)
+            unlink = True
+    elif hasattr(memory, "buf") and hasattr(memory, "name"):
+        # use a handle of our own, so that the image can close it.  the
+        # handle given to us registered the segment with the tracker
+        _tracked_segments.add(memory.name)
+        shm = _attach_shared_memory(memory.name)
+
+    if shm:
+        memory = shm.buf
+    im = Image()._new(
+        core.map_buffer(memory, size, "raw", None, 0, (mode, 0, 1), 0)
+        )
+    if shm:
+        im._shared = (unlink, shm, im.im)
+
+    if color is not None:
+        if isStringType(color):
+            from PIL import ImageColor
+            color = ImageColor.getcolor(color, mode)
+        im.im.paste(color, (0, 0) + size)
+
+    return im
+
+
+# names of the shared memory segments that this process has registered
+# with the resource tracker of multiprocessing
+_tracked_segments = set()
+
+
+def _attach_shared_memory(name):
+    # opens an existing shared memory segment.  the segment belongs to
+    # the process that created it, so keep it out of the resource
+    # tracker, which would remove it when this process exits.  before
+    # Python 3.13, opening a segment registers it; take it out again,
+    # unless the tracker already knew it: because this process
+    # registered it, or because a multiprocessing worker shares the
+    # tracker of its parent.
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Python < 3.13
+        pass
+    shm = shared_memory.SharedMemory(name)
+    if os.name == "posix" and shm.name not in _tracked_segments:
+        import multiprocessing
+        if multiprocessing.parent_process() is None:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
 def frombytes(mode, size, data, decoder_name="raw", *args):
     """
     Creates a copy of an image memory from pixel data in a buffer.
@@ -2108,6 +2379,12 @@ def frombuffer(mode, size, data, decoder_name="raw", *args):
 
             frombuffer(mode, size, data, "raw", mode, 0, 1)
 
+        The raw decoder parameters are the raw mode, the row stride in
+        bytes (0 for rows without padding), and the orientation (1 if
+        the first row is at the top of the image, -1 if the image is
+        stored bottom-up).  Padded and bottom-up buffers are shared as
+        well.
+
     :returns: An :py:class:`~PIL.Image.Image` object.
 
     .. versionadded:: 1.1.4
@@ -2142,8 +2419,12 @@ def fromarray(obj, mode=None):
     Creates an image memory from an object exporting the array interface
     (using the buffer protocol).
 
-    If obj is not contiguous, then the tobytes method is called
-    and :py:func:`~PIL.Image.frombuffer` is used.
+    Where possible, the image shares memory with obj, including arrays
+    with padded rows, negative (bottom-up) row strides, or pixels taken
+    from a wider array (such as the first three channels of an RGBA
+    array).  Such images are read-only.  If the layout of obj cannot be
+    mapped, then the tobytes method is called and
+    :py:func:`~PIL.Image.frombuffer` is used.
 
     :param obj: Object with array interface
     :param mode: Mode to use (will be determined from type if None)
@@ -2179,6 +2460,9 @@ def fromarray(obj, mode=None):
 
     size = shape[1], shape[0]
     if strides is not None:
+        im = _fromarray_strided(obj, arr, mode, rawmode, size)
+        if im is not None:
+            return im
         if hasattr(obj, 'tobytes'):
             obj = obj.tobytes()
         else:
@@ -2187,6 +2471,82 @@ def fromarray(obj, mode=None):
     return frombuffer(mode, size, obj, "raw", rawmode, 0, 1)
 
 
+# in-memory layout of modes that strided arrays can be mapped to:
+# pixel size and distance between bands, in bytes
+_STRIDEDMODES = {
+    "L": (1, None),
+    "P": (1, None),
+    "I": (4, None),
+    "F": (4, None),
+    "I;16": (2, None),
+    "I;16L": (2, None),
+    "I;16B": (2, None),
+    "LA": (4, 3),
+    "RGB": (4, 1),
+    "RGBX": (4, 1),
+    "RGBA": (4, 1),
+    "CMYK": (4, 1),
+}
+
+
+def _fromarray_strided(obj, arr, mode, rawmode, size):
+    # map the pixels of a strided array into a read-only image, where
+    # its layout allows that.  returns None if the data must be copied.
+
+    if mode != rawmode or mode not in _STRIDEDMODES:
+        return None
+    strides = arr['strides']
+    pixelsize, bandstride = _STRIDEDMODES[mode]
+    if not isinstance(strides, tuple) or strides[1:] != (
+            (pixelsize,) if bandstride is None else (pixelsize, bandstride)):
+        return None
+    ystride = strides[0]
+    if not ystride:
+        return None
+
+    # locate the object owning the memory, and the offset of the first
+    # pixel within it.  the owner must cover padding bytes too, so for
+    # views (e.g. channel slices) we look for the contiguous base array.
+    data = arr.get('data')
+    if isinstance(data, tuple):
+        owner = None
+        base = obj
+        while base is not None:
+            try:
+                interface = base.__array_interface__
+            except AttributeError:
+                break
+            if (isinstance(interface.get('data'), tuple) and
+                    interface.get('strides') is None):
+                owner = base
+                offset = data[0] - interface['data'][0]
+            base = getattr(base, 'base', None)
+        if owner is None:
+            return None
+    elif data is not None:
+        owner = data
+        offset = arr.get('offset', 0)
+    else:
+        return None
+
+    if ystride < 0:
+        # bottom-up; map from the last row
+        offset += (size[1] - 1) * ystride
+        ystride, ystep = -ystride, -1
+    else:
+        ystep = 1
+
+    try:
+        im = core.map_buffer(
+            owner, size, "raw", None, offset, (mode, ystride, ystep)
+            )
+    except (TypeError, ValueError, BufferError):
+        return None
+    im = new(mode, (1, 1))._new(im)
+    im.readonly = 1
+    return im
+
+
 def fromqimage(im):
     """Creates an image instance from a QImage image"""
     from PIL import ImageQt
@@ -2240,7 +2600,7 @@ def _decompression_bomb_check(size):
             DecompressionBombWarning)
 
 
-def open(fp, mode="r"):
+def open(fp, mode="r", formats=None):
     """
     Opens and identifies the given image file.
 
@@ -2253,8 +2613,13 @@ def open(fp, mode="r"):
     :param fp: A filename (string), pathlib.Path object or a file object.
        The file object must implement :py:meth:`~file.read`,
        :py:meth:`~file.seek`, and :py:meth:`~file.tell` methods,
-       and be opened in binary mode.
+       and be opened in binary mode.  Image data in memory, in a
+       bytearray, memoryview or mmap object, can be passed directly,
+       and is read without copying it.  Bytes are taken as a filename;
+       use ``memoryview(data)`` to pass bytes holding image data.
     :param mode: The mode.  If given, this argument must be "r".
+    :param formats: A list or tuple of formats to attempt to open the file
+       in, in order.  If None, all supported formats are attempted.
     :returns: An :py:class:`~PIL.Image.Image` object.
     :exception IOError: If the file cannot be found, or the image cannot be
        opened and identified.
@@ -2263,6 +2628,13 @@ def open(fp, mode="r"):
     if mode != "r":
         raise ValueError("bad mode %r" % mode)
 
+    if formats is None:
+        formats = ID
+    elif not isinstance(formats, (list, tuple)):
+        raise TypeError("formats must be a list or tuple")
+    else:
+        formats = [i.upper() for i in formats]
+
     filename = ""
     if isPath(fp):
         filename = fp
@@ -2272,6 +2644,9 @@ def open(fp, mode="r"):
             filename = str(fp.resolve())
     if filename:
         fp = builtins.open(filename, "rb")
+    elif _isdata(fp):
+        from PIL import ImageFile
+        fp = ImageFile._BufferFile(fp)
 
     try:
         fp.seek(0)
@@ -2280,10 +2655,13 @@ def open(fp, mode="r"):
 
     prefix = fp.read(16)
 
-    preinit()
+    for i in formats:
+        if i not in OPEN:
+            _import_plugin(i)
+    _import_plugins(prefix)
 
     def _open_core(fp, filename, prefix):
-        for i in ID:
+        for i in _candidates(prefix, formats):
             try:
                 factory, accept = OPEN[i]
                 if not accept or accept(prefix):
@@ -2310,6 +2688,136 @@ def open(fp, mode="r"):
     raise IOError("cannot identify image file %r"
                   % (filename if filename else fp))
 
+
+def _isdata(fp):
+    # image data in memory, rather than a filename or a file object.
+    # bytes are always a filename
+    import mmap
+    return isinstance(fp, (bytearray, memoryview, mmap.mmap))
+
+
+def _candidates(prefix, formats):
+    # formats that may be able to open a file starting with prefix, in
+    # order.  formats with magic numbers that the prefix does not start
+    # with are skipped without calling their accept functions.
+    matches = set()
+    for length in _MAGIC_LENGTHS:
+        ids = MAGIC.get(prefix[:length])
+        if ids:
+            matches.update(ids)
+    return [i for i in formats if i in matches or i not in _MAGIC_IDS]
+
+
+class ProbeResult(collections.namedtuple(
+        "ProbeResult", "format size mode n_frames orientation")):
+    """
+    The basic properties of an image file, as returned by :py:func:`probe`.
+
+    ``n_frames`` is None if the number of frames cannot be told from the
+    header, and ``orientation`` is the EXIF orientation, or None.
+    """
+    __slots__ = ()
+
+
+def probe(fp):
+    """
+    Identifies an image file, and reads its format, size and mode,
+    without opening the image.  Formats providing a probe function only
+    read the start of the file; other formats are opened as with
+    :py:func:`open`.
+
+    :param fp: A filename (string), pathlib.Path object, file object or
+       image data in memory, as for :py:func:`open`.  File objects are
+       left at an unspecified position.
+    :returns: A :py:class:`ProbeResult`.
+    :exception IOError: If the file cannot be identified.
+    """
+
+    filename = ""
+    if isPath(fp):
+        filename = fp
+    elif sys.version_info >= (3, 4):
+        from pathlib import Path
+        if isinstance(fp, Path):
+            filename = str(fp.resolve())
+
+    if filename:
+        with builtins.open(filename, "rb") as f:
+            return _probe(f, filename)
+    if _isdata(fp):
+        from PIL import ImageFile
+        fp = ImageFile._BufferFile(fp)
+    return _probe(fp, filename)
+
+
+def _probe(fp, filename):
+    try:
+        fp.seek(0)
+    except (AttributeError, io.UnsupportedOperation):
+        fp = io.BytesIO(fp.read())
+
+    prefix = fp.read(16)
+
+    _import_plugins(prefix)
+
+    def _probe_core(fp, filename, prefix):
+        for i in _candidates(prefix, ID):
+            try:
+                factory, accept = OPEN[i]
+                if not accept or accept(prefix):
+                    fp.seek(0)
+                    if i in PROBE:
+                        return PROBE[i](fp)
+                    im = factory(fp, filename)
+                    return ProbeResult(
+                        im.format, im.size, im.mode,
+                        None if hasattr(im, "n_frames") else 1, None)
+            except (SyntaxError, IndexError, TypeError, KeyError,
+                    EOFError, struct.error):
+                continue
+        return None
+
+    result = _probe_core(fp, filename, prefix)
+
+    if result is None:
+        if init():
+            result = _probe_core(fp, filename, prefix)
+
+    if result:
+        return result
+
+    raise IOError("cannot identify image file %r"
+                  % (filename if filename else fp))
+
+
+def open_writer(fp, format, mode, size, **params):
+    """
+    Opens an image file for writing, one band of rows at a time.  Use
+    this to write images that are too large to hold in memory::
+
+        writer = Image.open_writer("mosaic.png", "PNG", "RGB", (w, h))
+        for band in bands:
+            writer.write_rows(band)
+        writer.close()
+
+    Rows can be written as images of any height, as long as they have
+    the mode and width of the image file.  The PNG, TIFF, PPM and JPEG
+    formats support this.
+
+    :param fp: A filename (string) or file object.
+    :param format: The format to use.  If None, the format is determined
+       from the filename extension.
+    :param mode: The mode of the image file.
+    :param size: The size of the image file, as a 2-tuple.
+    :param options: Extra parameters to the image writer, as for
+       :py:meth:`~PIL.Image.Image.save`.
+    :returns: An :py:class:`~PIL.ImageFile.ImageWriter` object.
+    :exception KeyError: If the output format could not be determined.
+    """
+
+    from PIL import ImageFile
+    return ImageFile.ImageWriter(fp, format, mode, size, **params)
+
 #
 # Image processing.
 
@@ -2429,6 +2937,45 @@ def register_open(id, factory, accept=None):
     OPEN[id] = factory, accept
 
 
+def register_probe(id, probe):
+    """
+    Registers a function reading the basic properties of an image from
+    the header of a file, for :py:func:`probe`.  This function should
+    not be used in application code.
+
+    :param id: An image format identifier.
+    :param probe: A function taking a file object positioned at the
+       start of the file, and returning a :py:class:`ProbeResult`.  It
+       raises :py:exc:`SyntaxError` if the file has another format.
+    """
+    PROBE[id.upper()] = probe
+
+
+def register_magic(id, magic):
+    """
+    Registers a magic number, the bytes that files in a format start
+    with.  :py:func:`open` only tries the formats whose magic numbers
+    match the start of the file, and the formats that have none
+    registered.  Call this once for each magic number of a format.  This
+    function should not be used in application code.
+
+    :param id: An image format identifier.
+    :param magic: The first bytes of a file in this format, at most 16.
+       Files that do not start with any of the magic numbers registered
+       for the format must be rejected by its accept function.
+    """
+    if not 0 < len(magic) <= 16:
+        raise ValueError("magic number must be 1 to 16 bytes long")
+    id = id.upper()
+    ids = MAGIC.setdefault(magic, [])
+    if id not in ids:
+        ids.append(id)
+    _MAGIC_IDS.add(id)
+    if len(magic) not in _MAGIC_LENGTHS:
+        _MAGIC_LENGTHS.append(len(magic))
+        _MAGIC_LENGTHS.sort()
+
+
 def register_mime(id, mimetype):
     """
     Registers an image MIME type.  This function should not be used
@@ -2474,6 +3021,120 @@ def register_extension(id, extension):
     EXTENSION[extension.lower()] = id.upper()
 
 
+# --------------------------------------------------------------------
+# Formats of the standard plugins, so that the plugin handling a file
+# can be imported on its own instead of importing all of them.  The
+# plugins register the same values when they are imported.
+
+_PLUGIN_FORMATS = [
+    # format, plugin, extensions, MIME type, magic numbers, saves
+    ("BMP", "BmpImagePlugin", (".bmp",), "image/bmp", (b"BM",), True),
+    ("BUFR", "BufrStubImagePlugin", (".bufr",), None,
+     (b"BUFR", b"ZCZC"), True),
+    ("CUR", "CurImagePlugin", (".cur",), None, (b"\0\0\2\0",), False),
+    ("DCX", "DcxImagePlugin", (".dcx",), None, (b"\xb1\x68\xde\x3a",),
+     False),
+    ("DDS", "DdsImagePlugin", (".dds",), None, (b"DDS ",), False),
+    ("EPS", "EpsImagePlugin", (".ps", ".eps"), "application/postscript",
+     (b"%!PS", b"\xc5\xd0\xd3\xc6"), True),
+    ("FITS", "FitsStubImagePlugin", (".fit", ".fits"), None,
+     (b"SIMPLE",), True),
+    ("FLI", "FliImagePlugin", (".fli", ".flc"), None, (), False),
+    ("FPX", "FpxImagePlugin", (".fpx",), None,
+     (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",), False),
+    ("FTEX", "FtexImagePlugin", (".ftc", ".ftu"), None, (b"FTEX",), False),
+    ("GBR", "GbrImagePlugin", (".gbr",), None, (), False),
+    ("GIF", "GifImagePlugin", (".gif",), "image/gif",
+     (b"GIF87a", b"GIF89a"), True),
+    ("GRIB", "GribStubImagePlugin", (".grib",), None, (b"GRIB",), True),
+    ("HDF5", "Hdf5StubImagePlugin", (".h5", ".hdf"), None,
+     (b"\x89HDF\r\n\x1a\n",), True),
+    ("ICNS", "IcnsImagePlugin", (".icns",), None, (b"icns",), False),
+    ("ICO", "IcoImagePlugin", (".ico",), None, (b"\0\0\1\0",), True),
+    ("IM", "ImImagePlugin", (".im",), None, (), True),
+    ("IMT", "ImtImagePlugin", (), None, (), False),
+    ("IPTC", "IptcImagePlugin", (".iim",), None, (), False),
+    ("JPEG", "JpegImagePlugin", (".jfif", ".jpe", ".jpg", ".jpeg"),
+     "image/jpeg", (b"\xff",), True),
+    ("JPEG2000", "Jpeg2KImagePlugin",
+     (".jp2", ".j2k", ".jpc", ".jpf", ".jpx", ".j2c"), "image/jpx",
+     (b"\xff\x4f\xff\x51", b"\0\0\0\x0cjP  \r\n\x87\n"), True),
+    ("MCIDAS", "McIdasImagePlugin", (), None,
+     (b"\0\0\0\0\0\0\0\x04",), False),
+    ("MIC", "MicImagePlugin", (".mic",), None,
+     (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",), False),
+    ("MPEG", "MpegImagePlugin", (".mpg", ".mpeg"), "video/mpeg", (), False),
+    ("MPO", "MpoImagePlugin", (".mpo",), "image/mpo", (), True),
+    ("MSP", "MspImagePlugin", (".msp",), None, (b"DanM", b"LinS"), True),
+    ("PALM", "PalmImagePlugin", (".palm",), "image/palm", (), True),
+    ("PCD", "PcdImagePlugin", (".pcd",), None, (), False),
+    ("PCX", "PcxImagePlugin", (".pcx",), None,
+     (b"\x0a\x00", b"\x0a\x02", b"\x0a\x03", b"\x0a\x05"), True),
+    ("PDF", "PdfImagePlugin", (".pdf",), "application/pdf", (), True),
+    ("PIXAR", "PixarImagePlugin", (".pxr",), None,
+     (b"\x80\xe8\0\0",), False),
+    ("PNG", "PngImagePlugin", (".png",), "image/png",
+     (b"\x89PNG\r\n\x1a\n",), True),
+    ("PPM", "PpmImagePlugin", (".pbm", ".pgm", ".ppm"), None,
+     (b"P0", b"P4", b"P5", b"P6", b"Py"), True),
+    ("PSD", "PsdImagePlugin", (".psd",), None, (b"8BPS",), False),
+    ("SGI", "SgiImagePlugin", (".bw", ".rgb", ".rgba", ".sgi"), None,
+     (b"\x01\xda",), False),
+    ("SPIDER", "SpiderImagePlugin", (), None, (), True),
+    ("SUN", "SunImagePlugin", (".ras",), None, (b"\x59\xa6\x6a\x95",),
+     False),
+    ("TGA", "TgaImagePlugin", (".tga",), None, (), True),
+    ("TIFF", "TiffImagePlugin", (".tif", ".tiff"), "image/tiff",
+     (b"MM\0\x2a", b"II\x2a\0", b"II\xbc\0"), True),
+    ("WEBP", "WebPImagePlugin", (".webp",), "image/webp", (b"RIFF",),
+     True),
+    ("WMF", "WmfImagePlugin", (".wmf", ".emf"), None,
+     (b"\xd7\xcd\xc6\x9a\0\0", b"\x01\0\0\0"), True),
+    ("XBM", "XbmImagePlugin", (".xbm",), "image/xbm", (), True),
+    ("XPM", "XpmImagePlugin", (".xpm",), "image/xpm", (b"/* XPM */",),
+     False),
+    ("XVTHUMB", "XVThumbImagePlugin", (), None, (b"P7 332",), False),
+]
+
+_PLUGIN = {}
+_PLUGIN_SAVE = set()
+
+for _id, _plugin, _extensions, _mimetype, _magic, _save in _PLUGIN_FORMATS:
+    _PLUGIN[_id] = _plugin
+    for _ext in _extensions:
+        EXTENSION[_ext] = _id
+    if _mimetype:
+        MIME[_id] = _mimetype
+    for _m in _magic:
+        register_magic(_id, _m)
+    if _save:
+        _PLUGIN_SAVE.add(_id)
+del _id, _plugin, _extensions, _mimetype, _magic, _save, _ext, _m
+
+
+def _import_plugin(id, save=False):
+    # imports the plugin for a format, or all plugins if the format is
+    # not one of the standard ones.  plugins that cannot save the format
+    # are not imported if save is true.
+    plugin = _PLUGIN.get(id)
+    if plugin is None:
+        init()
+    elif not save or id in _PLUGIN_SAVE:
+        try:
+            __import__("PIL.%s" % plugin, globals(), locals(), [])
+        except ImportError as e:
+            logger.debug("Image: failed to import %s: %s", plugin, e)
+
+
+def _import_plugins(prefix):
+    # imports the plugins for the formats whose magic numbers match the
+    # start of a file
+    for length in _MAGIC_LENGTHS:
+        for i in MAGIC.get(prefix[:length], ()):
+            if i not in OPEN and i in _PLUGIN:
+                _import_plugin(i)
+
+
 # --------------------------------------------------------------------
 # Simple display support.  User code may override this.
 
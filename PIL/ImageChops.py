@@ -36,7 +36,7 @@ def duplicate(image):
     return image.copy()
 
 
-def invert(image):
+def invert(image, out=None):
     """
     Invert an image (channel).
 
@@ -48,10 +48,11 @@ def invert(image):
     """
 
     image.load()
-    return image._new(image.im.chop_invert())
+    im = image.im.chop_invert(Image._getoutput(out))
+    return image._new(im, out)
 
 
-def lighter(image1, image2):
+def lighter(image1, image2, out=None):
     """
     Compares the two images, pixel by pixel, and returns a new image containing
     the lighter values.
@@ -65,10 +66,11 @@ def lighter(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_lighter(image2.im))
+    im = image1.im.chop_lighter(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def darker(image1, image2):
+def darker(image1, image2, out=None):
     """
     Compares the two images, pixel by pixel, and returns a new image
     containing the darker values.
@@ -82,10 +84,11 @@ def darker(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_darker(image2.im))
+    im = image1.im.chop_darker(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def difference(image1, image2):
+def difference(image1, image2, out=None):
     """
     Returns the absolute value of the pixel-by-pixel difference between the two
     images.
@@ -99,10 +102,11 @@ def difference(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_difference(image2.im))
+    im = image1.im.chop_difference(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def multiply(image1, image2):
+def multiply(image1, image2, out=None):
     """
     Superimposes two images on top of each other.
 
@@ -118,10 +122,11 @@ def multiply(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_multiply(image2.im))
+    im = image1.im.chop_multiply(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def screen(image1, image2):
+def screen(image1, image2, out=None):
     """
     Superimposes two inverted images on top of each other.
 
@@ -134,10 +139,11 @@ def screen(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_screen(image2.im))
+    im = image1.im.chop_screen(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def add(image1, image2, scale=1.0, offset=0):
+def add(image1, image2, scale=1.0, offset=0, out=None):
     """
     Adds two images, dividing the result by scale and adding the
     offset. If omitted, scale defaults to 1.0, and offset to 0.0.
@@ -151,10 +157,12 @@ def add(image1, image2, scale=1.0, offset=0):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_add(image2.im, scale, offset))
+    im = image1.im.chop_add(image2.im, scale, offset,
+                            Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def subtract(image1, image2, scale=1.0, offset=0):
+def subtract(image1, image2, scale=1.0, offset=0, out=None):
     """
     Subtracts two images, dividing the result by scale and adding the
     offset. If omitted, scale defaults to 1.0, and offset to 0.0.
@@ -168,10 +176,12 @@ def subtract(image1, image2, scale=1.0, offset=0):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_subtract(image2.im, scale, offset))
+    im = image1.im.chop_subtract(image2.im, scale, offset,
+                                 Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def add_modulo(image1, image2):
+def add_modulo(image1, image2, out=None):
     """Add two images, without clipping the result.
 
     .. code-block:: python
@@ -183,10 +193,11 @@ def add_modulo(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_add_modulo(image2.im))
+    im = image1.im.chop_add_modulo(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def subtract_modulo(image1, image2):
+def subtract_modulo(image1, image2, out=None):
     """Subtract two images, without clipping the result.
 
     .. code-block:: python
@@ -198,10 +209,12 @@ def subtract_modulo(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_subtract_modulo(image2.im))
+    im = image1.im.chop_subtract_modulo(image2.im,
+                                        Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def logical_and(image1, image2):
+def logical_and(image1, image2, out=None):
     """Logical AND between two images.
 
     .. code-block:: python
@@ -213,10 +226,11 @@ def logical_and(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_and(image2.im))
+    im = image1.im.chop_and(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def logical_or(image1, image2):
+def logical_or(image1, image2, out=None):
     """Logical OR between two images.
 
     .. code-block:: python
@@ -228,10 +242,11 @@ def logical_or(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_or(image2.im))
+    im = image1.im.chop_or(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
-def logical_xor(image1, image2):
+def logical_xor(image1, image2, out=None):
     """Logical XOR between two images.
 
     .. code-block:: python
@@ -243,7 +258,8 @@ def logical_xor(image1, image2):
 
     image1.load()
     image2.load()
-    return image1._new(image1.im.chop_xor(image2.im))
+    im = image1.im.chop_xor(image2.im, Image._getoutput(out))
+    return image1._new(im, out)
 
 
 def blend(image1, image2, alpha):
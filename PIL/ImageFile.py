@@ -33,6 +33,15 @@ import io
 import os
 import sys
 import struct
+import weakref
+
+try:
+    from _thread import RLock as _RLock
+except ImportError:  # Python 2
+    from threading import RLock as _RLock
+
+# serializes the reads of file handles sharing a file object
+_shared_lock = _RLock()
 
 MAXBLOCK = 65536
 
@@ -40,6 +49,9 @@ SAFEBLOCK = 1024*1024
 
 LOAD_TRUNCATED_IMAGES = False
 
+# number of threads decoding the tiles of an image at the same time
+LOAD_WORKERS = 1
+
 ERRORS = {
     -1: "image buffer overrun error",
     -2: "decoding error",
@@ -68,6 +80,268 @@ def _tilesort(t):
     return t[2]
 
 
+def _rawargs(args):
+    # rawmode, stride and row step from raw decoder arguments
+    if not isinstance(args, tuple):
+        args = (args,)
+    return (args + (0, 1))[:3]
+
+
+def _independent(tile, mode, size):
+    # tiles can be decoded at the same time if their targets do not
+    # overlap, or if they have the same extents and each one fills a
+    # different band
+    extents = {}
+    for d, e, o, a in tile:
+        if e[0] == 0 and e[2] == 0:
+            e = (0, 0) + size
+        extents.setdefault(tuple(e), []).append(_rawargs(a)[0])
+
+    try:
+        bandnames = Image.getmodebandnames(mode)
+    except KeyError:
+        bandnames = ()
+    for rawmodes in extents.values():
+        if len(rawmodes) > 1:
+            bands = [isinstance(r, str) and r.split(";")[0]
+                     for r in rawmodes]
+            if len(set(bands)) < len(bands) or \
+                    not all(band in bandnames for band in bands):
+                return False
+
+    # sweep down the image, keeping the extents that reach the
+    # current row
+    active = []
+    for x0, y0, x1, y1 in sorted(extents, key=lambda e: (e[1], e[0])):
+        active = [e for e in active if e[3] > y0]
+        for e in active:
+            if e[0] < x1 and x0 < e[2]:
+                return False
+        active.append((x0, y0, x1, y1))
+    return True
+
+
+def _fileno(fp):
+    # the descriptor of a file that can be read with os.pread, or None
+    raw = getattr(fp, "raw", fp)
+    if hasattr(os, "pread") and isinstance(raw, io.FileIO):
+        return raw.fileno()
+    return None
+
+
+def _byteview(data):
+    # a flat memoryview of the bytes of a buffer.  Python 2 can't cast
+    # memoryviews, and its mmap objects only support the old buffer
+    # protocol, which buffer() wraps
+    try:
+        view = memoryview(data)
+    except TypeError:
+        if bytes is not str:
+            raise
+        view = memoryview(buffer(data))
+    if view.ndim != 1 or view.itemsize != 1:
+        if not hasattr(view, "cast"):
+            raise ValueError("buffer must be one-dimensional bytes")
+        view = view.cast("B")
+    return view
+
+
+class _TileReader(object):
+    # reads from an offset without moving the file pointer of a shared
+    # file, using positional reads where possible and a lock otherwise
+
+    def __init__(self, fp, fd, offset, lock):
+        self.fp = fp
+        self.fd = fd
+        self.offset = offset
+        self.lock = lock
+
+    def read(self, size):
+        if self.fd is not None:
+            s = os.pread(self.fd, size, self.offset)
+        else:
+            with self.lock:
+                self.fp.seek(self.offset)
+                s = self.fp.read(size)
+        self.offset += len(s)
+        return s
+
+    def readinto(self, buffer):
+        n = os.preadv(self.fd, [buffer], self.offset)
+        self.offset += n
+        return n
+
+
+class _PositionalFile(io.RawIOBase):
+    # file object reading from a position of its own, so that it does
+    # not move the position of other file objects on the same file.  it
+    # reads a file descriptor with os.pread, or else seeks the shared
+    # file object under a lock, and puts its position back
+
+    def __init__(self, fd, fp=None):
+        self.fd = fd
+        self.fp = fp
+        self.offset = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.fd is None:
+            with _shared_lock:
+                position = self.fp.tell()
+                try:
+                    self.fp.seek(self.offset)
+                    s = self.fp.read(len(buffer))
+                finally:
+                    self.fp.seek(position)
+            n = len(s)
+            _byteview(buffer)[:n] = s
+        elif hasattr(os, "preadv"):
+            n = os.preadv(self.fd, [buffer], self.offset)
+        else:
+            s = os.pread(self.fd, len(buffer), self.offset)
+            n = len(s)
+            _byteview(buffer)[:n] = s
+        self.offset += n
+        return n
+
+    def _size(self):
+        if self.fd is not None:
+            return os.fstat(self.fd).st_size
+        with _shared_lock:
+            position = self.fp.tell()
+            self.fp.seek(0, io.SEEK_END)
+            size = self.fp.tell()
+            self.fp.seek(position)
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.offset
+        elif whence == io.SEEK_END:
+            offset += self._size()
+        if offset < 0:
+            raise ValueError("negative seek position %d" % offset)
+        self.offset = offset
+        return offset
+
+    def tell(self):
+        return self.offset
+
+
+class _Buffer(object):
+    # growable byte buffer for incremental decoding.  new data is added
+    # at the end, and consumed from the start.  the remaining data is
+    # only moved when at least as much has been consumed, and the
+    # buffer grows geometrically, so the total amount of copying is
+    # linear in the amount of data passed through the buffer.
+
+    def __init__(self, data=b"", size=MAXBLOCK):
+        self.buffer = bytearray(max(len(data), size))
+        self.buffer[:len(data)] = data
+        self.start = 0
+        self.end = len(data)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def view(self):
+        # unconsumed data
+        return memoryview(self.buffer)[self.start:self.end]
+
+    def consume(self, size):
+        self.start += size
+        if self.start >= self.end:
+            self.clear()
+
+    def clear(self):
+        self.start = self.end = 0
+
+    def reserve(self, size):
+        # returns a writable view of size bytes at the end of the data;
+        # call commit to add what was written to the data
+        if len(self.buffer) - self.end < size:
+            used = self.end - self.start
+            if self.start >= used and len(self.buffer) - used >= size:
+                self.buffer[:used] = self.buffer[self.start:self.end]
+            else:
+                # the old buffer may still be exported, so don't resize
+                # it in place
+                buffer = bytearray(max(2 * len(self.buffer), used + size))
+                buffer[:used] = self.buffer[self.start:self.end]
+                self.buffer = buffer
+            self.start, self.end = 0, used
+        return memoryview(self.buffer)[self.end:self.end + size]
+
+    def commit(self, size):
+        self.end += size
+
+    def append(self, data):
+        self.reserve(len(data))[:] = data
+        self.commit(len(data))
+
+
+class _BufferFile(io.BufferedIOBase):
+    # read-only file object over the memory of an object supporting the
+    # buffer protocol, such as bytes, bytearray, memoryview or mmap.
+    # reads return copies, for the plugins parsing headers; getbuffer
+    # returns the memory itself, which is decoded without copying
+
+    def __init__(self, data):
+        self._view = _byteview(data)
+        self._pos = 0
+
+    def getbuffer(self):
+        return self._view
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        start = self._pos
+        if size is None or size < 0:
+            self._pos = len(self._view)
+        else:
+            self._pos = min(start + size, len(self._view))
+        return self._view[start:self._pos].tobytes()
+
+    read1 = read
+
+    def readinto(self, buffer):
+        data = self._view[self._pos:self._pos + len(buffer)]
+        n = len(data)
+        _byteview(buffer)[:n] = data
+        self._pos += n
+        return n
+
+    def peek(self, size=0):
+        return self._view[self._pos:self._pos + max(size, 1)].tobytes()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError("negative seek position %d" % offset)
+        self._pos = offset
+        return offset
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        self._view = memoryview(b"")
+        super(_BufferFile, self).close()
+
+
 #
 # --------------------------------------------------------------------
 # ImageFile base class
@@ -75,12 +349,25 @@ def _tilesort(t):
 class ImageFile(Image.Image):
     "Base class for image file format handlers."
 
+    # number of load calls in progress
+    _loading = 0
+
+    # the file opened by frame_handle, closed with the image
+    _handle_fp = None
+
+    # the file object the image was opened from, see __init__
+    _source_ref = None
+
     def __init__(self, fp=None, filename=None):
         Image.Image.__init__(self)
 
         self.tile = None
         self.readonly = 1  # until we know better
 
+        # held while loading, so that an image shared between threads
+        # is decoded once
+        self._load_lock = _RLock()
+
         self.decoderconfig = ()
         self.decodermaxblock = MAXBLOCK
 
@@ -92,6 +379,12 @@ class ImageFile(Image.Image):
             # stream
             self.fp = fp
             self.filename = filename
+        # the file object the image was opened from, for frame_handle.
+        # weak, so that it is closed once the plugin lets go of it
+        try:
+            self._source_ref = weakref.ref(self.fp)
+        except TypeError:
+            self._source_ref = None
 
         try:
             self._open()
@@ -105,11 +398,84 @@ class ImageFile(Image.Image):
         if not self.mode or self.size[0] <= 0:
             raise SyntaxError("not identified by this driver")
 
+    def __setstate__(self, state):
+        # unpickled images don't go through __init__
+        self._load_lock = _RLock()
+        self.decoderconfig = ()
+        self.decodermaxblock = MAXBLOCK
+        Image.Image.__setstate__(self, state)
+
     def draft(self, mode, size):
         "Set draft mode"
 
         pass
 
+    def frame_handle(self, frame):
+        """
+        Opens another image object on the file of this image, positioned
+        at the given frame.  The new image reads the file from its own
+        position, using :py:func:`os.pread`, a file object of its own or,
+        on platforms without :py:func:`os.pread`, a lock around the reads
+        of the shared file object, so frames of one file can be loaded by several threads at the
+        same time, one image object per thread::
+
+            def load_frame(i):
+                with im.frame_handle(i) as frame:
+                    frame.load()
+                    return frame.copy()
+
+            frames = pool.map(load_frame, range(im.n_frames))
+
+        For formats whose frames build on the previous frames, such as
+        GIF and FLI, the new image decodes the frames before the given one.
+
+        :param frame: Frame number, starting at 0.
+        :returns: An :py:class:`~PIL.ImageFile.ImageFile` object.
+        :exception EOFError: If the frame does not exist.
+        :exception IOError: If the image was opened from a file object
+                            that cannot be read from another position.
+        """
+
+        fp = self._reopen()
+        try:
+            im = self.__class__(fp, self.filename)
+            im._handle_fp = fp
+            im.seek(frame)
+        except:
+            fp.close()
+            raise
+        return im
+
+    def _reopen(self):
+        # a new file object on the file of this image, with a position of
+        # its own
+        if self.filename:
+            return open(self.filename, "rb")
+        fp = self.fp
+        if fp is None and self._source_ref is not None:
+            # loaded.  plugins for formats with several frames keep the
+            # file open to seek to the other frames
+            fp = self._source_ref()
+        if fp is None or getattr(fp, "closed", False):
+            raise IOError("cannot open another handle on a closed file")
+        if isinstance(fp, _BufferFile):
+            return _BufferFile(fp.getbuffer())
+        fd = _fileno(fp)
+        if fd is not None:
+            return io.BufferedReader(_PositionalFile(fd))
+        if hasattr(fp, "getvalue"):
+            return _BufferFile(fp.getvalue())
+        if hasattr(fp, "seek") and hasattr(fp, "fileno"):
+            # no os.pread; share the file object
+            return io.BufferedReader(_PositionalFile(None, fp))
+        raise IOError("cannot open another handle on this file")
+
+    def close(self):
+        if self._handle_fp is not None:
+            self._handle_fp.close()
+            self._handle_fp = None
+        Image.Image.close(self)
+
     def verify(self):
         "Check file integrity"
 
@@ -117,8 +483,42 @@ class ImageFile(Image.Image):
         # directly after open, and closes file when finished.
         self.fp = None
 
-    def load(self):
-        "Load image data based on tile list"
+    def load(self, box=None):
+        """
+        Load image data based on tile list.
+
+        :param box: If given, only the tiles intersecting this region,
+                    a (left, upper, right, lower)-tuple, are decoded,
+                    and a new image of the region is returned instead
+                    of an access object.  The image itself is not loaded
+                    if the format allows decoding parts of it.
+
+        The image may be loaded by several threads at the same time.  It
+        is decoded by one of them, and the others wait for it.
+        """
+
+        if box is None and self.tile == [] and not self._loading:
+            # loaded, and no other thread is finishing the load
+            return Image.Image.load(self)
+
+        with self._load_lock:
+            self._loading += 1
+            try:
+                return self._load_image(box)
+            finally:
+                self._loading -= 1
+
+    def _load_image(self, box):
+        # load, with the load lock held.  the tile list is checked again,
+        # since another thread may have loaded the image while this one
+        # waited for the lock
+        if box is not None:
+            region = self._load_region(box)
+            if region is None:
+                # decode the whole image
+                self.load()
+                region = self.crop(box)
+            return region
 
         pixel = Image.Image.load(self)
 
@@ -128,50 +528,56 @@ class ImageFile(Image.Image):
             return pixel
 
         self.map = None
-        use_mmap = self.filename and len(self.tile) == 1
         # As of pypy 2.1.0, memory mapping was failing here.
-        use_mmap = use_mmap and not hasattr(sys, 'pypy_version_info')
+        use_mmap = not hasattr(sys, 'pypy_version_info')
 
         readonly = 0
 
+        parallel = LOAD_WORKERS > 1 and len(self.tile) > 1
+
         # look for read/seek overrides
+        view = None
         try:
             read = self.load_read
-            # don't use mmap if there are custom read/seek functions
-            use_mmap = False
+            # don't use mmap or positional reads if there are custom
+            # read/seek functions
+            use_mmap = parallel = False
+            readinto = None
         except AttributeError:
             read = self.fp.read
+            readinto = getattr(self.fp, "readinto", None)
+            view = self._view()
 
         try:
             seek = self.load_seek
-            use_mmap = False
+            use_mmap = parallel = False
+            view = None
         except AttributeError:
             seek = self.fp.seek
 
-        if use_mmap:
+        tiles = use_mmap and self._map_tiles()
+        if tiles:
             # try memory mapping
-            d, e, o, a = self.tile[0]
-            if d == "raw" and a[0] == self.mode and a[0] in Image._MAPMODES:
-                try:
-                    if hasattr(Image.core, "map"):
-                        # use built-in mapper
-                        self.map = Image.core.map(self.filename)
-                        self.map.seek(o)
-                        self.im = self.map.readimage(
-                            self.mode, self.size, a[1], a[2]
-                            )
-                    else:
-                        # use mmap, if possible
-                        import mmap
-                        fp = open(self.filename, "r")
-                        size = os.path.getsize(self.filename)
-                        self.map = mmap.mmap(fp.fileno(), size, access=mmap.ACCESS_READ)
-                        self.im = Image.core.map_buffer(
-                            self.map, self.size, d, e, o, a
-                            )
-                    readonly = 1
-                except (AttributeError, EnvironmentError, ImportError):
-                    self.map = None
+            try:
+                if hasattr(Image.core, "map") and self.filename and \
+                        len(tiles) == 1:
+                    # use built-in mapper
+                    y0, y1, o, stride, ystep = tiles[0]
+                    self.map = Image.core.map(self.filename)
+                    self.map.seek(o)
+                    self.im = self.map.readimage(
+                        self.mode, self.size, stride, ystep
+                        )
+                else:
+                    # use mmap, or the buffer of the file object
+                    self.map = self._map_source()
+                    self.im = Image.core.map_tiles(
+                        self.map, self.size, self.mode, tiles
+                        )
+                readonly = 1
+            except (AttributeError, EnvironmentError, ImportError,
+                    ValueError):
+                self.map = None
 
         self.load_prepare()
 
@@ -185,44 +591,28 @@ class ImageFile(Image.Image):
             except AttributeError:
                 prefix = b""
 
-            for d, e, o, a in self.tile:
-                d = Image._getdecoder(self.mode, d, a, self.decoderconfig)
-                seek(o)
-                try:
-                    d.setimage(self.im, e)
-                except ValueError:
-                    continue
-                b = prefix
-                while True:
+            if parallel and _independent(self.tile, self.mode, self.size):
+                e = self._load_parallel(prefix)
+            else:
+                # one buffer for all tiles
+                b = _Buffer(size=2 * self.decodermaxblock)
+
+                for d, e, o, a in self.tile:
+                    if readinto and not prefix and \
+                            self._load_raw(d, e, o, a, seek, readinto):
+                        e = 0
+                        continue
+                    d = Image._getdecoder(self.mode, d, a,
+                                          self.decoderconfig)
+                    seek(o)
                     try:
-                        s = read(self.decodermaxblock)
-                    except (IndexError, struct.error):  # truncated png/gif
-                        if LOAD_TRUNCATED_IMAGES:
-                            break
-                        else:
-                            raise IOError("image file is truncated")
-
-                    if not s and not d.handles_eof:  # truncated jpeg
-                        self.tile = []
-
-                        # JpegDecode needs to clean things up here either way
-                        # If we don't destroy the decompressor,
-                        # we have a memory leak.
-                        d.cleanup()
-
-                        if LOAD_TRUNCATED_IMAGES:
-                            break
-                        else:
-                            raise IOError("image file is truncated "
-                                          "(%d bytes not processed)" % len(b))
-
-                    b = b + s
-                    n, e = d.decode(b)
-                    if n < 0:
-                        break
-                    b = b[n:]
-                # Need to cleanup here to prevent leaks in PyPy
-                d.cleanup()
+                        d.setimage(self.im, e)
+                    except ValueError:
+                        continue
+                    if view is not None and not prefix:
+                        e = self._decode_view(d, view[o:])
+                    else:
+                        e = self._decode_tile(d, b, prefix, read, readinto)
 
         self.tile = []
         self.readonly = readonly
@@ -243,6 +633,419 @@ class ImageFile(Image.Image):
 
         return Image.Image.load(self)
 
+    def _load_region(self, box):
+        # decode the tiles intersecting box into a new image.  returns
+        # None if the whole image has to be loaded instead
+        if not self.tile or hasattr(self, "load_read") or \
+                hasattr(self, "load_seek") or \
+                hasattr(self, "tile_post_rotate"):
+            return None
+        if not hasattr(sys, 'pypy_version_info') and self._map_tiles():
+            # mapping the whole image costs less than reading the region
+            return None
+
+        # same rounding as crop
+        x0, y0, x1, y1 = map(int, map(round, box))
+        x1 = max(x0, x1)
+        y1 = max(y0, y1)
+        region = self._new(Image.core.new(self.mode, (x1 - x0, y1 - y0)))
+
+        try:
+            prefix = self.tile_prefix
+        except AttributeError:
+            prefix = b""
+
+        b = _Buffer(size=2 * self.decodermaxblock)
+        readinto = getattr(self.fp, "readinto", None)
+        view = None
+        if not prefix:
+            view = self._view()
+            if view is None:
+                # decoders given the rest of the file at once may skip
+                # the rows above the region without decoding them
+                try:
+                    view = _byteview(self._map_fp())
+                except (AttributeError, EnvironmentError, ValueError):
+                    pass
+        tile = self.tile
+        # whole tiles decoded outside the region, by extents.  tiles
+        # holding different bands of the same extents share one image
+        tiles = {}
+        e = 0
+        try:
+            for d, extents, o, a in sorted(tile, key=_tilesort):
+                if extents[0] == 0 and extents[2] == 0:
+                    extents = (0, 0) + self.size
+                tx0, ty0, tx1, ty1 = extents = tuple(extents)
+                if max(tx0, x0) >= min(tx1, x1) or \
+                        max(ty0, y0) >= min(ty1, y1):
+                    continue
+                d = Image._getdecoder(self.mode, d, a, self.decoderconfig)
+                if d.handles_region or (x0 <= tx0 and y0 <= ty0 and
+                                        tx1 <= x1 and ty1 <= y1):
+                    # the decoder stores the part inside the region
+                    target = region.im
+                    dest = (tx0 - x0, ty0 - y0, tx1 - x0, ty1 - y0)
+                else:
+                    # decode the whole tile, and copy the part inside
+                    # the region later
+                    if extents not in tiles:
+                        tiles[extents] = Image.core.new(
+                            self.mode, (tx1 - tx0, ty1 - ty0))
+                    target = tiles[extents]
+                    dest = (0, 0) + target.size
+                self.fp.seek(o)
+                try:
+                    d.setimage(target, dest)
+                except ValueError:
+                    continue
+                if view is not None:
+                    d.complete_data = True
+                    e = self._decode_view(d, view[o:])
+                else:
+                    e = self._decode_tile(d, b, prefix, self.fp.read,
+                                          readinto)
+        finally:
+            # a truncated tile clears the tile list, but the image itself
+            # has not been loaded
+            self.tile = tile
+
+        for (tx0, ty0, tx1, ty1), im in tiles.items():
+            ix0, iy0 = max(tx0, x0), max(ty0, y0)
+            ix1, iy1 = min(tx1, x1), min(ty1, y1)
+            region.im.paste(
+                im.crop((ix0 - tx0, iy0 - ty0, ix1 - tx0, iy1 - ty0)),
+                (ix0 - x0, iy0 - y0, ix1 - x0, iy1 - y0))
+
+        if not LOAD_TRUNCATED_IMAGES and e < 0:
+            raise_ioerror(e)
+        return region
+
+    def _decode_tile(self, d, b, prefix, read, readinto):
+        # feed the data of one tile to its decoder, using b as the
+        # buffer.  returns the last error code of the decoder
+        e = 0
+        b.clear()
+        b.append(prefix)
+        while True:
+            try:
+                if readinto:
+                    # read straight into the decoder buffer
+                    size = readinto(b.reserve(self.decodermaxblock)) or 0
+                    b.commit(size)
+                else:
+                    s = read(self.decodermaxblock)
+                    b.append(s)
+                    size = len(s)
+            except (IndexError, struct.error):  # truncated png/gif
+                if LOAD_TRUNCATED_IMAGES:
+                    break
+                else:
+                    raise IOError("image file is truncated")
+
+            if not size and not d.handles_eof:  # truncated jpeg
+                self.tile = []
+
+                # JpegDecode needs to clean things up here either way
+                # If we don't destroy the decompressor,
+                # we have a memory leak.
+                d.cleanup()
+
+                if LOAD_TRUNCATED_IMAGES:
+                    break
+                else:
+                    raise IOError("image file is truncated "
+                                  "(%d bytes not processed)" % len(b))
+
+            n, e = d.decode(b.view())
+            if n < 0:
+                break
+            b.consume(n)
+        # Need to cleanup here to prevent leaks in PyPy
+        d.cleanup()
+        return e
+
+    def _view(self):
+        # the memory holding the file, if it was opened from a buffer
+        if isinstance(self.fp, _BufferFile):
+            return self.fp.getbuffer()
+        return None
+
+    def _decode_view(self, d, view):
+        # feed the data of one tile to its decoder straight from the
+        # memory holding the file, starting at the tile.  returns the
+        # last error code of the decoder
+        e = 0
+        while True:
+            n, e = d.decode(view)
+            if n < 0:
+                break
+            if not n and not d.handles_eof:
+                # the decoder needs more data than the file has
+                self.tile = []
+                d.cleanup()
+                if LOAD_TRUNCATED_IMAGES:
+                    break
+                raise IOError("image file is truncated "
+                              "(%d bytes not processed)" % len(view))
+            view = view[n:]
+        d.cleanup()
+        return e
+
+    def _load_parallel(self, prefix):
+        # decode the tiles on LOAD_WORKERS threads.  each tile is read
+        # from its own offset, and the decoders release the GIL while
+        # decoding.  returns the error code of the last tile, like the
+        # sequential loop
+        import threading
+
+        lock = threading.Lock()
+        fd = _fileno(self.fp)
+        view = None if prefix else self._view()
+        jobs = iter(enumerate(self.tile))
+        codes = [0] * len(self.tile)
+        errors = []
+
+        def work():
+            b = _Buffer(size=2 * self.decodermaxblock)
+            while True:
+                with lock:
+                    if errors:
+                        return
+                    i, (d, e, o, a) = next(jobs, (None, (None,) * 4))
+                if d is None:
+                    return
+                try:
+                    d = Image._getdecoder(self.mode, d, a,
+                                          self.decoderconfig)
+                    try:
+                        d.setimage(self.im, e)
+                    except ValueError:
+                        continue
+                    if view is not None:
+                        codes[i] = self._decode_view(d, view[o:])
+                        continue
+                    reader = _TileReader(self.fp, fd, o, lock)
+                    if fd is not None and hasattr(os, "preadv"):
+                        readinto = reader.readinto
+                    else:
+                        readinto = None
+                    codes[i] = self._decode_tile(d, b, prefix, reader.read,
+                                                 readinto)
+                except Exception as v:
+                    with lock:
+                        errors.append(v)
+                    return
+
+        threads = [threading.Thread(target=work)
+                   for i in range(min(LOAD_WORKERS, len(self.tile)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if errors:
+            raise errors[0]
+        return codes[-1]
+
+    def _map_tiles(self):
+        # full width strips of uncompressed data laid out like image
+        # memory can be mapped.  returns the strips as arguments for
+        # core.map_tiles, or None
+        tiles = []
+        for d, e, o, a in self.tile:
+            rawmode, stride, ystep = _rawargs(a)
+            if d != "raw" or rawmode != self.mode or \
+                    rawmode not in Image._MAPMODES or ystep not in (1, -1):
+                return None
+            if e[0] != 0 or e[2] != self.size[0]:
+                return None
+            tiles.append((e[1], e[3], o, stride, ystep))
+        return tiles
+
+    def _map_source(self):
+        # the file contents as a buffer, without copying them if possible
+        import mmap
+        if self.filename:
+            with open(self.filename, "rb") as fp:
+                return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map_fp()
+
+    def _map_fp(self):
+        # the contents of the file object as a buffer, without copying
+        # them if possible
+        import mmap
+        if isinstance(self.fp, _BufferFile):
+            return self.fp.getbuffer()
+        if hasattr(self.fp, "getvalue"):
+            # BytesIO shares its data with the value, where it can
+            return self.fp.getvalue()
+        try:
+            memoryview(self.fp)
+        except TypeError:
+            return mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # an mmap, or another object supporting the buffer protocol
+            return self.fp
+
+    def _load_raw(self, decoder, extents, offset, args, seek, readinto):
+        # read uncompressed tiles laid out like image memory straight
+        # into the image.  returns False if the tile must be decoded.
+        if decoder != "raw":
+            return False
+        rawmode, stride, ystep = _rawargs(args)
+        if rawmode != self.mode or rawmode not in Image._MAPMODES or \
+                ystep not in (1, -1):
+            return False
+        x0, y0, x1, y1 = extents
+        if x0 < 0 or y0 < 0 or x1 > self.size[0] or y1 > self.size[1] or \
+                x0 > x1 or y0 > y1:
+            return False
+
+        seek(offset)
+        rows = self.im.readrows(readinto, extents, stride, ystep)
+        if rows < y1 - y0 and not LOAD_TRUNCATED_IMAGES:
+            raise IOError("image file is truncated")
+        return True
+
+    def iter_rows(self, band=64):
+        """
+        Decodes the image from top to bottom in bands of rows, without
+        loading the whole image.  Each band is an image of the full
+        width of this image and ``band`` rows, except for the last one,
+        which may have fewer rows.
+
+        The same image is reused for every band, so only one band is
+        held in memory at a time.  Copy a band to keep its pixels.
+        Images that cannot be decoded one band at a time, such as
+        interlaced or tiled images, are loaded completely, and the
+        bands are cropped from the loaded image.
+
+        :param band: The number of rows in a band.
+        :returns: An iterator over the bands.
+        """
+
+        if band < 1:
+            raise ValueError("band must have at least one row")
+        return self._iter_rows(band)
+
+    def _stream_tiles(self):
+        # the tiles in file order, if they are full width strips from
+        # the top to the bottom of the image, and their decoders can
+        # pause at a row limit.  otherwise None
+        if not self.tile or hasattr(self, "tile_post_rotate"):
+            return None
+        xsize, ysize = self.size
+        tiles = []
+        y = 0
+        for d, e, o, a in sorted(self.tile, key=_tilesort):
+            if e[0] == 0 and e[2] == 0:
+                e = (0, 0) + self.size
+            if e[0] != 0 or e[2] != xsize or e[1] != y or e[3] <= y:
+                return None
+            try:
+                decoder = Image._getdecoder(self.mode, d, a,
+                                            self.decoderconfig)
+            except IOError:
+                return None
+            if not decoder.handles_row_limit:
+                return None
+            tiles.append((decoder, tuple(e), o))
+            y = e[3]
+        if y != ysize:
+            return None
+        return tiles
+
+    def _iter_rows(self, band):
+        xsize, ysize = self.size
+        tiles = self._stream_tiles()
+        if tiles is None:
+            self.load()
+            for y in range(0, ysize, band):
+                yield self.crop((0, y, xsize, min(y + band, ysize)))
+            return
+
+        read = getattr(self, "load_read", None)
+        seek = getattr(self, "load_seek", self.fp.seek)
+        readinto = None
+        if not read:
+            read = self.fp.read
+            if not hasattr(self, "load_seek"):
+                readinto = getattr(self.fp, "readinto", None)
+        try:
+            prefix = self.tile_prefix
+        except AttributeError:
+            prefix = b""
+
+        # the decoders write to a ring of the height of the image, whose
+        # rows cycle through the rows of the band
+        im = Image.core.new(self.mode, (xsize, band))
+        ring = im.ring(ysize)
+        image = self._new(im)
+
+        b = _Buffer(size=2 * self.decodermaxblock)
+        top = 0  # first row of the current band
+        y = 0  # rows decoded so far
+        for d, (x0, y0, x1, y1), o in tiles:
+            seek(o)
+            d.setimage(ring, (x0, y0, x1, y1))
+            b.clear()
+            b.append(prefix)
+            paused = False
+            n = e = 0
+            while True:
+                d.row_limit = min(top + band, y1) - y0
+                if not paused:
+                    try:
+                        if readinto:
+                            size = readinto(
+                                b.reserve(self.decodermaxblock)) or 0
+                            b.commit(size)
+                        else:
+                            s = read(self.decodermaxblock)
+                            b.append(s)
+                            size = len(s)
+                    except (IndexError, struct.error):  # truncated png
+                        if LOAD_TRUNCATED_IMAGES:
+                            size = None
+                        else:
+                            raise IOError("image file is truncated")
+                    if size is None or not size and not d.handles_eof:
+                        d.cleanup()
+                        if not LOAD_TRUNCATED_IMAGES:
+                            raise IOError("image file is truncated "
+                                          "(%d bytes not processed)" %
+                                          len(b))
+                        break
+                n, e = d.decode(b.view())
+                y = y0 + d.row
+                if n < 0:
+                    break
+                b.consume(n)
+                paused = y >= top + band
+                if paused:
+                    yield image
+                    top += band
+            d.cleanup()
+            if n < 0 and e < 0 and not LOAD_TRUNCATED_IMAGES:
+                raise_ioerror(e)
+            if y < y1:
+                # truncated
+                break
+            if y >= top + band:
+                yield image
+                top += band
+
+        # the rest of a truncated image is left black, as with load
+        while top < ysize:
+            if y < top + band:
+                im.paste(0, (0, max(y, top) - top, xsize, band))
+            if top + band <= ysize:
+                yield image
+            else:
+                yield image.crop((0, 0, xsize, ysize - top))
+            top += band
+
     def load_prepare(self):
         # create image memory if necessary
         if not self.im or\
@@ -308,6 +1111,7 @@ class Parser(object):
     decoder = None
     offset = 0
     finished = 0
+    tried = 0
 
     def reset(self):
         """
@@ -330,22 +1134,54 @@ class Parser(object):
             return
 
         if self.data is None:
-            self.data = data
-        else:
-            self.data = self.data + data
+            self.data = _Buffer()
+        self.data.append(data)
+
+        self._parse()
+
+    def feed_into(self, readinto, size=MAXBLOCK):
+        """
+        (Consumer) Read data straight into the parser's buffer, and
+        parse it.  This saves copying the data, for example when reading
+        from a socket::
+
+            while parser.feed_into(sock.recv_into):
+                pass
+
+        :param readinto: A function that reads data into a writable
+                         buffer and returns the number of bytes read, such
+                         as :py:meth:`socket.socket.recv_into` or the
+                         ``readinto`` method of a file object.
+        :param size: The maximum number of bytes to read.
+        :returns: The number of bytes read, or 0 once the image is
+                  complete.
+        :exception IOError: If the parser failed to parse the image file.
+        """
+        if self.finished:
+            return 0
+
+        if self.data is None:
+            self.data = _Buffer()
+        n = readinto(self.data.reserve(size)) or 0
+        self.data.commit(n)
+
+        self._parse()
+
+        return n
 
+    def _parse(self):
         # parse what we have
         if self.decoder:
 
             if self.offset > 0:
                 # skip header
                 skip = min(len(self.data), self.offset)
-                self.data = self.data[skip:]
+                self.data.consume(skip)
                 self.offset = self.offset - skip
                 if self.offset > 0 or not self.data:
                     return
 
-            n, e = self.decoder.decode(self.data)
+            n, e = self.decoder.decode(self.data.view())
 
             if n < 0:
                 # end of stream
@@ -358,7 +1194,7 @@ class Parser(object):
                 else:
                     # end of image
                     return
-            self.data = self.data[n:]
+            self.data.consume(n)
 
         elif self.image:
 
@@ -367,40 +1203,45 @@ class Parser(object):
             # available data
             pass
 
-        else:
+        elif len(self.data) >= 2 * self.tried:
+
+            # attempt to open this file.  to keep the total work linear,
+            # only try again once the amount of data has doubled
+            self._open()
 
-            # attempt to open this file
+    def _open(self):
+        self.tried = len(self.data)
+        try:
             try:
-                try:
-                    fp = io.BytesIO(self.data)
-                    im = Image.open(fp)
-                finally:
-                    fp.close()  # explicitly close the virtual file
-            except IOError:
-                # traceback.print_exc()
-                pass  # not enough data
+                fp = io.BytesIO(self.data.view())
+                im = Image.open(fp)
+            finally:
+                fp.close()  # explicitly close the virtual file
+        except IOError:
+            # traceback.print_exc()
+            pass  # not enough data
+        else:
+            flag = hasattr(im, "load_seek") or hasattr(im, "load_read")
+            if flag or len(im.tile) != 1:
+                # custom load code, or multiple tiles
+                self.decode = None
             else:
-                flag = hasattr(im, "load_seek") or hasattr(im, "load_read")
-                if flag or len(im.tile) != 1:
-                    # custom load code, or multiple tiles
-                    self.decode = None
-                else:
-                    # initialize decoder
-                    im.load_prepare()
-                    d, e, o, a = im.tile[0]
-                    im.tile = []
-                    self.decoder = Image._getdecoder(
-                        im.mode, d, a, im.decoderconfig
-                        )
-                    self.decoder.setimage(im.im, e)
-
-                    # calculate decoder offset
-                    self.offset = o
-                    if self.offset <= len(self.data):
-                        self.data = self.data[self.offset:]
-                        self.offset = 0
-
-                self.image = im
+                # initialize decoder
+                im.load_prepare()
+                d, e, o, a = im.tile[0]
+                im.tile = []
+                self.decoder = Image._getdecoder(
+                    im.mode, d, a, im.decoderconfig
+                    )
+                self.decoder.setimage(im.im, e)
+
+                # calculate decoder offset
+                self.offset = o
+                if self.offset <= len(self.data):
+                    self.data.consume(self.offset)
+                    self.offset = 0
+
+            self.image = im
 
     def close(self):
         """
@@ -411,6 +1252,9 @@ class Parser(object):
                             because it cannot be identified or cannot be
                             decoded.
         """
+        # data that arrived since the last attempt to open the file
+        if not self.image and self.data and len(self.data) > self.tried:
+            self._open()
         # finish decoding
         if self.decoder:
             # get rid of what's left in the buffers
@@ -424,7 +1268,7 @@ class Parser(object):
             # incremental parsing not possible; reopen the file
             # not that we have all data
             try:
-                fp = io.BytesIO(self.data)
+                fp = io.BytesIO(self.data.view())
                 self.image = Image.open(fp)
             finally:
                 self.image.load()
@@ -432,6 +1276,196 @@ class Parser(object):
         return self.image
 
 
+# --------------------------------------------------------------------
+
+class ImageWriter(object):
+    """
+    Writes an image file one band of rows at a time, without holding the
+    whole image in memory.  Use :py:func:`PIL.Image.open_writer` to
+    create a writer.
+
+    The rows are encoded by the format's regular save function, which
+    runs on a separate thread and is handed each band as it is written.
+    Formats whose encoders need the whole image cannot be written this
+    way, and raise an :py:exc:`IOError` when the first rows are written.
+    """
+
+    def __init__(self, fp, format, mode, size, **params):
+        xsize, ysize = size
+        if xsize <= 0 or ysize <= 0:
+            raise ValueError("image must have a size")
+        self.mode = mode
+        self.size = xsize, ysize
+        self.rows = 0  # number of rows written so far
+
+        filename = ""
+        open_fp = False
+        if isPath(fp):
+            filename = fp
+            open_fp = True
+        elif hasattr(fp, "name") and isPath(fp.name):
+            filename = fp.name
+
+        if not format:
+            ext = os.path.splitext(filename)[1].lower()
+            if ext not in Image.EXTENSION:
+                Image.init()
+            format = Image.EXTENSION[ext]
+        if format.upper() not in Image.SAVE:
+            Image._import_plugin(format.upper(), save=True)
+        self.format = format.upper()
+        self._save_handler = Image.SAVE[self.format]
+
+        # the encoder reads the image from a ring, whose rows cycle
+        # through the rows of one band
+        self._band = Image.core.new(mode, (xsize, min(ysize, 64)))
+        self._image = Image.Image()._new(self._band.ring(ysize))
+        self._image.encoderinfo = params
+        self._image.encoderconfig = ()
+        self._image._writer = self
+
+        if open_fp:
+            fp = open(filename, "wb")
+        self.fp = fp
+        self.filename = filename
+        self._open_fp = open_fp
+        self._thread = None
+        self._error = None
+        self._available = 0  # rows passed to the encoder
+
+    def write_rows(self, block):
+        """
+        Writes the next rows of the image.
+
+        :param block: An image with the mode and width of the image
+                      being written, holding one or more rows.
+        """
+
+        xsize, ysize = self.size
+        if block.mode != self.mode or block.size[0] != xsize:
+            raise ValueError("rows must have mode %s and width %d" %
+                             (self.mode, xsize))
+        if self.rows + block.size[1] > ysize:
+            raise ValueError("image has only %d rows" % ysize)
+        if self._error:
+            raise self._error
+
+        block.load()
+        if self._thread is None:
+            self._start(block)
+
+        band = self._band.size[1]
+        y = 0
+        while y < block.size[1]:
+            # copy as many rows as fit before the end of the band, and
+            # wait for the encoder to consume them
+            r = self.rows % band
+            n = min(band - r, block.size[1] - y)
+            self._band.paste(block.im.crop((0, y, xsize, y + n)),
+                             (0, r, xsize, r + n))
+            y += n
+            self.rows += n
+            self._requests.put(self.rows)
+            self._reply()
+
+    def close(self):
+        """
+        Finishes writing the image file, and closes it if the writer
+        opened it.
+
+        :exception ValueError: If fewer rows than the height of the
+                               image were written.
+        """
+
+        try:
+            if self.rows < self.size[1]:
+                self._abort()
+                raise ValueError("only %d of %d rows were written" %
+                                 (self.rows, self.size[1]))
+        finally:
+            self._close_fp()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if args[0] is None:
+            self.close()
+        else:
+            self._abort()
+            self._close_fp()
+
+    def _start(self, block):
+        import threading
+        try:
+            import queue
+        except ImportError:
+            import Queue as queue
+
+        if self.mode == "P":
+            self._image.putpalette(block.getpalette())
+        self._requests = queue.Queue()
+        self._replies = queue.Queue()
+        self._thread = threading.Thread(target=self._work)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _work(self):
+        # saving thread
+        try:
+            self._save_handler(self._image, self.fp, self.filename)
+        except Exception as e:
+            self._replies.put(e)
+        else:
+            self._replies.put(True)
+
+    def _wait(self, encoder, box):
+        # called by the save function on the saving thread before each
+        # call to the encoder.  waits until rows beyond the encoder's
+        # current row have been written
+        y0, y1 = box[1], box[3]
+        if not encoder.handles_row_limit:
+            raise IOError("cannot write %s images one band at a time" %
+                          self.format)
+        if y0 + encoder.row >= self._available:
+            if self._available:
+                # the encoder has consumed the rows written so far
+                self._replies.put(None)
+            rows = self._requests.get()
+            if rows is None:
+                raise IOError("image file is incomplete")
+            self._available = rows
+        encoder.row_limit = min(self._available, y1) - y0
+
+    def _reply(self):
+        # wait for the saving thread to need more rows, or to finish.
+        # it replies None, True when done, or an exception
+        reply = self._replies.get()
+        if reply is True and self.rows < self.size[1]:
+            # the save function did not wait for the rows
+            reply = IOError("cannot write %s images one band at a time" %
+                            self.format)
+        if reply is not None:
+            self._thread.join()
+        if isinstance(reply, Exception):
+            self._error = reply
+            raise reply
+
+    def _abort(self):
+        # stop the saving thread if it is waiting for rows
+        if self._thread and self._thread.is_alive() and not self._error:
+            self._requests.put(None)
+            try:
+                self._reply()
+            except IOError:
+                pass
+
+    def _close_fp(self):
+        if self._open_fp:
+            self.fp.close()
+            self._open_fp = False
+
+
 # --------------------------------------------------------------------
 
 def _save(im, fp, tile, bufsize=0):
@@ -459,31 +1493,29 @@ def _save(im, fp, tile, bufsize=0):
         fh = fp.fileno()
         fp.flush()
     except (AttributeError, io.UnsupportedOperation):
-        # compress to Python file-compatible object
-        for e, b, o, a in tile:
-            e = Image._getencoder(im.mode, e, a, im.encoderconfig)
-            if o > 0:
-                fp.seek(o, 0)
-            e.setimage(im.im, b)
+        fh = None
+    # rows of images written by an ImageWriter arrive while encoding
+    writer = getattr(im, "_writer", None)
+    for e, b, o, a in tile:
+        e = Image._getencoder(im.mode, e, a, im.encoderconfig)
+        if o > 0:
+            fp.seek(o, 0)
+        e.setimage(im.im, b)
+        if fh is not None and not writer:
+            # slight speedup: compress to real file object
+            s = e.encode_to_file(fh, bufsize)
+        else:
+            # compress to Python file-compatible object
             while True:
+                if writer:
+                    writer._wait(e, b)
                 l, s, d = e.encode(bufsize)
                 fp.write(d)
                 if s:
                     break
-            if s < 0:
-                raise IOError("encoder error %d when writing image file" % s)
-            e.cleanup()
-    else:
-        # slight speedup: compress to real file object
-        for e, b, o, a in tile:
-            e = Image._getencoder(im.mode, e, a, im.encoderconfig)
-            if o > 0:
-                fp.seek(o, 0)
-            e.setimage(im.im, b)
-            s = e.encode_to_file(fh, bufsize)
-            if s < 0:
-                raise IOError("encoder error %d when writing image file" % s)
-            e.cleanup()
+        if s < 0:
+            raise IOError("encoder error %d when writing image file" % s)
+        e.cleanup()
     if hasattr(fp, "flush"):
         fp.flush()
 
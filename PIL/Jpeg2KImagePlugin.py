@@ -194,20 +194,26 @@ class Jpeg2KImageFile(ImageFile.ImageFile):
         self.tile = [('jpeg2k', (0, 0) + self.size, 0,
                       (self.codec, self.reduce, self.layers, fd, length))]
 
-    def load(self):
-        if self.reduce:
-            power = 1 << self.reduce
-            adjust = power >> 1
-            self.size = (int((self.size[0] + adjust) / power),
-                         int((self.size[1] + adjust) / power))
+    def load(self, box=None):
+        with self._load_lock:
+            if box is not None and self.reduce:
+                # loading scales the size down to the reduced image
+                self.load()
+                return self.crop(box)
 
-        if self.tile:
-            # Update the reduce and layers settings
-            t = self.tile[0]
-            t3 = (t[3][0], self.reduce, self.layers, t[3][3], t[3][4])
-            self.tile = [(t[0], (0, 0) + self.size, t[2], t3)]
+            if self.tile:
+                if self.reduce:
+                    power = 1 << self.reduce
+                    adjust = power >> 1
+                    self.size = (int((self.size[0] + adjust) / power),
+                                 int((self.size[1] + adjust) / power))
 
-        ImageFile.ImageFile.load(self)
+                # Update the reduce and layers settings
+                t = self.tile[0]
+                t3 = (t[3][0], self.reduce, self.layers, t[3][3], t[3][4])
+                self.tile = [(t[0], (0, 0) + self.size, t[2], t3)]
+
+            return ImageFile.ImageFile.load(self, box)
 
 
 def _accept(prefix):
@@ -267,6 +273,8 @@ def _save(im, fp, filename):
 # Registry stuff
 
 Image.register_open(Jpeg2KImageFile.format, Jpeg2KImageFile, _accept)
+Image.register_magic(Jpeg2KImageFile.format, b'\xff\x4f\xff\x51')
+Image.register_magic(Jpeg2KImageFile.format, b'\x00\x00\x00\x0cjP  \x0d\x0a\x87\x0a')
 Image.register_save(Jpeg2KImageFile.format, _save)
 
 Image.register_extension(Jpeg2KImageFile.format, '.jp2')
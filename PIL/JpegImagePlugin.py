@@ -37,7 +37,7 @@ import struct
 import io
 import warnings
 from struct import unpack_from
-from PIL import Image, ImageFile, TiffImagePlugin, _binary
+from PIL import Image, ImageFile, _binary
 from PIL.JpegPresets import presets
 from PIL._util import isStringType
 
@@ -418,6 +418,7 @@ def _getexif(self):
         data = self.info["exif"]
     except KeyError:
         return None
+    from PIL import TiffImagePlugin
     file = io.BytesIO(data[6:])
     head = file.read(8)
     # process dictionary
@@ -463,6 +464,7 @@ def _getmp(self):
         data = self.info["mp"]
     except KeyError:
         return None
+    from PIL import TiffImagePlugin
     file_contents = io.BytesIO(data)
     head = file_contents.read(8)
     endianness = '>' if head[:4] == b'\x4d\x4d\x00\x2a' else '<'
@@ -739,11 +741,88 @@ def jpeg_factory(fp=None, filename=None):
     return im
 
 
+def _probe(fp):
+    # walk the markers up to the start of frame, reading only the Exif
+    # orientation and the number of MP images on the way
+    format = JpegImageFile.format
+    n_frames = 1
+    orientation = None
+
+    s = fp.read(1)
+    if i8(s) != 255:
+        raise SyntaxError("not a JPEG file")
+
+    while True:
+
+        i = i8(s)
+        if i == 0xFF:
+            s = s + fp.read(1)
+            i = i16(s)
+        else:
+            # Skip non-0xFF junk
+            s = fp.read(1)
+            continue
+
+        if i in MARKER:
+            handler = MARKER[i][2]
+            if handler is SOF:
+                s = fp.read(8)
+                if i8(s[2]) != 8:
+                    raise SyntaxError("cannot handle %d-bit layers" %
+                                      i8(s[2]))
+                try:
+                    mode = {1: "L", 3: "RGB", 4: "CMYK"}[i8(s[7])]
+                except KeyError:
+                    raise SyntaxError("cannot handle %d-layer images" %
+                                      i8(s[7]))
+                return Image.ProbeResult(format, (i16(s[5:]), i16(s[3:])),
+                                         mode, n_frames, orientation)
+            if i == 0xFFDA:
+                raise SyntaxError("no start of frame marker")
+            if handler is not None:
+                n = i16(fp.read(2))-2
+                if i == 0xFFE1 or i == 0xFFE2:
+                    # the first directory is at the start of the segment
+                    data = fp.read(min(n, 4096))
+                    n -= len(data)
+                    if data[:6] == b"Exif\0\0":
+                        tag = 0x0112  # orientation
+                        orientation = _probe_ifd(data[6:], tag).get(tag)
+                    elif data[:4] == b"MPF\0":
+                        try:
+                            quant = _probe_ifd(data[4:], 0xB001).get(0xB001, 1)
+                        except SyntaxError:
+                            # malformed MP index, opened as a JPEG file
+                            quant = 1
+                        if quant > 1:
+                            format = "MPO"
+                            n_frames = quant
+                fp.seek(n, io.SEEK_CUR)
+            s = fp.read(1)
+        elif i == 0 or i == 0xFFFF:
+            # padded marker or junk; move on
+            s = b"\xff"
+        else:
+            raise SyntaxError("no marker found")
+
+
+def _probe_ifd(data, tag):
+    # read one tag from the first IFD of an embedded TIFF structure
+    from PIL import TiffImagePlugin
+    file = io.BytesIO(data)
+    ifd = TiffImagePlugin.ImageFileDirectory_v2(file.read(8))
+    file.seek(ifd.next)
+    ifd.load(file, (tag,))
+    return ifd
+
+
 # -------------------------------------------------------------------q-
 # Registry stuff
 
 Image.register_open(JpegImageFile.format, jpeg_factory, _accept)
+Image.register_magic(JpegImageFile.format, b"\377")
 Image.register_save(JpegImageFile.format, _save)
+Image.register_probe(JpegImageFile.format, _probe)
 
 Image.register_extension(JpegImageFile.format, ".jfif")
 Image.register_extension(JpegImageFile.format, ".jpe")
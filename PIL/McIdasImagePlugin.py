@@ -70,5 +70,6 @@ class McIdasImageFile(ImageFile.ImageFile):
 # registry
 
 Image.register_open(McIdasImageFile.format, McIdasImageFile, _accept)
+Image.register_magic(McIdasImageFile.format, b"\x00\x00\x00\x00\x00\x00\x00\x04")
 
 # no default extension
@@ -99,5 +99,6 @@ class MicImageFile(TiffImagePlugin.TiffImageFile):
 # --------------------------------------------------------------------
 
 Image.register_open(MicImageFile.format, MicImageFile, _accept)
+Image.register_magic(MicImageFile.format, MAGIC)
 
 Image.register_extension(MicImageFile.format, ".mic")
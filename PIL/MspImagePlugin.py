@@ -99,6 +99,8 @@ def _save(im, fp, filename):
 # registry
 
 Image.register_open(MspImageFile.format, MspImageFile, _accept)
+Image.register_magic(MspImageFile.format, b"DanM")
+Image.register_magic(MspImageFile.format, b"LinS")
 Image.register_save(MspImageFile.format, _save)
 
 Image.register_extension(MspImageFile.format, ".msp")
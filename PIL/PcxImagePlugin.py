@@ -27,10 +27,10 @@
 
 from __future__ import print_function
 
-import logging
 from PIL import Image, ImageFile, ImagePalette, _binary
+from PIL._util import deferred_logger
 
-logger = logging.getLogger(__name__)
+logger = deferred_logger(__name__)
 
 i8 = _binary.i8
 i16 = _binary.i16le
@@ -182,6 +182,10 @@ def _save(im, fp, filename, check=0):
 # registry
 
 Image.register_open(PcxImageFile.format, PcxImageFile, _accept)
+Image.register_magic(PcxImageFile.format, b"\x0a\x00")
+Image.register_magic(PcxImageFile.format, b"\x0a\x02")
+Image.register_magic(PcxImageFile.format, b"\x0a\x03")
+Image.register_magic(PcxImageFile.format, b"\x0a\x05")
 Image.register_save(PcxImageFile.format, _save)
 
 Image.register_extension(PcxImageFile.format, ".pcx")
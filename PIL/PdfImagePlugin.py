@@ -20,7 +20,7 @@
 # Image plugin for PDF images (output only).
 ##
 
-from PIL import Image, ImageFile
+from PIL import Image, ImageFile, JpegImagePlugin
 from PIL._binary import i8
 import io
 
@@ -168,7 +168,7 @@ def _save(im, fp, filename, save_all=False):
                 im.putdata(data)
             ImageFile._save(im, op, [("hex", (0, 0)+im.size, 0, im.mode)])
         elif filter == "/DCTDecode":
-            Image.SAVE["JPEG"](im, op, filename)
+            JpegImagePlugin._save(im, op, filename)
         elif filter == "/FlateDecode":
             ImageFile._save(im, op, [("zip", (0, 0)+im.size, 0, im.mode)])
         elif filter == "/RunLengthDecode":
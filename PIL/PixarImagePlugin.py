@@ -67,5 +67,6 @@ class PixarImageFile(ImageFile.ImageFile):
 # --------------------------------------------------------------------
 
 Image.register_open(PixarImageFile.format, PixarImageFile, _accept)
+Image.register_magic(PixarImageFile.format, b"\200\350\000\000")
 
 Image.register_extension(PixarImageFile.format, ".pxr")
@@ -33,16 +33,16 @@
 
 from __future__ import print_function
 
-import logging
 import re
 import zlib
 import struct
 
 from PIL import Image, ImageFile, ImagePalette, _binary
+from PIL._util import deferred_logger
 
 __version__ = "0.9"
 
-logger = logging.getLogger(__name__)
+logger = deferred_logger(__name__)
 
 i8 = _binary.i8
 i16 = _binary.i16be
@@ -540,6 +540,10 @@ class PngImageFile(ImageFile.ImageFile):
             rawmode, data = self.png.im_palette
             self.palette = ImagePalette.raw(rawmode, data)
 
+        if self.info.get("interlace"):
+            self.decoderconfig = self.decoderconfig + (1,)
+
+        self.__idat_length = length  # used by load_seek()
         self.__idat = length  # used by load_read()
 
     def verify(self):
@@ -556,13 +560,12 @@ class PngImageFile(ImageFile.ImageFile):
 
         self.fp = None
 
-    def load_prepare(self):
-        "internal: prepare to read PNG file"
-
-        if self.info.get("interlace"):
-            self.decoderconfig = self.decoderconfig + (1,)
+    def load_seek(self, pos):
+        "internal: seek to the first image data chunk"
 
-        ImageFile.ImageFile.load_prepare(self)
+        self.fp.seek(pos)
+        self.png.queue = []
+        self.__idat = self.__idat_length
 
     def load_read(self, read_bytes):
         "internal: read more image data"
@@ -808,10 +811,22 @@ def getchunks(im, **params):
     return fp.data
 
 
+def _probe(fp):
+    # the IHDR chunk follows the signature
+    s = fp.read(33)
+    if s[:8] != _MAGIC or s[12:16] != b"IHDR":
+        raise SyntaxError("not a PNG file")
+    mode = _MODES[(i8(s[24]), i8(s[25]))][0]
+    return Image.ProbeResult(PngImageFile.format, (i32(s[16:]), i32(s[20:])),
+                             mode, 1, None)
+
+
 # --------------------------------------------------------------------
 # Registry
 
 Image.register_open(PngImageFile.format, PngImageFile, _accept)
+Image.register_magic(PngImageFile.format, _MAGIC)
+Image.register_probe(PngImageFile.format, _probe)
 Image.register_save(PngImageFile.format, _save)
 
 Image.register_extension(PngImageFile.format, ".png")
@@ -167,6 +167,11 @@ def _save(im, fp, filename):
 # --------------------------------------------------------------------
 
 Image.register_open(PpmImageFile.format, PpmImageFile, _accept)
+Image.register_magic(PpmImageFile.format, b"P0")
+Image.register_magic(PpmImageFile.format, b"P4")
+Image.register_magic(PpmImageFile.format, b"P5")
+Image.register_magic(PpmImageFile.format, b"P6")
+Image.register_magic(PpmImageFile.format, b"Py")
 Image.register_save(PpmImageFile.format, _save)
 
 Image.register_extension(PpmImageFile.format, ".pbm")
@@ -308,5 +308,6 @@ def _maketile(file, mode, bbox, channels):
 # registry
 
 Image.register_open(PsdImageFile.format, PsdImageFile, _accept)
+Image.register_magic(PsdImageFile.format, b"8BPS")
 
 Image.register_extension(PsdImageFile.format, ".psd")
@@ -80,6 +80,7 @@ class SgiImageFile(ImageFile.ImageFile):
 # registry
 
 Image.register_open(SgiImageFile.format, SgiImageFile, _accept)
+Image.register_magic(SgiImageFile.format, b"\001\332")
 
 Image.register_extension(SgiImageFile.format, ".bw")
 Image.register_extension(SgiImageFile.format, ".rgb")
@@ -77,5 +77,6 @@ class SunImageFile(ImageFile.ImageFile):
 # registry
 
 Image.register_open(SunImageFile.format, SunImageFile, _accept)
+Image.register_magic(SunImageFile.format, b"\x59\xa6\x6a\x95")
 
 Image.register_extension(SunImageFile.format, ".ras")
@@ -87,6 +87,7 @@ PHOTOMETRIC_INTERPRETATION = 262
 FILLORDER = 266
 IMAGEDESCRIPTION = 270
 STRIPOFFSETS = 273
+ORIENTATION = 274
 SAMPLESPERPIXEL = 277
 ROWSPERSTRIP = 278
 STRIPBYTECOUNTS = 279
@@ -242,6 +243,23 @@ def _accept(prefix):
     return prefix[:4] in PREFIXES
 
 
+def _mode_key(ifd):
+    # the OPEN_INFO key of the pixel layout described by an IFD
+    format = ifd.get(SAMPLEFORMAT, (1,))
+    if len(format) > 1 and max(format) == min(format) == 1:
+        # SAMPLEFORMAT is properly per band, so an RGB image will
+        # be (1,1,1).  But, we don't support per band pixel types,
+        # and anything more than one band is a uint8. So, just
+        # take the first element. Revisit this if adding support
+        # for more exotic images.
+        format = (1,)
+    return (
+        ifd.prefix, ifd.get(PHOTOMETRIC_INTERPRETATION, 0), format,
+        ifd.get(FILLORDER, 1), ifd.get(BITSPERSAMPLE, (1,)),
+        ifd.get(EXTRASAMPLES, ())
+        )
+
+
 def _limit_rational(val, max_val):
     inv = abs(val) > 1
     n_d = IFDRational(1 / val if inv else val).limit_rational(max_val)
@@ -664,7 +682,8 @@ class ImageFileDirectory_v2(collections.MutableMapping):
                           (size, len(ret)))
         return ret
 
-    def load(self, fp):
+    def load(self, fp, tags=None):
+        # if tags is given, only those tags are read
 
         self.reset()
         self._offset = fp.tell()
@@ -672,6 +691,8 @@ class ImageFileDirectory_v2(collections.MutableMapping):
         try:
             for i in range(self._unpack("H", self._ensure_read(fp, 2))[0]):
                 tag, typ, count, data = self._unpack("HHL4s", self._ensure_read(fp, 12))
+                if tags is not None and tag not in tags:
+                    continue
                 if DEBUG:
                     tagname = TiffTags.lookup(tag).name
                     typname = TYPES.get(typ, "unknown")
@@ -956,6 +977,19 @@ class TiffImageFile(ImageFile.ImageFile):
         Image._decompression_bomb_check(self.size)
         self.im = Image.core.new(self.mode, self.size)
 
+    def frame_handle(self, frame):
+        im = ImageFile.ImageFile.frame_handle(self, 0)
+        # reuse the offsets of the frames already found
+        if len(self._frame_pos) > len(im._frame_pos):
+            im._frame_pos = self._frame_pos[:]
+            im.__next = self.__next
+        try:
+            im.seek(frame)
+        except:
+            im.close()
+            raise
+        return im
+
     def _seek(self, frame):
         self.fp = self.__fp
         while len(self._frame_pos) <= frame:
@@ -1014,10 +1048,15 @@ class TiffImageFile(ImageFile.ImageFile):
 
         return args
 
-    def load(self):
+    def load(self, box=None):
         if self.use_load_libtiff:
-            return self._load_libtiff()
-        return super(TiffImageFile, self).load()
+            with self._load_lock:
+                if box is not None:
+                    # libtiff decodes the whole image
+                    self._load_libtiff()
+                    return self.crop(box)
+                return self._load_libtiff()
+        return super(TiffImageFile, self).load(box)
 
     def _load_libtiff(self):
         """ Overload method triggered when we detect a compressed tiff
@@ -1046,7 +1085,10 @@ class TiffImageFile(ImageFile.ImageFile):
         except ValueError:
             raise IOError("Couldn't set the image")
 
-        if hasattr(self.fp, "getvalue"):
+        if isinstance(self.fp, ImageFile._BufferFile):
+            # opened from memory; the decoder reads it where it is
+            n, err = decoder.decode(self.fp.getbuffer())
+        elif hasattr(self.fp, "getvalue"):
             # We've got a stringio like thing passed in. Yay for all in memory.
             # The decoder needs the entire file in one shot, so there's not
             # a lot we can do here other than give it the entire file.
@@ -1119,21 +1161,8 @@ class TiffImageFile(ImageFile.ImageFile):
         if DEBUG:
             print("- size:", self.size)
 
-        format = self.tag_v2.get(SAMPLEFORMAT, (1,))
-        if len(format) > 1 and max(format) == min(format) == 1:
-            # SAMPLEFORMAT is properly per band, so an RGB image will
-            # be (1,1,1).  But, we don't support per band pixel types,
-            # and anything more than one band is a uint8. So, just
-            # take the first element. Revisit this if adding support
-            # for more exotic images.
-            format = (1,)
-
         # mode: check photometric interpretation and bits per pixel
-        key = (
-            self.tag_v2.prefix, photo, format, fillorder,
-            self.tag_v2.get(BITSPERSAMPLE, (1,)),
-            self.tag_v2.get(EXTRASAMPLES, ())
-            )
+        key = _mode_key(self.tag_v2)
         if DEBUG:
             print("format key:", key)
         try:
@@ -1214,11 +1243,7 @@ class TiffImageFile(ImageFile.ImageFile):
                 # bits, so stripes of the image are reversed.  See
                 # https://github.com/python-pillow/Pillow/issues/279
                 if fillorder == 2:
-                    key = (
-                        self.tag_v2.prefix, photo, format, 1,
-                        self.tag_v2.get(BITSPERSAMPLE, (1,)),
-                        self.tag_v2.get(EXTRASAMPLES, ())
-                        )
+                    key = key[:3] + (1,) + key[4:]
                     if DEBUG:
                         print("format key:", key)
                     # this should always work, since all the
@@ -1470,7 +1495,10 @@ def _save(im, fp, filename):
         # print(im.mode, compression, a, im.encoderconfig)
         e = Image._getencoder(im.mode, 'libtiff', a, im.encoderconfig)
         e.setimage(im.im, (0, 0)+im.size)
+        writer = getattr(im, "_writer", None)
         while True:
+            if writer:
+                writer._wait(e, (0, 0)+im.size)
             # undone, change to self.decodermaxblock:
             l, s, d = e.encode(16*1024)
             if not _fp:
@@ -1496,7 +1524,27 @@ def _save(im, fp, filename):
 # --------------------------------------------------------------------
 # Register
 
+def _probe(fp):
+    # read the size and mode from the first IFD, skipping all other tags
+    ifd = ImageFileDirectory_v2(fp.read(8))
+    fp.seek(ifd.next)
+    ifd.load(fp, (IMAGEWIDTH, IMAGELENGTH, BITSPERSAMPLE,
+                  PHOTOMETRIC_INTERPRETATION, FILLORDER, ORIENTATION,
+                  EXTRASAMPLES, SAMPLEFORMAT, 0xBC01))
+    if 0xBC01 in ifd:
+        raise IOError("Windows Media Photo files not yet supported")
+    try:
+        mode = OPEN_INFO[_mode_key(ifd)][0]
+    except KeyError:
+        raise SyntaxError("unknown pixel mode")
+    return Image.ProbeResult(
+        TiffImageFile.format, (ifd.get(IMAGEWIDTH), ifd.get(IMAGELENGTH)),
+        mode, 1 if not ifd.next else None, ifd.get(ORIENTATION))
+
 Image.register_open(TiffImageFile.format, TiffImageFile, _accept)
+for prefix in PREFIXES:
+    Image.register_magic(TiffImageFile.format, prefix)
+Image.register_probe(TiffImageFile.format, _probe)
 Image.register_save(TiffImageFile.format, _save)
 
 Image.register_extension(TiffImageFile.format, ".tif")
@@ -74,6 +74,7 @@ def _save(im, fp, filename):
 
 
 Image.register_open(WebPImageFile.format, WebPImageFile, _accept)
+Image.register_magic(WebPImageFile.format, b"RIFF")
 Image.register_save(WebPImageFile.format, _save)
 
 Image.register_extension(WebPImageFile.format, ".webp")
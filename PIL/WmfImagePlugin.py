@@ -167,6 +167,8 @@ def _save(im, fp, filename):
 # Registry stuff
 
 Image.register_open(WmfStubImageFile.format, WmfStubImageFile, _accept)
+Image.register_magic(WmfStubImageFile.format, b"\xd7\xcd\xc6\x9a\x00\x00")
+Image.register_magic(WmfStubImageFile.format, b"\x01\x00\x00\x00")
 Image.register_save(WmfStubImageFile.format, _save)
 
 Image.register_extension(WmfStubImageFile.format, ".wmf")
@@ -77,3 +77,4 @@ class XVThumbImageFile(ImageFile.ImageFile):
 # --------------------------------------------------------------------
 
 Image.register_open(XVThumbImageFile.format, XVThumbImageFile, _accept)
+Image.register_magic(XVThumbImageFile.format, _MAGIC)
@@ -124,6 +124,7 @@ class XpmImageFile(ImageFile.ImageFile):
 # Registry
 
 Image.register_open(XpmImageFile.format, XpmImageFile, _accept)
+Image.register_magic(XpmImageFile.format, b"/* XPM */")
 
 Image.register_extension(XpmImageFile.format, ".xpm")
 
@@ -25,3 +25,16 @@ class deferred_error(object):
 
     def __getattr__(self, elt):
         raise self.ex
+
+
+class deferred_logger(object):
+    # stands in for logging.getLogger(name), importing logging when the
+    # logger is first used rather than when the module is imported
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, elt):
+        import logging
+        value = getattr(logging.getLogger(self.name), elt)
+        setattr(self, elt, value)
+        return value
@@ -0,0 +1,315 @@
+from helper import unittest, PillowTestCase
+
+from PIL import Image
+
+import ctypes
+import pickle
+import threading
+import time
+
+
+class TestBlockPool(PillowTestCase):
+
+    def setUp(self):
+        self.limit = Image.core.get_pool_limit()
+        Image.core.clear_pool()
+
+    def tearDown(self):
+        Image.core.set_pool_limit(self.limit)
+        Image.core.clear_pool()
+
+    def test_get_pool_limit(self):
+        limit = Image.core.get_pool_limit()
+        self.assertIsInstance(limit, int)
+        self.assertGreaterEqual(limit, 0)
+
+    def test_set_pool_limit(self):
+        Image.core.set_pool_limit(1024 * 1024)
+        self.assertEqual(Image.core.get_pool_limit(), 1024 * 1024)
+        Image.core.set_pool_limit(0)
+        self.assertEqual(Image.core.get_pool_limit(), 0)
+
+        self.assertRaises(ValueError, Image.core.set_pool_limit, -1)
+
+    def test_freed_block_is_cached(self):
+        Image.core.set_pool_limit(1024 * 1024)
+        self.assertEqual(Image.core.get_pool_usage(), (0, 0))
+
+        im = Image.new("RGB", (64, 64))
+        del im
+        blocks, size = Image.core.get_pool_usage()
+        self.assertEqual(blocks, 1)
+        self.assertGreaterEqual(size, 64 * 64 * 4)
+
+        # same size class is served from the pool
+        im = Image.new("RGB", (64, 64))
+        self.assertEqual(Image.core.get_pool_usage(), (0, 0))
+
+    def test_reused_block_is_cleared(self):
+        Image.core.set_pool_limit(1024 * 1024)
+
+        im = Image.new("L", (32, 32), 255)
+        del im
+        im = Image.new("L", (32, 32))
+        self.assertEqual(im.getextrema(), (0, 0))
+
+    def test_pool_limit(self):
+        Image.core.set_pool_limit(0)
+        im = Image.new("RGB", (64, 64))
+        del im
+        self.assertEqual(Image.core.get_pool_usage(), (0, 0))
+
+        Image.core.set_pool_limit(1024 * 1024)
+        ims = [Image.new("L", (128, 128)) for i in range(10)]
+        del ims
+        self.assertEqual(Image.core.get_pool_usage()[0], 10)
+
+        # lowering the limit releases cached blocks
+        Image.core.set_pool_limit(128 * 128 * 4)
+        blocks, size = Image.core.get_pool_usage()
+        self.assertEqual(blocks, 4)
+        self.assertLessEqual(size, 128 * 128 * 4)
+
+    def test_clear_pool(self):
+        Image.core.set_pool_limit(1024 * 1024)
+        ims = [Image.new("RGB", (16, 16)) for i in range(4)]
+        del ims
+        self.assertEqual(Image.core.get_pool_usage()[0], 4)
+
+        Image.core.clear_pool()
+        self.assertEqual(Image.core.get_pool_usage(), (0, 0))
+        self.assertEqual(Image.core.get_pool_limit(), 1024 * 1024)
+
+
+class TestMemoryStats(PillowTestCase):
+
+    def setUp(self):
+        self.limit = Image.core.get_pool_limit()
+        Image.core.reset_stats()
+
+    def tearDown(self):
+        Image.core.set_pool_limit(self.limit)
+
+    def test_get_stats(self):
+        stats = Image.core.get_stats()
+        self.assertEqual(sorted(stats), ["allocations", "bytes", "frees",
+                                         "images", "peak_bytes", "refusals"])
+        self.assertEqual(stats["allocations"], 0)
+        self.assertEqual(stats["frees"], 0)
+        self.assertEqual(stats["refusals"], 0)
+        self.assertEqual(stats["peak_bytes"], stats["bytes"])
+
+    def test_allocations(self):
+        before = Image.core.get_stats()
+
+        im = Image.new("RGB", (64, 64))
+        stats = Image.core.get_stats()
+        self.assertEqual(stats["images"], before["images"] + 1)
+        self.assertGreaterEqual(stats["bytes"] - before["bytes"], im.nbytes)
+        self.assertEqual(stats["allocations"], 1)
+
+        # views allocate nothing
+        im2 = im.crop((0, 0, 32, 32))
+        stats = Image.core.get_stats()
+        self.assertEqual(stats["images"], before["images"] + 2)
+        self.assertEqual(stats["allocations"], 1)
+
+        del im, im2
+        stats = Image.core.get_stats()
+        self.assertEqual(stats["images"], before["images"])
+        self.assertEqual(stats["bytes"], before["bytes"])
+        self.assertEqual(stats["frees"], 1)
+
+    def test_peak_bytes(self):
+        Image.core.set_pool_limit(0)
+        before = Image.core.get_stats()["bytes"]
+
+        Image.new("L", (1024, 1024))
+        stats = Image.core.get_stats()
+        self.assertEqual(stats["bytes"], before)
+        self.assertGreaterEqual(stats["peak_bytes"], before + 1024 * 1024)
+
+        Image.core.reset_stats()
+        self.assertEqual(Image.core.get_stats()["peak_bytes"], before)
+
+    def test_nbytes(self):
+        self.assertEqual(Image.new("L", (16, 8)).nbytes, 128)
+        self.assertEqual(Image.new("RGB", (16, 8)).nbytes, 512)
+        self.assertEqual(Image.new("I;16", (16, 8)).nbytes, 256)
+        self.assertEqual(Image.new("RGB", (16, 8)).crop((0, 0, 4, 4)).nbytes,
+                         64)
+
+        im = Image.open("Tests/images/hopper.gif")
+        self.assertEqual(im.nbytes, 0)
+        im.load()
+        self.assertEqual(im.nbytes, 128 * 128)
+
+
+class TestMemoryBudget(PillowTestCase):
+
+    def setUp(self):
+        self.limit = Image.core.get_pool_limit()
+        Image.core.reset_stats()
+
+    def tearDown(self):
+        Image.core.set_memory_budget(0)
+        Image.core.set_pool_limit(self.limit)
+
+    def budget(self, size, timeout=0.0):
+        # allow size more bytes than are currently in use
+        Image.core.set_memory_budget(
+            Image.core.get_stats()["bytes"] + size, timeout)
+
+    def test_get_memory_budget(self):
+        self.assertEqual(Image.core.get_memory_budget(), (0, 0.0))
+        Image.core.set_memory_budget(1024, 0.5)
+        self.assertEqual(Image.core.get_memory_budget(), (1024, 0.5))
+        self.assertRaises(ValueError, Image.core.set_memory_budget, -1)
+        self.assertRaises(ValueError, Image.core.set_memory_budget, 0, -1)
+
+    def test_refused(self):
+        self.budget(1024 * 1024)
+        im = Image.new("L", (512, 512))
+
+        for size in (1024, 1024), (2048, 2048):
+            self.assertRaises(Image.MemoryBudgetError,
+                              Image.new, "L", size)
+        self.assertTrue(issubclass(Image.MemoryBudgetError, MemoryError))
+        self.assertEqual(Image.core.get_stats()["refusals"], 2)
+
+        # operations running out of memory fail the same way
+        self.assertRaises(MemoryError, im.resize, (1024, 1024))
+
+        # released memory can be used again
+        del im
+        Image.new("L", (512, 512))
+
+    def test_timeout(self):
+        self.budget(1024 * 1024, 5.0)
+        ims = [Image.new("L", (1024, 512))]
+
+        def release():
+            time.sleep(0.1)
+            del ims[:]
+        thread = threading.Thread(target=release)
+        thread.start()
+
+        # waits for the other thread to release its image
+        im = Image.new("L", (1024, 1024))
+        thread.join()
+        self.assertEqual(im.size, (1024, 1024))
+        self.assertEqual(Image.core.get_stats()["refusals"], 0)
+
+    def test_timeout_expired(self):
+        self.budget(4096, 0.05)
+        im = Image.new("L", (64, 64))
+
+        start = time.time()
+        self.assertRaises(Image.MemoryBudgetError, Image.new, "L", (16, 16))
+        self.assertGreaterEqual(time.time() - start, 0.04)
+        self.assertEqual(im.size, (64, 64))
+
+
+def row_pointers(im):
+    ptrs = dict(im.im.unsafe_ptrs)
+    rows = ctypes.cast(ptrs["image"], ctypes.POINTER(ctypes.c_void_p))
+    return [rows[y] for y in range(im.size[1])], ptrs["stride"]
+
+
+class TestArenaStorage(PillowTestCase):
+
+    def test_chunks(self):
+        # large images are stored in chunks of 16 MB
+        im = Image.new("L", (4097, 4097))
+        self.assertFalse(im.im.isblock())
+
+        rows, stride = row_pointers(im)
+        chunks = [y for y in range(1, len(rows))
+                  if rows[y] != rows[y-1] + stride]
+        self.assertEqual(chunks, [16 * 1024 * 1024 // 4097])
+
+    def test_chunk_boundary(self):
+        im = Image.new("RGB", (2048, 2049), (1, 2, 3))
+        im.paste((4, 5, 6), (0, 2047, 2048, 2049))
+
+        self.assertEqual(im.getpixel((2047, 2046)), (1, 2, 3))
+        self.assertEqual(im.getpixel((0, 2048)), (4, 5, 6))
+        self.assertEqual(len(im.tobytes()), 2048 * 2049 * 3)
+        self.assertEqual(im.crop((0, 2046, 1, 2049)).tobytes(),
+                         b"\x01\x02\x03\x04\x05\x06\x04\x05\x06")
+
+    def test_stats(self):
+        before = Image.core.get_stats()
+        im = Image.new("L", (4097, 4097))
+        stats = Image.core.get_stats()
+        self.assertEqual(stats["allocations"] - before["allocations"], 1)
+        self.assertGreaterEqual(stats["bytes"] - before["bytes"], im.nbytes)
+
+        del im
+        self.assertEqual(Image.core.get_stats()["bytes"], before["bytes"])
+
+
+class TestAlignedStorage(PillowTestCase):
+
+    def setUp(self):
+        self.aligned = Image.core.get_aligned_storage()
+        Image.core.set_aligned_storage(True)
+
+    def tearDown(self):
+        Image.core.set_aligned_storage(self.aligned)
+
+    def assert_aligned(self, im):
+        rows, stride = row_pointers(im)
+        self.assertEqual(stride % 64, 0)
+        for row in rows:
+            self.assertEqual(row % 64, 0)
+
+    def test_get_aligned_storage(self):
+        self.assertTrue(Image.core.get_aligned_storage())
+        Image.core.set_aligned_storage(False)
+        self.assertFalse(Image.core.get_aligned_storage())
+
+    def test_block(self):
+        for mode in "1", "L", "I;16", "RGB", "F":
+            im = Image.new(mode, (33, 7))
+            self.assert_aligned(im)
+            self.assertTrue(im.im.isblock())
+        self.assertEqual(Image.new("L", (33, 7)).nbytes, 33 * 7)
+
+    def test_arena(self):
+        im = Image.new("L", (4097, 4097))
+        self.assertFalse(im.im.isblock())
+        self.assert_aligned(im)
+
+    def test_padding_is_invisible(self):
+        data = bytes(bytearray(range(99))) * 7
+        im = Image.frombytes("RGB", (33, 7), data)
+        self.assertEqual(im.tobytes(), data)
+        self.assertEqual(im.getpixel((32, 0)), (96, 97, 98))
+
+        Image.core.set_aligned_storage(False)
+        self.assert_image_equal(im, Image.frombytes("RGB", (33, 7), data))
+        self.assert_image_equal(im.copy(), im)
+
+    def test_buffer(self):
+        im = Image.new("L", (33, 7), 1)
+        view = memoryview(im.im)
+        self.assertEqual(view.shape, (7, 33))
+        self.assertEqual(view.strides, (64, 1))
+        self.assertEqual(view.tobytes(), im.tobytes())
+
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, "requires protocol 5")
+    def test_pickle(self):
+        im = Image.new("L", (33, 7))
+        im.putdata(range(33 * 7))
+        self.assertEqual(pickle.loads(pickle.dumps(im, 5)), im)
+
+        buffers = []
+        pickle.dumps(im, 5, buffer_callback=buffers.append)
+        self.assertEqual(len(buffers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# End of file
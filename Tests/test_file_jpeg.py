@@ -428,6 +428,51 @@ class TestFileJpeg(PillowTestCase):
         # Assert
         self.assertEqual(im.format, "JPEG")
 
+    def test_load_box(self):
+        expected = Image.open(TEST_FILE)
+        expected.load()
+
+        for box in ((0, 0, 128, 128), (10, 20, 50, 40), (100, 100, 150, 140),
+                    (-10, -10, 20, 20)):
+            im = Image.open(TEST_FILE)
+            region = im.load(box=box)
+            self.assert_image_equal(region, expected.crop(box))
+            # the image itself is not loaded
+            self.assertTrue(im.tile)
+
+        im = Image.open(TEST_FILE)
+        im.draft("L", (64, 64))
+        region = im.load(box=(10, 10, 30, 30))
+        im.load()
+        self.assert_image_equal(region, im.crop((10, 10, 30, 30)))
+
+    def test_load_box_skip(self):
+        # with the whole file at hand, the rows above the region are
+        # skipped instead of decoded
+        for kw in {}, {"progressive": True}, {"subsampling": 0}:
+            f = BytesIO()
+            hopper().resize((256, 256)).save(f, "JPEG", **kw)
+            data = f.getvalue()
+            expected = Image.open(f)
+            expected.load()
+            for box in (0, 200, 256, 256), (17, 99, 40, 131):
+                region = Image.open(memoryview(data)).load(box=box)
+                self.assert_image_equal(region, expected.crop(box))
+
+        # the data runs out above the region
+        im = Image.open(memoryview(data[:len(data) // 2]))
+        self.assertRaises(IOError, im.load, box=(0, 200, 256, 256))
+
+    def test_load_box_truncated(self):
+        # decoding stops at the bottom of the region
+        with open(TEST_FILE, "rb") as f:
+            data = f.read()
+        im = Image.open(BytesIO(data[:len(data) // 2]))
+        region = im.load(box=(0, 0, 128, 16))
+
+        expected = Image.open(TEST_FILE).crop((0, 0, 128, 16))
+        self.assert_image_equal(region, expected)
+
 
 if __name__ == '__main__':
     unittest.main()
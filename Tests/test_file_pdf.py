@@ -74,6 +74,18 @@ class TestFilePdf(PillowTestCase):
         self.assertTrue(os.path.isfile(outfile))
         self.assertGreater(os.path.getsize(outfile), 0)
 
+    def test_save_jpeg_not_imported(self):
+        # RGB images are stored as JPEG, without the JPEG plugin having
+        # been imported before
+        import subprocess
+        import sys
+        code = """if 1:
+            import io
+            from PIL import Image
+            Image.new("RGB", (16, 16)).save(io.BytesIO(), "PDF")
+            """
+        subprocess.check_call([sys.executable, "-c", code])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,7 @@ from io import BytesIO
 
 from PIL import Image
 from PIL import PngImagePlugin
+import os
 import zlib
 
 codecs = dir(Image.core)
@@ -410,6 +411,45 @@ class TestFilePng(PillowTestCase):
         self.assertEqual(repr_png.format, 'PNG')
         self.assert_image_equal(im, repr_png)
 
+    def test_iter_rows(self):
+        # several IDAT chunks
+        im = Image.frombytes("RGB", (300, 300), os.urandom(300 * 300 * 3))
+        f = BytesIO()
+        im.save(f, "PNG")
+        f.seek(0)
+
+        loaded = Image.open(f)
+        for _ in range(2):
+            rows = [band.tobytes() for band in loaded.iter_rows(64)]
+            self.assertEqual(b"".join(rows), im.tobytes())
+            self.assertEqual(len(rows), 5)
+
+        # the image can still be loaded
+        self.assert_image_equal(loaded, im)
+
+    def test_iter_rows_memory(self):
+        im = Image.new("L", (1024, 1024))
+        f = BytesIO()
+        im.save(f, "PNG")
+        f.seek(0)
+
+        loaded = Image.open(f)
+        Image.core.reset_stats()
+        before = Image.core.get_stats()["bytes"]
+        for band in loaded.iter_rows(16):
+            pass
+        # only one band is held in memory, not the whole image
+        peak = Image.core.get_stats()["peak_bytes"]
+        self.assertLess(peak - before, 1024 * 64)
+
+    def test_iter_rows_interlaced(self):
+        im = Image.open("Tests/images/pil123p.png")
+        expected = Image.open("Tests/images/pil123p.png")
+        expected.load()
+
+        rows = [band.tobytes() for band in im.iter_rows(64)]
+        self.assertEqual(b"".join(rows), expected.tobytes())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -74,6 +74,72 @@ class TestImage(PillowTestCase):
         reloaded = Image.open(fp)
         self.assert_image_similar(im, reloaded, 20)
 
+    def test_open_formats(self):
+        im = Image.open("Tests/images/hopper.jpg", formats=["JPEG"])
+        self.assertEqual(im.format, "JPEG")
+        im = Image.open("Tests/images/hopper.jpg", formats=("png", "jpeg"))
+        self.assertEqual(im.format, "JPEG")
+
+        self.assertRaises(IOError, Image.open, "Tests/images/hopper.jpg",
+                          formats=["PNG", "GIF"])
+        self.assertRaises(IOError, Image.open, "Tests/images/hopper.jpg",
+                          formats=[])
+        self.assertRaises(TypeError, Image.open, "Tests/images/hopper.jpg",
+                          formats="JPEG")
+
+    def test_magic(self):
+        # the magic numbers never rule out a format that accepts a file
+        Image.init()
+        for f in os.listdir("Tests/images"):
+            path = os.path.join("Tests/images", f)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as fp:
+                prefix = fp.read(16)
+            candidates = Image._candidates(prefix, Image.ID)
+            for i in Image.ID:
+                accept = Image.OPEN[i][1]
+                try:
+                    accepted = not accept or accept(prefix)
+                except IndexError:
+                    accepted = False
+                if accepted:
+                    self.assertIn(i, candidates, path)
+
+    def test_plugin_formats(self):
+        # the formats known before importing the plugins are the ones
+        # the plugins register
+        Image.init()
+        for (id, plugin, extensions, mimetype, magic,
+                save) in Image._PLUGIN_FORMATS:
+            if "PIL." + plugin not in sys.modules:
+                continue
+            for ext in extensions:
+                self.assertEqual(Image.EXTENSION[ext], id)
+            self.assertEqual(Image.MIME.get(id), mimetype)
+            for m in magic:
+                self.assertIn(id, Image.MAGIC[m])
+            self.assertEqual(id in Image.SAVE, save)
+
+    def test_plugin_import(self):
+        # only the plugins needed are imported
+        import subprocess
+        code = """if 1:
+            import io, sys
+            from PIL import Image
+            im = Image.open("Tests/images/hopper.tif")
+            im.save(io.BytesIO(), "PCX")
+            print(" ".join(sorted(
+                name for name in sys.modules
+                if name.startswith("PIL.") and name.endswith("Plugin"))))
+            """
+        out = subprocess.check_output([sys.executable, "-c", code])
+        plugins = out.decode("ascii").split()
+        self.assertIn("PIL.TiffImagePlugin", plugins)
+        self.assertIn("PIL.PcxImagePlugin", plugins)
+        self.assertNotIn("PIL.FpxImagePlugin", plugins)
+        self.assertNotIn("PIL.TgaImagePlugin", plugins)
+
     def test_internals(self):
 
         im = Image.new("L", (100, 100))
@@ -10,19 +10,103 @@ class TestImageArray(PillowTestCase):
     def test_toarray(self):
         def test(mode):
             ai = im.convert(mode).__array_interface__
-            return ai['version'], ai["shape"], ai["typestr"], len(ai["data"])
+            return ai['version'], ai["shape"], ai["typestr"], ai["strides"]
         # self.assertEqual(test("1"), (3, (100, 128), '|b1', 1600))
-        self.assertEqual(test("L"), (3, (100, 128), '|u1', 12800))
+        self.assertEqual(test("L"), (3, (100, 128), '|u1', (128, 1)))
 
         # FIXME: wrong?
-        self.assertEqual(test("I"), (3, (100, 128), Image._ENDIAN + 'i4', 51200))
+        self.assertEqual(test("I"),
+                         (3, (100, 128), Image._ENDIAN + 'i4', (512, 4)))
         # FIXME: wrong?
-        self.assertEqual(test("F"), (3, (100, 128), Image._ENDIAN + 'f4', 51200))
+        self.assertEqual(test("F"),
+                         (3, (100, 128), Image._ENDIAN + 'f4', (512, 4)))
 
-        self.assertEqual(test("LA"), (3, (100, 128, 2), '|u1', 25600))
-        self.assertEqual(test("RGB"), (3, (100, 128, 3), '|u1', 38400))
-        self.assertEqual(test("RGBA"), (3, (100, 128, 4), '|u1', 51200))
-        self.assertEqual(test("RGBX"), (3, (100, 128, 4), '|u1', 51200))
+        self.assertEqual(test("LA"), (3, (100, 128, 2), '|u1', (512, 4, 3)))
+        self.assertEqual(test("RGB"), (3, (100, 128, 3), '|u1', (512, 4, 1)))
+        self.assertEqual(test("RGBA"),
+                         (3, (100, 128, 4), '|u1', (512, 4, 1)))
+        self.assertEqual(test("RGBX"),
+                         (3, (100, 128, 4), '|u1', (512, 4, 1)))
+
+    def test_toarray_data(self):
+        # the array interface exposes the image memory, not a copy
+        i = im.convert("RGB")
+        ai = i.__array_interface__
+        data = memoryview(ai["data"])
+        self.assertTrue(data.readonly)
+        rows = memoryview(i.im.rowbuffer(0, 100, 1)).tobytes()
+        self.assertEqual(data.tobytes(), rows)
+
+        # the interface doesn't hand out write access, and the data is
+        # a snapshot: writing to the image copies it
+        i.putpixel((0, 0), (1, 2, 3))
+        self.assertEqual(data.tobytes(), rows)
+        self.assertEqual(i.getpixel((0, 0)), (1, 2, 3))
+
+        # images that aren't stored in a single block are copied
+        i = Image.new("L", (128, 100))
+        i.im = i.im.new_array("L", (128, 100))
+        ai = i.__array_interface__
+        self.assertEqual(ai["data"], b"\0" * 12800)
+        self.assertNotIn("strides", ai)
+
+    def test_buffer(self):
+        i = Image.new("RGB", (4, 3), (1, 2, 3))
+        view = memoryview(i.im)
+        self.assertEqual(view.shape, (3, 4, 3))
+        self.assertEqual(view.strides, (16, 4, 1))
+        self.assertEqual(view.format, "B")
+        self.assertFalse(view.readonly)
+        self.assertEqual(view.tobytes()[33:36], b"\1\2\3")
+
+        i = Image.new("L", (4, 3), 7)
+        view = memoryview(i.im)
+        self.assertEqual(view.shape, (3, 4))
+        self.assertEqual(view.tobytes(), b"\7" * 12)
+
+        i = Image.new("I;16B", (4, 3))
+        self.assertEqual(memoryview(i.im).format, ">H")
+
+        i = Image.new("L", (128, 100))
+        self.assertRaises(BufferError,
+                          memoryview, i.im.new_array("L", (128, 100)))
+
+    def test_buffer_mapped_stride(self):
+        # padded rows of a mapped buffer make up a block with that
+        # stride, if the buffer holds the padding of the last row too
+        data = bytearray(range(8)) * 5
+        i = Image.frombuffer("L", (6, 5), data, "raw", "L", 8, 1)
+        self.assertTrue(i.im.isblock())
+        self.assertEqual(memoryview(i.im).strides, (8, 1))
+        self.assertEqual(len(memoryview(i.im.rowbuffer())), 40)
+        self.assertEqual(i.copy().tobytes(), b"\0\1\2\3\4\5" * 5)
+
+        i = Image.frombuffer("L", (6, 5), data[:38], "raw", "L", 8, 1)
+        self.assertFalse(i.im.isblock())
+        i = Image.frombuffer("L", (6, 5), data, "raw", "L", 8, -1)
+        self.assertFalse(i.im.isblock())
+
+    def test_rowbuffer(self):
+        i = Image.new("RGB", (4, 3), (1, 2, 3))
+        self.assertEqual(len(memoryview(i.im.rowbuffer())), 48)
+        view = memoryview(i.im.rowbuffer(1, 2))
+        self.assertEqual(view.tobytes(), b"\1\2\3\xff" * 4)
+        self.assertFalse(view.readonly)
+        self.assertRaises(ValueError, i.im.rowbuffer, 2, 1)
+        self.assertRaises(ValueError, i.im.rowbuffer, 0, 4)
+
+        # rows of array images are allocated separately
+        i = Image.new("L", (128, 100))
+        i = i.im.new_array("L", (128, 100))
+        self.assertEqual(len(memoryview(i.rowbuffer(5, 6))), 128)
+        self.assertRaises(BufferError, i.rowbuffer, 5, 7)
+
+    def test_buffer_readonly(self):
+        i = Image.frombuffer("L", (4, 3), b"\7" * 12, "raw", "L", 0, 1)
+        view = memoryview(i.im)
+        self.assertTrue(view.readonly)
+        self.assertEqual(view.shape, (3, 4))
+        self.assertTrue(memoryview(i.im.rowbuffer()).readonly)
 
     def test_fromarray(self):
         def test(mode):
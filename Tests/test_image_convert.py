@@ -123,6 +123,33 @@ class TestImageConvert(PillowTestCase):
         self.assertNotIn('transparency', p.info)
         p.save(f)
 
+    def test_out(self):
+        im = hopper("RGB")
+
+        for mode in "1", "L", "P", "RGBA", "CMYK", "I", "F":
+            out = Image.new(mode, im.size)
+            self.assertIs(im.convert(mode, out=out), out)
+            self.assert_image_equal(out, im.convert(mode))
+
+        out = Image.new("P", im.size)
+        im.convert("P", palette=Image.ADAPTIVE, out=out)
+        self.assert_image_equal(out, im.convert("P", palette=Image.ADAPTIVE))
+
+        self.assertRaises(ValueError, im.convert, "L",
+                          out=Image.new("RGB", im.size))
+        self.assertRaises(ValueError, im.convert, "L",
+                          out=Image.new("L", (1, 1)))
+
+    def test_out_shared(self):
+        # the output image is unshared before it is written to
+        im = hopper("RGB")
+        base = Image.new("L", im.size)
+        out = base.copy()
+        im.convert("L", out=out)
+
+        self.assert_image_equal(out, im.convert("L"))
+        self.assertEqual(base.getextrema(), (0, 0))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
 from helper import unittest, PillowTestCase, hopper
 
+from PIL import Image, ImageDraw
+
 import copy
 
 
@@ -33,6 +35,62 @@ class TestImageCopy(PillowTestCase):
             self.assertEqual(out.mode, im.mode)
             self.assertEqual(out.size, croppedSize)
 
+    def test_copy_on_write(self):
+        im = Image.new("RGB", (64, 64), (1, 2, 3))
+        out = im.copy()
+
+        # writing to either image unshares it from the other
+        im.putpixel((0, 0), (4, 5, 6))
+        out.paste((7, 8, 9), (0, 1, 64, 2))
+        ImageDraw.Draw(out).point((1, 0), fill=(9, 9, 9))
+
+        self.assertEqual(im.getpixel((0, 0)), (4, 5, 6))
+        self.assertEqual(im.getpixel((1, 0)), (1, 2, 3))
+        self.assertEqual(im.getpixel((0, 1)), (1, 2, 3))
+        self.assertEqual(out.getpixel((0, 0)), (1, 2, 3))
+        self.assertEqual(out.getpixel((1, 0)), (9, 9, 9))
+        self.assertEqual(out.getpixel((0, 1)), (7, 8, 9))
+
+    def test_copy_on_write_pixel_access(self):
+        im = Image.new("L", (16, 16), 1)
+        access = im.load()
+        out = im.copy()
+        access[0, 0] = 2
+
+        self.assertEqual(out.getpixel((0, 0)), 1)
+        self.assertEqual(im.getpixel((0, 0)), 2)
+
+    def test_copy_on_write_transform(self):
+        im = Image.new("L", (16, 16), 1)
+        out = im.copy()
+        expected = Image.new("L", (16, 16), 1)
+        for target in (out, expected):
+            target.im.transform2((0, 0, 16, 16), hopper("L").im,
+                                 Image.AFFINE, (1, 0, 0, 0, 1, 0))
+
+        self.assert_image_equal(im, Image.new("L", (16, 16), 1))
+        self.assert_image_equal(out, expected)
+
+    def test_copy_palette(self):
+        im = Image.new("P", (16, 16))
+        im.putpalette([1, 2, 3] * 256)
+        out = im.copy()
+        im.putpalette([4, 5, 6] * 256)
+
+        self.assertEqual(out.getpalette()[:3], [1, 2, 3])
+        self.assertEqual(im.getpalette()[:3], [4, 5, 6])
+
+    def test_copy_buffer(self):
+        # the owner of a writable buffer may change it at any time, so
+        # images mapping one are copied right away
+        data = bytearray(16)
+        im = Image.frombuffer("L", (4, 4), data, "raw", "L", 0, 1)
+        out = im.copy()
+        data[0] = 1
+
+        self.assertEqual(im.getpixel((0, 0)), 1)
+        self.assertEqual(out.getpixel((0, 0)), 0)
+
 if __name__ == '__main__':
     unittest.main()
 
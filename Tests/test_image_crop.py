@@ -66,6 +66,22 @@ class TestImageCrop(PillowTestCase):
         # Assert
         self.assertEqual(cropped.size, (3, 5))
 
+    def test_crop_shares_memory(self):
+        im = Image.new("L", (100, 100), 1)
+        cropped = im.crop((10, 10, 60, 60))
+        nested = cropped.crop((5, 5, 10, 10))
+
+        # changes made to either image are not reflected in the other
+        im.paste(2, (0, 0, 100, 100))
+        self.assertEqual(cropped.getpixel((0, 0)), 1)
+        cropped.putpixel((5, 5), 3)
+        self.assertEqual(nested.getpixel((0, 0)), 1)
+        self.assertEqual(im.getpixel((15, 15)), 2)
+
+        # views keep the memory alive
+        del im, cropped
+        self.assertEqual(nested.getpixel((4, 4)), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -94,6 +94,19 @@ class TestImageFilter(PillowTestCase):
         self.assertEqual(rankfilter.size, 1)
         self.assertEqual(rankfilter.rank, 2)
 
+    def test_out(self):
+        for mode in "L", "RGB":
+            im = hopper(mode)
+            for filter in (ImageFilter.BLUR, ImageFilter.MedianFilter,
+                           ImageFilter.GaussianBlur):
+                out = Image.new(mode, im.size)
+                self.assertIs(im.filter(filter, out=out), out)
+                self.assert_image_equal(out, im.filter(filter))
+
+        im = hopper("RGB")
+        self.assertRaises(ValueError, im.filter, ImageFilter.BLUR,
+                          out=Image.new("RGBA", im.size))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
 from helper import unittest, PillowTestCase, hopper
 
+from PIL import Image
+
 
 class TestImagePoint(PillowTestCase):
 
@@ -35,6 +37,35 @@ class TestImagePoint(PillowTestCase):
         int_lut = [x//2 for x in range(256)]
         self.assert_image_equal(out.convert('L'), im.point(int_lut, 'L'))
 
+    def test_out(self):
+        im = hopper()
+        out = Image.new("RGB", im.size)
+        self.assertIs(im.point(lambda x: 255 - x, out=out), out)
+        self.assert_image_equal(out, im.point(lambda x: 255 - x))
+
+        im = hopper("I")
+        out = Image.new("I", im.size)
+        im.point(lambda x: x * 2 + 1, out=out)
+        self.assert_image_equal(out, im.point(lambda x: x * 2 + 1))
+
+        im = hopper("L")
+        out = Image.new("1", im.size)
+        im.point(lambda x: x > 128 and 255, "1", out=out)
+        self.assert_image_equal(out, im.point(lambda x: x > 128 and 255, "1"))
+
+        self.assertRaises(ValueError, im.point, list(range(256)),
+                          out=Image.new("1", im.size))
+
+    def test_out_readonly(self):
+        # read-only images are not written to
+        data = bytearray(16)
+        out = Image.frombuffer("L", (4, 4), data, "raw", "L", 0, 1)
+        Image.new("L", (4, 4), 1).point(lambda x: x * 2, out=out)
+
+        self.assertEqual(out.getpixel((0, 0)), 2)
+        self.assertFalse(out.readonly)
+        self.assertEqual(data, bytearray(16))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+from helper import unittest, PillowTestCase, hopper
+
+from io import BytesIO
+import struct
+
+from PIL import Image
+
+codecs = dir(Image.core)
+
+
+class TestImageProbe(PillowTestCase):
+
+    def assert_probe(self, f, n_frames=None, orientation=None):
+        result = Image.probe(f)
+        im = Image.open(f)
+        self.assertEqual((result.format, result.size, result.mode),
+                         (im.format, im.size, im.mode))
+        self.assertEqual(result.n_frames, n_frames)
+        self.assertEqual(result.orientation, orientation)
+        return result
+
+    def test_formats(self):
+        self.assert_probe("Tests/images/hopper.png", 1)
+        self.assert_probe("Tests/images/hopper.gif")
+        self.assert_probe("Tests/images/hopper.tif", 1, 1)
+        self.assert_probe("Tests/images/multipage.tiff", None, 1)
+        self.assert_probe("Tests/images/12in16bit.tif", 1, 1)
+
+        # formats without a probe function are opened
+        self.assert_probe("Tests/images/hopper.bmp", 1)
+        self.assert_probe("Tests/images/hopper.psd")
+
+    def test_jpeg(self):
+        self.assert_probe("Tests/images/hopper.jpg", 1)
+        self.assert_probe("Tests/images/pil_sample_cmyk.jpg", 1, 1)
+        self.assert_probe("Tests/images/junk_jpeg_header.jpg", 1)
+        self.assert_probe("Tests/images/sugarshack.mpo", 2)
+        self.assert_probe("Tests/images/sugarshack_bad_mpo_header.jpg", 1)
+
+    def test_jpeg_orientation(self):
+        if "jpeg_encoder" not in codecs:
+            self.skipTest("jpeg support not available")
+
+        # an IFD holding the orientation tag only
+        exif = (b"Exif\0\0MM\0\x2a\0\0\0\x08\0\x01" +
+                struct.pack(">HHLHH", 0x0112, 3, 1, 6, 0) + b"\0\0\0\0")
+        f = BytesIO()
+        hopper().save(f, "JPEG", exif=exif)
+
+        self.assert_probe(f, 1, 6)
+
+    def test_header_only(self):
+        # only the header is read
+        with open("Tests/images/hopper.png", "rb") as f:
+            data = f.read(64)
+        result = Image.probe(BytesIO(data))
+        self.assertEqual(result.size, (128, 128))
+
+        with open("Tests/images/hopper.jpg", "rb") as f:
+            data = f.read(1024)
+        result = Image.probe(BytesIO(data))
+        self.assertEqual(result.size, (128, 128))
+
+    def test_unidentified(self):
+        self.assertRaises(IOError, Image.probe, BytesIO(b"not an image"))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# End of file
@@ -98,6 +98,20 @@ class TestImageResize(PillowTestCase):
             resize(mode, (112, 103))
             resize(mode, (188, 214))
 
+    def test_resize_out(self):
+        for mode in "L", "RGB", "RGBA", "I", "F":
+            im = hopper(mode)
+            for resample in (Image.NEAREST, Image.BILINEAR, Image.LANCZOS):
+                out = Image.new(mode, (37, 53))
+                self.assertIs(im.resize((37, 53), resample, out=out), out)
+                self.assert_image_equal(out, im.resize((37, 53), resample))
+
+        im = hopper()
+        self.assertRaises(ValueError, im.resize, (37, 53), Image.BILINEAR,
+                          out=Image.new("RGB", (53, 37)))
+        self.assertRaises(ValueError, im.resize, (37, 53),
+                          out=Image.new("L", (37, 53)))
+
 
 if __name__ == '__main__':
     unittest.main()
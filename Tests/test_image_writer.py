@@ -0,0 +1,101 @@
+from helper import unittest, PillowTestCase, hopper
+
+from io import BytesIO
+
+from PIL import Image
+
+codecs = dir(Image.core)
+
+
+class TestImageWriter(PillowTestCase):
+
+    def write(self, im, format, rows=37, **params):
+        f = BytesIO()
+        writer = Image.open_writer(f, format, im.mode, im.size, **params)
+        for y in range(0, im.size[1], rows):
+            writer.write_rows(
+                im.crop((0, y, im.size[0], min(y + rows, im.size[1]))))
+        writer.close()
+        f.seek(0)
+        return Image.open(f)
+
+    def test_formats(self):
+        for format, mode in (("PNG", "RGB"), ("PNG", "P"), ("PNG", "1"),
+                             ("TIFF", "RGB"), ("TIFF", "L"), ("PPM", "RGB")):
+            im = hopper(mode).resize((128, 301))
+            if mode == "P":
+                im.putpalette(hopper("P").getpalette())
+            reloaded = self.write(im, format)
+            self.assertEqual(reloaded.format, format)
+            self.assert_image_equal(reloaded, im)
+
+    def test_jpeg(self):
+        if "jpeg_encoder" not in codecs:
+            self.skipTest("jpeg support not available")
+
+        im = hopper("RGB")
+        f = BytesIO()
+        im.save(f, "JPEG", quality=90)
+
+        # the encoder sees the same rows as save
+        reloaded = self.write(im, "JPEG", quality=90)
+        self.assertEqual(reloaded.fp.getvalue(), f.getvalue())
+
+    def test_large_blocks(self):
+        # blocks taller than the band of the writer are split
+        im = hopper("L").resize((64, 1000))
+        self.assert_image_equal(self.write(im, "PNG", rows=300), im)
+        self.assert_image_equal(self.write(im, "PNG", rows=1000), im)
+
+    def test_filename(self):
+        im = hopper("RGB")
+        temp_file = self.tempfile("temp.png")
+
+        with Image.open_writer(temp_file, None, "RGB", im.size) as writer:
+            writer.write_rows(im)
+        self.assertEqual(writer.format, "PNG")
+        self.assertTrue(writer.fp.closed)
+        self.assert_image_equal(Image.open(temp_file), im)
+
+    def test_errors(self):
+        f = BytesIO()
+        writer = Image.open_writer(f, "PNG", "RGB", (128, 128))
+        self.assertRaises(ValueError, writer.write_rows, hopper("L"))
+        self.assertRaises(ValueError, writer.write_rows,
+                          hopper("RGB").resize((128, 129)))
+
+        writer.write_rows(hopper("RGB").crop((0, 0, 128, 100)))
+        self.assertEqual(writer.rows, 100)
+        self.assertRaises(ValueError, writer.close)
+
+        self.assertRaises(ValueError, Image.open_writer,
+                          f, "PNG", "RGB", (128, 0))
+
+    def test_unsupported_format(self):
+        # formats whose encoders need the whole image
+        for format in ("BMP", "GIF"):
+            writer = Image.open_writer(BytesIO(), format, "L", (128, 128))
+            self.assertRaises(IOError, writer.write_rows, hopper("L"))
+
+    def test_memory(self):
+        f = BytesIO()
+        writer = Image.open_writer(f, "PNG", "L", (1024, 1024))
+        band = Image.new("L", (1024, 16))
+
+        Image.core.reset_stats()
+        before = Image.core.get_stats()["bytes"]
+        for y in range(0, 1024, 16):
+            writer.write_rows(band)
+        writer.close()
+        # only one band is held in memory, not the whole image
+        peak = Image.core.get_stats()["peak_bytes"]
+        self.assertLess(peak - before, 1024 * 128)
+
+        f.seek(0)
+        self.assert_image_equal(Image.open(f), Image.new("L", (1024, 1024)))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# End of file
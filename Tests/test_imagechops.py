@@ -67,6 +67,29 @@ class TestImageChops(PillowTestCase):
         self.assertEqual(
             table(ImageChops.logical_xor, 0, 255), (0, 255, 255, 0))
 
+    def test_out(self):
+        im1 = hopper("RGB")
+        im2 = im1.transpose(Image.FLIP_LEFT_RIGHT)
+
+        for op in (ImageChops.lighter, ImageChops.darker,
+                   ImageChops.difference, ImageChops.multiply,
+                   ImageChops.screen, ImageChops.add, ImageChops.subtract,
+                   ImageChops.add_modulo, ImageChops.subtract_modulo):
+            out = Image.new("RGB", im1.size)
+            self.assertIs(op(im1, im2, out=out), out)
+            self.assert_image_equal(out, op(im1, im2))
+
+        out = Image.new("RGB", im1.size)
+        ImageChops.invert(im1, out=out)
+        self.assert_image_equal(out, ImageChops.invert(im1))
+
+        # the output may be one of the operands
+        ImageChops.invert(out, out=out)
+        self.assert_image_equal(out, im1)
+
+        self.assertRaises(ValueError, ImageChops.add, im1, im2,
+                          out=Image.new("RGB", (1, 1)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,8 @@
 from helper import unittest, PillowTestCase, hopper, fromstring, tostring
 
-from io import BytesIO
+from io import BufferedReader, BytesIO
+import gc
+import os
 
 from PIL import Image
 from PIL import ImageFile
@@ -71,6 +73,50 @@ class TestImageFile(PillowTestCase):
 
         self.assertRaises(IOError, lambda: roundtrip("PDF"))
 
+    def test_parser_chunks(self):
+        im = hopper("RGB")
+        f = BytesIO()
+        im.save(f, "BMP")
+        data = f.getvalue()
+
+        parser = ImageFile.Parser()
+        for i in range(0, len(data), 100):
+            parser.feed(data[i:i+100])
+        self.assert_image_equal(parser.close(), im)
+
+    def test_parser_open_attempts(self):
+        calls = []
+        open = Image.open
+
+        def counting_open(fp):
+            calls.append(len(fp.getvalue()))
+            return open(fp)
+
+        parser = ImageFile.Parser()
+        Image.open = counting_open
+        try:
+            for i in range(1000):
+                parser.feed(b"x")
+            self.assertRaises(IOError, parser.close)
+        finally:
+            Image.open = open
+
+        # tried again only after the data has doubled, and once more
+        # on close
+        self.assertEqual(calls, [1, 2, 4, 8, 16, 32, 64, 128, 256, 512,
+                                 1000])
+
+    def test_parser_feed_into(self):
+        im = hopper("L")
+        f = BytesIO()
+        im.save(f, "PPM")
+        f.seek(0)
+
+        parser = ImageFile.Parser()
+        while parser.feed_into(f.readinto, 1000):
+            pass
+        self.assert_image_equal(parser.close(), im)
+
     def test_ico(self):
         with open('Tests/images/python.ico', 'rb') as f:
             data = f.read()
@@ -135,6 +181,621 @@ class TestImageFile(PillowTestCase):
         finally:
             ImageFile.LOAD_TRUNCATED_IMAGES = False
 
+    def test_decode_buffer(self):
+        # decoders accept any bytes-like object
+        im = Image.new("L", (4, 2))
+        for data in bytearray(b"abcdefgh"), memoryview(b"abcdefgh"):
+            d = Image._getdecoder("L", "raw", ("L", 0, 1))
+            d.setimage(im.im)
+            self.assertEqual(d.decode(data), (-1, 0))
+            self.assertEqual(im.tobytes(), b"abcdefgh")
+
+    def test_buffer(self):
+        b = ImageFile._Buffer(b"abc", 4)
+        self.assertEqual(len(b), 3)
+
+        b.reserve(2)[:] = b"de"
+        b.commit(2)
+        self.assertEqual(b.view().tobytes(), b"abcde")
+        b.consume(4)
+        b.append(b"fgh")
+        self.assertEqual(b.view().tobytes(), b"efgh")
+        b.consume(4)
+        self.assertEqual(len(b), 0)
+
+    def test_buffer_linear(self):
+        # keeping a large part of the data unconsumed doesn't copy it
+        # over and over again
+        b = ImageFile._Buffer()
+        for i in range(1000):
+            b.append(b"x" * 1024)
+            b.consume(1)
+        self.assertEqual(len(b), 1000 * 1023)
+        self.assertLess(len(b.buffer), 4 * 1024 * 1024)
+
+    def test_load_without_readinto(self):
+        class Reader(object):
+            def __init__(self, fp):
+                self.read = fp.read
+                self.readline = fp.readline
+                self.seek = fp.seek
+                self.tell = fp.tell
+
+        with open("Tests/images/hopper.ppm", "rb") as fp:
+            im = Image.open(Reader(fp))
+            im.load()
+        self.assert_image_equal(im, hopper())
+
+    def test_readrows(self):
+        im = Image.new("L", (4, 3))
+        data = BytesIO(b"abcd" b"xx" b"efgh" b"xx" b"ijkl")
+        self.assertEqual(im.im.readrows(data.readinto, (0, 0, 4, 3), 6, -1),
+                         3)
+        self.assertEqual(im.tobytes(), b"ijklefghabcd")
+
+        data = BytesIO(b"mnopqr")
+        self.assertEqual(im.im.readrows(data.readinto, (1, 0, 3, 3), 0, 1),
+                         3)
+        self.assertEqual(im.tobytes(), b"imnleophaqrd")
+
+        # truncated data
+        data = BytesIO(b"stuvwx")
+        self.assertEqual(im.im.readrows(data.readinto, (0, 0, 4, 3), 0, 1),
+                         1)
+
+        self.assertRaises(ValueError, im.im.readrows, data.readinto,
+                          (0, 0, 5, 3), 0, 1)
+
+    def test_load_raw_without_decoder(self):
+        getdecoder = Image._getdecoder
+
+        def no_decoder(*args):
+            raise AssertionError("decoder used")
+
+        for mode, format in ("L", "PPM"), ("P", "BMP"), ("RGBA", "TIFF"):
+            im = hopper(mode).crop((0, 0, 127, 100))
+            f = BytesIO()
+            im.save(f, format)
+            f.seek(0)
+
+            Image._getdecoder = no_decoder
+            try:
+                # a file object that cannot be memory mapped
+                loaded = Image.open(BufferedReader(f))
+                loaded.load()
+            finally:
+                Image._getdecoder = getdecoder
+            self.assert_image_equal(loaded, im)
+            self.assertEqual(loaded.readonly, 0)
+
+    def test_load_raw_truncated(self):
+        f = BytesIO()
+        hopper("L").save(f, "PPM")
+        data = f.getvalue()[:-10]
+
+        im = Image.open(BytesIO(data))
+        self.assertRaises(IOError, im.load)
+
+        ImageFile.LOAD_TRUNCATED_IMAGES = True
+        try:
+            im = Image.open(BytesIO(data))
+            im.load()
+        finally:
+            ImageFile.LOAD_TRUNCATED_IMAGES = False
+
+    def test_map_tiles(self):
+        data = b"abcd" b"efgh" b"xx" b"ijkl" b"xx" b"mnop"
+
+        # two strips, the second one stored bottom up
+        im = Image.core.map_tiles(data, (4, 4), "L",
+                                  [(0, 2, 0, 4, 1), (2, 4, 10, 6, -1)])
+        im = Image.Image()._new(im)
+        self.assertEqual(im.tobytes(), b"abcdefghmnopijkl")
+
+        self.assertRaises(ValueError, Image.core.map_tiles, data, (4, 4),
+                          "L", [(0, 2, 0, 4, 1)])
+        self.assertRaises(ValueError, Image.core.map_tiles, data, (4, 4),
+                          "L", [(0, 4, 8, 6, 1)])
+        self.assertRaises(ValueError, Image.core.map_tiles, data, (4, 4),
+                          "L", [(0, 5, 0, 4, 1)])
+
+    def test_map_file_object(self):
+        for mode, format in ("L", "PPM"), ("P", "BMP"), ("RGBA", "TIFF"):
+            im = hopper(mode).crop((0, 0, 127, 100))
+            f = BytesIO()
+            im.save(f, format)
+            f.seek(0)
+
+            loaded = Image.open(f)
+            loaded.load()
+            self.assertEqual(loaded.readonly, 1)
+            self.assert_image_equal(loaded, im)
+
+            path = self.tempfile("temp." + format.lower())
+            im.save(path)
+            with open(path, "rb") as fp:
+                loaded = Image.open(fp)
+                loaded.load()
+            self.assertEqual(loaded.readonly, 1)
+            self.assert_image_equal(loaded, im)
+
+    def test_map_strips(self):
+        path = "Tests/images/12in16bit.tif"
+        im = Image.open(path)
+        self.assertGreater(len(im.tile), 1)
+        im.load()
+        self.assertEqual(im.readonly, 1)
+
+        with open(path, "rb") as fp:
+            expected = Image.open(BufferedReader(BytesIO(fp.read())))
+            expected.load()
+        self.assertEqual(expected.readonly, 0)
+        self.assert_image_equal(im, expected)
+
+    def test_load_workers(self):
+        for path in ("Tests/images/hopper.tif", "Tests/images/hopper_lzw.tif",
+                     "Tests/images/hopper_jpg.tif", "Tests/images/hopper.psd",
+                     "Tests/images/rdf.tif"):
+            expected = Image.open(path)
+            expected.load()
+
+            ImageFile.LOAD_WORKERS = 4
+            try:
+                im = Image.open(path)
+                im.load()
+                with open(path, "rb") as fp:
+                    im_bytes = Image.open(BytesIO(fp.read()))
+                    im_bytes.load()
+            finally:
+                ImageFile.LOAD_WORKERS = 1
+            self.assert_image_equal(im, expected)
+            self.assert_image_equal(im_bytes, expected)
+
+    def test_load_workers_truncated(self):
+        with open("Tests/images/hopper.psd", "rb") as fp:
+            data = fp.read()[:-5000]
+
+        ImageFile.LOAD_WORKERS = 4
+        try:
+            im = Image.open(BytesIO(data))
+            self.assertRaises(IOError, im.load)
+        finally:
+            ImageFile.LOAD_WORKERS = 1
+
+    def test_open_buffer(self):
+        import mmap
+        for path in ("Tests/images/hopper.png", "Tests/images/hopper.jpg",
+                     "Tests/images/hopper_lzw.tif", "Tests/images/hopper.gif",
+                     "Tests/images/hopper.psd"):
+            expected = Image.open(path)
+            expected.load()
+            with open(path, "rb") as fp:
+                data = fp.read()
+                m = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            for source in (bytearray(data), memoryview(data), m):
+                im = Image.open(source)
+                self.assertIsInstance(im.fp, ImageFile._BufferFile)
+                im.load()
+                self.assert_image_equal(im, expected)
+
+            self.assertEqual(Image.probe(memoryview(data)).size,
+                             expected.size)
+
+            ImageFile.LOAD_WORKERS = 4
+            try:
+                im = Image.open(memoryview(data))
+                im.load()
+            finally:
+                ImageFile.LOAD_WORKERS = 1
+            self.assert_image_equal(im, expected)
+
+            im = Image.open(memoryview(data))
+            self.assert_image_equal(im.load(box=(10, 20, 70, 90)),
+                                    expected.crop((10, 20, 70, 90)))
+
+    def test_open_buffer_mapped(self):
+        # uncompressed images share the memory they are opened from
+        im = hopper("L")
+        f = BytesIO()
+        im.save(f, "PPM")
+        data = bytearray(f.getvalue())
+
+        loaded = Image.open(data)
+        loaded.load()
+        self.assertEqual(loaded.readonly, 1)
+        self.assert_image_equal(loaded, im)
+        data[-1] = 255 - data[-1]
+        self.assertEqual(loaded.getpixel((127, 127)), data[-1])
+
+    def test_open_buffer_truncated(self):
+        with open("Tests/images/hopper.png", "rb") as fp:
+            data = fp.read()[:-5000]
+
+        im = Image.open(memoryview(data))
+        self.assertRaises(IOError, im.load)
+
+        ImageFile.LOAD_TRUNCATED_IMAGES = True
+        try:
+            im = Image.open(memoryview(data))
+            im.load()
+        finally:
+            ImageFile.LOAD_TRUNCATED_IMAGES = False
+
+    def test_open_buffer_filename(self):
+        # bytes are a filename, whatever they hold
+        self.assertRaises(IOError, Image.open, b"Tests/images/missing.png")
+        im = Image.open(b"Tests/images/hopper.png")
+        self.assertEqual(im.filename, b"Tests/images/hopper.png")
+
+        with open("Tests/images/hopper.xbm", "rb") as fp:
+            data = fp.read()
+        self.assertRaises(IOError, Image.open, data)
+        self.assertRaises(IOError, Image.probe, data)
+        im = Image.open(memoryview(data))
+        self.assertEqual(im.format, "XBM")
+        self.assertEqual(Image.probe(memoryview(data)).format, "XBM")
+
+    def test_buffer_file(self):
+        fp = ImageFile._BufferFile(b"abcdefgh\nijkl")
+        self.assertEqual(fp.read(3), b"abc")
+        self.assertEqual(fp.tell(), 3)
+        self.assertEqual(fp.readline(), b"defgh\n")
+        b = bytearray(10)
+        self.assertEqual(fp.readinto(b), 4)
+        self.assertEqual(b[:4], b"ijkl")
+        self.assertEqual(fp.read(), b"")
+        fp.seek(-2, 2)
+        self.assertEqual(fp.read(), b"kl")
+        fp.seek(1)
+        fp.seek(2, 1)
+        self.assertEqual(fp.read(1), b"d")
+        self.assertRaises(ValueError, fp.seek, -1)
+
+    def run_threads(self, func, count=8):
+        # calls func on several threads, starting them together
+        import threading
+        start = threading.Event()
+        errors = []
+
+        def work(i):
+            start.wait()
+            try:
+                func(i)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in range(count)]
+        for t in threads:
+            t.start()
+        start.set()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+    def test_load_threads(self):
+        if "zip_encoder" not in codecs:
+            self.skipTest("PNG (zlib) encoder not available")
+
+        expected = hopper().resize((512, 512))
+        f = BytesIO()
+        expected.save(f, "PNG")
+        f.seek(0)
+        im = Image.open(f)
+
+        # the image is decoded once, by one of the threads
+        decodes = []
+        load_end = im.load_end
+
+        def counting_load_end():
+            decodes.append(None)
+            load_end()
+        im.load_end = counting_load_end
+
+        self.run_threads(lambda i: im.load())
+        self.assertEqual(len(decodes), 1)
+        self.assert_image_equal(im, expected)
+
+    def test_load_threads_region(self):
+        expected = Image.open("Tests/images/hopper.tif")
+        expected.load()
+        im = Image.open("Tests/images/hopper.tif")
+        boxes = [(i * 10, i * 5, i * 10 + 40, i * 5 + 60) for i in range(8)]
+        regions = {}
+
+        def work(i):
+            if i % 2:
+                im.load()
+            regions[i] = im.load(boxes[i])
+
+        self.run_threads(work)
+        self.assert_image_equal(im, expected)
+        for i, box in enumerate(boxes):
+            self.assert_image_equal(regions[i], expected.crop(box))
+
+    def assert_frame_handles(self, open_image, frames=None):
+        # frames decoded through handles on several threads match the
+        # frames decoded by seeking a newly opened image
+        import threading
+        im = open_image()
+        if frames is None:
+            frames = im.n_frames
+        expected = []
+        for i in range(frames):
+            expected_im = open_image()
+            expected_im.seek(i)
+            expected.append(expected_im.convert("RGBA"))
+
+        results = {}
+
+        def load_frame(i):
+            frame = im.frame_handle(i)
+            frame.load()
+            results[i] = frame.convert("RGBA")
+            frame.close()
+
+        threads = [threading.Thread(target=load_frame, args=(i,))
+                   for i in range(frames)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for i in range(frames):
+            self.assert_image_equal(results[i], expected[i])
+        self.assertRaises(EOFError, im.frame_handle, frames)
+
+    def test_frame_handle(self):
+        test_file = "Tests/images/multipage.tiff"
+        self.assert_frame_handles(lambda: Image.open(test_file))
+        with open(test_file, "rb") as f:
+            self.assert_frame_handles(lambda: Image.open(f))
+        with open(test_file, "rb") as f:
+            data = f.read()
+        self.assert_frame_handles(lambda: Image.open(BytesIO(data)))
+        self.assert_frame_handles(lambda: Image.open(memoryview(data)))
+
+        class SharedFile(object):
+            # a file object that can't be read with os.pread
+            def __init__(self, fp):
+                self.fp = fp
+                self.read = fp.read
+                self.readline = fp.readline
+                self.seek = fp.seek
+                self.tell = fp.tell
+                self.fileno = fp.fileno
+
+        with open(test_file, "rb") as f:
+            self.assert_frame_handles(lambda: Image.open(SharedFile(f)))
+
+    def test_frame_handle_formats(self):
+        for test_file in ("Tests/images/iss634.gif",
+                          "Tests/images/hopper.fli",
+                          "Tests/images/sugarshack.mpo"):
+            self.assert_frame_handles(lambda: Image.open(test_file))
+
+        # the composite image and the two layers
+        self.assert_frame_handles(
+            lambda: Image.open("Tests/images/hopper.psd"), 3)
+
+    def test_frame_handle_closed(self):
+        with open("Tests/images/multipage.tiff", "rb") as f:
+            im = Image.open(f)
+        self.assertRaises(IOError, im.frame_handle, 0)
+
+    def test_frame_handle_loaded(self):
+        # the file kept open to seek to the other frames is used
+        with open("Tests/images/multipage.tiff", "rb") as f:
+            data = f.read()
+        for source in BytesIO(data), memoryview(data):
+            im = Image.open(source)
+            im.load()
+            with im.frame_handle(2) as frame:
+                frame.load()
+                im.seek(2)
+                self.assert_image_equal(frame, im)
+
+    @unittest.skipUnless(os.path.isdir("/proc/self/fd"),
+                         "needs /proc/self/fd")
+    def test_frame_handle_descriptors(self):
+        def count():
+            gc.collect()
+            return len(os.listdir("/proc/self/fd"))
+
+        before = count()
+        images = []
+        for i in range(20):
+            im = Image.open("Tests/images/hopper.png")
+            im.load()
+            images.append(im)
+        self.assertEqual(count(), before)
+
+        im = Image.open("Tests/images/multipage.tiff")
+        for i in range(3):
+            with im.frame_handle(i) as frame:
+                frame.load()
+        self.assertRaises(EOFError, im.frame_handle, 3)
+        im.close()
+        self.assertEqual(count(), before)
+
+    def test_independent(self):
+        size = (10, 10)
+        strips = [("raw", (0, 0, 10, 5), 0, "L"),
+                  ("raw", (0, 5, 10, 10), 50, "L")]
+        self.assertTrue(ImageFile._independent(strips, "L", size))
+
+        overlap = [("raw", (0, 0, 10, 6), 0, "L"),
+                   ("raw", (0, 5, 10, 10), 50, "L")]
+        self.assertFalse(ImageFile._independent(overlap, "L", size))
+
+        bands = [("raw", (0, 0, 10, 10), 0, "R"),
+                 ("raw", (0, 0, 10, 10), 100, "G")]
+        self.assertTrue(ImageFile._independent(bands, "RGB", size))
+        self.assertFalse(ImageFile._independent(bands[:1] * 2, "RGB", size))
+
+        full = [("raw", (0, 0, 0, 0), 0, "L"),
+                ("raw", (0, 5, 10, 10), 0, "L")]
+        self.assertFalse(ImageFile._independent(full, "L", size))
+
+    def test_load_box(self):
+        for path in ("Tests/images/hopper.tif", "Tests/images/hopper_lzw.tif",
+                     "Tests/images/hopper.psd"):
+            expected = Image.open(path)
+            expected.load()
+
+            for box in ((0, 0, 128, 128), (10, 20, 50, 40),
+                        (100, 100, 150, 140)):
+                im = Image.open(path)
+                region = im.load(box=box)
+                self.assert_image_equal(region, expected.crop(box))
+                # the image itself is not loaded
+                self.assertTrue(im.tile)
+
+    def test_load_box_tiles(self):
+        # only the tiles intersecting the region are decoded
+        im = Image.open("Tests/images/hopper.tif")
+        getdecoder = Image._getdecoder
+        decoded = []
+
+        def log_decoder(*args):
+            decoded.append(args)
+            return getdecoder(*args)
+
+        Image._getdecoder = log_decoder
+        try:
+            im.load(box=(0, 30, 128, 50))
+        finally:
+            Image._getdecoder = getdecoder
+        self.assertEqual(len(im.tile), 7)
+        self.assertEqual(len(decoded), 2)
+
+    def test_load_box_mapped(self):
+        # images that can be mapped are mapped and cropped
+        im = hopper("L")
+        f = BytesIO()
+        im.save(f, "PPM")
+        f.seek(0)
+
+        loaded = Image.open(f)
+        region = loaded.load(box=(10, 10, 20, 20))
+        self.assert_image_equal(region, im.crop((10, 10, 20, 20)))
+
+    def assert_rows(self, im, expected, band):
+        y = 0
+        for rows in im.iter_rows(band):
+            self.assertEqual(rows.size[0], expected.size[0])
+            self.assertLessEqual(rows.size[1], band)
+            self.assert_image_equal(
+                rows, expected.crop((0, y, expected.size[0],
+                                     y + rows.size[1])))
+            y += rows.size[1]
+        self.assertEqual(y, expected.size[1])
+
+    def test_iter_rows(self):
+        for path in ("Tests/images/hopper.tif", "Tests/images/hopper_lzw.tif",
+                     "Tests/images/hopper.jpg", "Tests/images/12in16bit.tif",
+                     "Tests/images/hopper.ppm"):
+            expected = Image.open(path)
+            expected.load()
+
+            for band in (1, 7, 64, 1000):
+                im = Image.open(path)
+                self.assert_rows(im, expected, band)
+                # the image itself is not loaded
+                self.assertTrue(im.tile)
+
+    def test_row_limit_packbits(self):
+        im = hopper("L")
+        data = im.tobytes()
+        # one literal run of 128 bytes per row
+        packed = b"".join(b"\x7f" + data[y:y + 128]
+                          for y in range(0, len(data), 128))
+        out = Image.core.new("L", im.size)
+
+        d = Image._getdecoder("L", "packbits", "L")
+        d.setimage(out)
+        d.row_limit = 10
+        n, e = d.decode(packed)
+        self.assertEqual((n, d.row), (10 * 129, 10))
+
+        d.row_limit = 0
+        self.assertEqual(d.decode(packed[n:])[0], -1)
+        self.assert_image_equal(Image.Image()._new(out), im)
+
+    def test_iter_rows_fallback(self):
+        # images that cannot be decoded in bands are loaded and cropped
+        for path in ("Tests/images/hopper.psd", "Tests/images/hopper.bmp"):
+            expected = Image.open(path)
+            expected.load()
+
+            im = Image.open(path)
+            self.assert_rows(im, expected, 10)
+            self.assertFalse(im.tile)
+
+        self.assertRaises(ValueError, hopper().iter_rows, 0)
+
+    def test_unpickled(self):
+        import pickle
+        expected = Image.open("Tests/images/hopper.ppm")
+        expected.load()
+
+        im = pickle.loads(pickle.dumps(Image.open("Tests/images/hopper.ppm")))
+        box = (10, 20, 50, 80)
+        self.assert_image_equal(im.load(box), expected.crop(box))
+        self.assert_rows(im, expected, 10)
+
+    def test_iter_rows_truncated(self):
+        with open("Tests/images/hopper.jpg", "rb") as f:
+            data = f.read()[:-3000]
+
+        im = Image.open(BytesIO(data))
+        self.assertRaises(IOError, list, im.iter_rows(16))
+
+        ImageFile.LOAD_TRUNCATED_IMAGES = True
+        try:
+            expected = Image.open(BytesIO(data))
+            expected.load()
+            im = Image.open(BytesIO(data))
+            self.assert_rows(im, expected, 16)
+        finally:
+            ImageFile.LOAD_TRUNCATED_IMAGES = False
+
+    def test_row_limit(self):
+        im = hopper("L")
+        data = im.tobytes()
+        out = Image.core.new("L", im.size)
+
+        d = Image._getdecoder("L", "raw", ("L", 0, 1))
+        d.setimage(out)
+        d.row_limit = 10
+        n, e = d.decode(data)
+        # the decoder pauses after the rows above the limit
+        self.assertEqual((n, e), (10 * 128, 0))
+        self.assertEqual(d.row, 10)
+
+        d.row_limit = 0
+        n, e = d.decode(data[n:])
+        self.assertEqual(n, -1)
+        self.assert_image_equal(Image.Image()._new(out), im)
+
+        d = Image._getdecoder("L", "raw", ("L", 0, -1))
+        self.assertFalse(d.handles_row_limit)
+        with self.assertRaises(ValueError):
+            d.row_limit = 10
+
+    def test_ring(self):
+        band = Image.core.new("L", (4, 2))
+        ring = band.ring(5)
+        self.assertEqual(ring.size, (4, 5))
+
+        d = Image._getdecoder("L", "raw", ("L", 0, 1))
+        d.setimage(ring)
+        d.row_limit = 3
+        d.decode(bytes(bytearray(range(20))))
+        # rows 0 and 2 share the first row of the band
+        self.assertEqual(Image.Image()._new(band).tobytes(),
+                         bytes(bytearray([8, 9, 10, 11, 4, 5, 6, 7])))
+
 if __name__ == '__main__':
     unittest.main()
 
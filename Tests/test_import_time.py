@@ -0,0 +1,64 @@
+from helper import unittest, PillowTestCase
+
+import os
+import subprocess
+import sys
+
+# Seconds that importing PIL.Image may take, on top of starting Python.
+# Well below the cost of importing the format plugins and their
+# dependencies.  Wall-clock times vary too much on loaded machines,
+# so the budget is only checked if PILLOW_CHECK_IMPORT_TIME is set.
+IMPORT_BUDGET = 0.1
+
+
+def run(code):
+    out = subprocess.check_output([sys.executable, "-c", code])
+    return out.decode("ascii").split()
+
+
+class TestImportTime(PillowTestCase):
+
+    def test_modules(self):
+        # importing Image does not import plugins or optional helpers
+        modules = run("""if 1:
+            import sys
+            from PIL import Image
+            print(" ".join(sys.modules))
+            """)
+        for name in ("logging", "cffi", "PIL.PyAccess", "PIL.ImageShow",
+                     "PIL.ImagePalette", "PIL.ImageColor",
+                     "PIL.JpegImagePlugin", "PIL.PngImagePlugin"):
+            self.assertNotIn(name, modules)
+
+    def test_open_modules(self):
+        # opening a file only imports the plugin for its format
+        modules = run("""if 1:
+            import sys
+            from PIL import Image
+            Image.open("Tests/images/hopper.jpg").load()
+            print(" ".join(sys.modules))
+            """)
+        self.assertIn("PIL.JpegImagePlugin", modules)
+        for name in ("logging", "PIL.TiffImagePlugin", "PIL.PngImagePlugin",
+                     "PIL.GifImagePlugin", "PIL.BmpImagePlugin"):
+            self.assertNotIn(name, modules)
+
+    @unittest.skipUnless(os.environ.get("PILLOW_CHECK_IMPORT_TIME"),
+                         "set PILLOW_CHECK_IMPORT_TIME to time imports")
+    def test_budget(self):
+        # the best of several runs, to leave out noise from the machine
+        times = []
+        for i in range(5):
+            times.append(float(run("""if 1:
+                import time
+                start = time.time()
+                from PIL import Image
+                print(time.time() - start)
+                """)[0]))
+        self.assertLess(min(times), IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# End of file
@@ -76,6 +76,47 @@ class TestNumpy(PillowTestCase):
         self.assert_image(Image.fromarray(a[:, 1, :]), "L", (10, 10))
         self.assert_image(Image.fromarray(a[:, :, 1]), "L", (10, 10))
 
+    def test_strided_array(self):
+        a = numpy.arange(5 * 8 * 4, dtype=numpy.uint8).reshape(5, 8, 4)
+
+        def test(arr, mode):
+            img = Image.fromarray(arr)
+            self.assert_image(img, mode, (arr.shape[1], arr.shape[0]))
+            self.assertTrue(numpy.array_equal(numpy.array(img), arr))
+            return img
+
+        # padded rows, bottom-up rows and channel slices are mapped
+        for arr, mode in ((a[:, :6], "RGBA"),
+                          (a[::-1], "RGBA"),
+                          (a[1:4, 2:5], "RGBA"),
+                          (a[:, :, :3], "RGB"),
+                          (a[::-1, :, :3], "RGB")):
+            img = test(arr, mode)
+            self.assertTrue(img.readonly)
+            a[2, 2] = (1, 2, 3, 4)
+            self.assertTrue(numpy.array_equal(numpy.array(img), arr))
+
+        # other layouts are copied
+        img = test(a[:, :, 1], "L")
+        a[0, 0, 1] = 99
+        self.assertNotEqual(img.getpixel((0, 0)), 99)
+
+    def test_frombuffer_stride(self):
+        data = numpy.arange(40, dtype=numpy.uint8).tobytes()
+
+        img = Image.frombuffer("L", (6, 5), data, "raw", "L", 8, 1)
+        self.assertEqual(list(img.getdata())[:8],
+                         [0, 1, 2, 3, 4, 5, 8, 9])
+
+        img = Image.frombuffer("L", (6, 5), data, "raw", "L", 8, -1)
+        self.assertEqual(list(img.getdata())[:8],
+                         [32, 33, 34, 35, 36, 37, 24, 25])
+
+        self.assertRaises(ValueError, Image.frombuffer,
+                          "L", (6, 5), data, "raw", "L", 4, 1)
+        self.assertRaises(ValueError, Image.frombuffer,
+                          "L", (8, 6), data, "raw", "L", 8, 1)
+
     def _test_img_equals_nparray(self, img, np):
         np_size = np.shape[1], np.shape[0]
         self.assertEqual(img.size, np_size)
@@ -121,6 +162,49 @@ class TestNumpy(PillowTestCase):
         for mode in modes:
             _to_array(*mode)
 
+    def test_asarray_shares_memory(self):
+        img = Image.new("RGB", (10, 5), (1, 2, 3))
+        np_img = numpy.asarray(img)
+        self.assertEqual(np_img.shape, (5, 10, 3))
+        self.assertEqual(np_img.strides, (40, 4, 1))
+        self.assertEqual(tuple(np_img[4, 9]), (1, 2, 3))
+
+        # the array is a read-only snapshot of the pixel data
+        self.assertFalse(np_img.flags.writeable)
+        with self.assertRaises(ValueError):
+            np_img[0, 0] = (4, 5, 6)
+        img.putpixel((0, 0), (4, 5, 6))
+        self.assertEqual(tuple(np_img[0, 0]), (1, 2, 3))
+
+        # the core image gives write access
+        np_img = numpy.asarray(img.im)
+        np_img[0, 0] = (7, 8, 9)
+        self.assertEqual(img.getpixel((0, 0)), (7, 8, 9))
+
+        # and keeps the image memory alive
+        del img
+        self.assertEqual(tuple(np_img[4, 9]), (1, 2, 3))
+
+    def test_asarray_mapped_buffer(self):
+        # images mapped from a writable buffer don't write to it
+        from io import BytesIO
+        f = BytesIO()
+        hopper("L").save(f, "PPM")
+        data = bytearray(f.getvalue())
+        im = Image.open(data)
+        im.load()
+        self.assertTrue(im.readonly)
+
+        for np_img in numpy.asarray(im), numpy.asarray(im.im):
+            self.assertFalse(np_img.flags.writeable)
+            with self.assertRaises(ValueError):
+                np_img[0, 0] = 7
+        self.assertTrue(memoryview(im.im).readonly)
+
+        im.putpixel((0, 0), 7)
+        self.assertEqual(im.getpixel((0, 0)), 7)
+        self.assertEqual(data, bytearray(f.getvalue()))
+
     def test_point_lut(self):
         # see https://github.com/python-pillow/Pillow/issues/439
 
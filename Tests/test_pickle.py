@@ -2,6 +2,16 @@ from helper import unittest, PillowTestCase
 
 from PIL import Image
 
+import copy
+import mmap
+import pickle
+import subprocess
+import sys
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
 
 class TestPickle(PillowTestCase):
 
@@ -92,6 +102,92 @@ class TestPickle(PillowTestCase):
             self.helper_pickle_string(cPickle, protocol, mode="L")
             self.helper_pickle_file(cPickle, protocol, mode="L")
 
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, "requires protocol 5")
+    def test_pickle_out_of_band(self):
+        # Arrange
+        im = Image.open('Tests/images/hopper.jpg')
+        buffers = []
+
+        # Act
+        dumped_string = pickle.dumps(im, 5, buffer_callback=buffers.append)
+        loaded_im = pickle.loads(dumped_string, buffers=buffers)
+
+        # Assert
+        self.assertEqual(len(buffers), 1)
+        self.assertLess(len(dumped_string), 1000)
+        self.assertEqual(im, loaded_im)
+
+        # the loaded image maps the buffer
+        loaded_im.putpixel((0, 0), (1, 2, 3))
+        self.assertEqual(im.getpixel((0, 0)), (1, 2, 3))
+
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, "requires protocol 5")
+    def test_pickle_out_of_band_readonly(self):
+        # read-only buffers give read-only images
+        im = Image.new("RGB", (4, 3), (1, 2, 3))
+        buffers = []
+        dumped_string = pickle.dumps(im, 5, buffer_callback=buffers.append)
+        loaded_im = pickle.loads(dumped_string,
+                                 buffers=[b.raw().tobytes() for b in buffers])
+
+        self.assertTrue(loaded_im.readonly)
+        self.assertEqual(loaded_im.tobytes(), im.tobytes())
+
+    @unittest.skipIf(shared_memory is None, "requires shared_memory")
+    def test_pickle_shared(self):
+        # Arrange
+        im = Image.new_shared("RGB", (128, 128), "red")
+
+        # Act
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            dumped_string = pickle.dumps(im, protocol)
+            loaded_im = pickle.loads(dumped_string)
+
+            # Assert
+            self.assertLess(len(dumped_string), 1000)
+            self.assertEqual(loaded_im.getpixel((0, 0)), (255, 0, 0))
+            loaded_im.putpixel((5, 5), (0, 0, protocol))
+            self.assertEqual(im.getpixel((5, 5)), (0, 0, protocol))
+            loaded_im.close()
+
+        im.close()
+
+    @unittest.skipIf(shared_memory is None, "requires shared_memory")
+    def test_pickle_shared_other_process(self):
+        # a process that opens the segment leaves it to its creator
+        im = Image.new_shared("L", (4, 4), 7)
+        code = ("import pickle, sys\n"
+                "im = pickle.loads(sys.stdin.buffer.read())\n"
+                "print(im.getpixel((0, 0)))\n"
+                "im.close()\n")
+        process = subprocess.Popen([sys.executable, "-c", code],
+                                   stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE)
+        out = process.communicate(pickle.dumps(im, 2))[0]
+
+        self.assertEqual(out.split(), [b"7"])
+        shared_memory.SharedMemory(im._shared[1].name).close()
+        self.assertEqual(im.getpixel((0, 0)), 7)
+        im.close()
+
+    def test_deepcopy_shared(self):
+        im = Image.new_shared("L", (16, 16), 1)
+        im2 = copy.deepcopy(im)
+        im2.putpixel((0, 0), 2)
+
+        self.assertEqual(im.getpixel((0, 0)), 1)
+        self.assertIsNone(im2._shared)
+        im.close()
+
+    def test_new_shared_mmap(self):
+        memory = mmap.mmap(-1, 16 * 16 * 4)
+        im = Image.new_shared("RGB", (16, 16), (1, 2, 3), memory)
+
+        self.assertEqual(memory[:4], b"\x01\x02\x03\xff")
+        self.assertEqual(pickle.loads(pickle.dumps(im)), im)
+        self.assertRaises(ValueError, Image.new_shared,
+                          "RGB", (16, 17), 0, memory)
+
 if __name__ == '__main__':
     unittest.main()
 
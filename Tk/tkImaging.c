@@ -139,11 +139,11 @@ PyImagingPhotoPut(ClientData clientdata, Tcl_Interp* interp,
 
     block.width = im->xsize;
     block.height = im->ysize;
-    block.pitch = im->linesize;
+    block.pitch = im->stride;
     block.pixelPtr = (unsigned char*) im->block;
 #if 0
     block.pixelPtr = (unsigned char*) im->block +
-	             src_yoffset * im->linesize +
+	             src_yoffset * im->stride +
 	             src_xoffset * im->pixelsize;
 #endif
 
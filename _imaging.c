@@ -114,6 +114,9 @@ typedef struct {
     PyObject_HEAD
     Imaging image;
     ImagingAccess access;
+    /* shape and strides of exported buffers.  kept here rather than
+       in the Py_buffer, since Python 2.7 copies that structure */
+    Py_ssize_t layout[6];
 } ImagingObject;
 
 static PyTypeObject Imaging_Type;
@@ -159,6 +162,17 @@ typedef struct {
 
 static PyTypeObject PixelAccess_Type;
 
+typedef struct {
+    PyObject_HEAD
+    ImagingObject* image;
+    Imaging memory;
+    char* buf;
+    Py_ssize_t len;
+    int readonly;
+} RowBufferObject;
+
+static PyTypeObject RowBuffer_Type;
+
 PyObject*
 PyImagingNew(Imaging imOut)
 {
@@ -209,6 +223,96 @@ Imaging PyImaging_AsImaging(PyObject *op)
     return ((ImagingObject *)op)->image;
 }
 
+/* copy on write: images that share memory with other images (see
+   ImagingNewView) must be unshared before they are modified */
+
+static int
+_unshare(ImagingObject* self)
+{
+    Imaging im;
+
+    if (!ImagingIsShared(self->image))
+        return 0;
+
+    im = ImagingCopy(self->image);
+    if (!im)
+        return -1;
+
+    ImagingDelete(self->image);
+    self->image = im;
+
+    return 0;
+}
+
+static int
+_pin(ImagingObject* self)
+{
+    /* the memory is about to be handed out, and may be modified
+       without our knowledge from now on */
+    if (_unshare(self) < 0)
+        return -1;
+    self->image->pinned = 1;
+    return 0;
+}
+
+Imaging PyImaging_AsWritableImaging(PyObject *op)
+{
+    if (!PyImaging_Check(op)) {
+        PyErr_BadInternalCall();
+        return NULL;
+    }
+
+    if (_unshare((ImagingObject *)op) < 0)
+        return NULL;
+
+    return ((ImagingObject *)op)->image;
+}
+
+/* output images: operations taking an optional output image argument
+   write their result into it instead of allocating a new image */
+
+static int
+_getoutput(PyObject* arg, void* address)
+{
+    /* "O&" converter; None means that a new image should be created */
+    ImagingObject** outp = address;
+
+    if (arg == Py_None) {
+        *outp = NULL;
+        return 1;
+    }
+
+    if (!PyImaging_Check(arg)) {
+        PyErr_SetString(PyExc_TypeError, "output must be an image object");
+        return 0;
+    }
+
+    if (_unshare((ImagingObject*) arg) < 0)
+        return 0;
+
+    if (((ImagingObject*) arg)->image->read_only) {
+        PyErr_SetString(PyExc_ValueError, "output image is read-only");
+        return 0;
+    }
+
+    *outp = (ImagingObject*) arg;
+    return 1;
+}
+
+static PyObject*
+_newoutput(ImagingObject* out, Imaging im)
+{
+    /* return the result of an operation, given its output image */
+    if (!out)
+        return PyImagingNew(im);
+
+    if (!im)
+        return NULL;
+
+    Py_INCREF(out);
+    return (PyObject*) out;
+}
+
 
 /* -------------------------------------------------------------------- */
 /* THREAD HANDLING                                                      */
@@ -242,23 +346,17 @@ int PyImaging_CheckBuffer(PyObject* buffer)
 #endif
 }
 
-int PyImaging_GetBuffer(PyObject* buffer, Py_buffer *view)
+#if PY_VERSION_HEX < 0x03000000
+static int
+_getbuffer_old(PyObject* buffer, Py_buffer *view, int writable)
 {
-    /* must call check_buffer first! */
-#if PY_VERSION_HEX >= 0x03000000
-    return PyObject_GetBuffer(buffer, view, PyBUF_SIMPLE);
-#else
-    /* Use new buffer protocol if available
-       (mmap doesn't support this in 2.7, go figure) */
-    if (PyObject_CheckBuffer(buffer)) {
-        return PyObject_GetBuffer(buffer, view, PyBUF_SIMPLE);
-    }
-
     /* Pretend we support the new protocol; PyBuffer_Release happily ignores
        calling bf_releasebuffer on objects that don't support it */
+    int status;
+
     view->buf = NULL;
     view->len = 0;
-    view->readonly = 1;
+    view->readonly = !writable;
     view->format = NULL;
     view->ndim = 0;
     view->shape = NULL;
@@ -267,10 +365,48 @@ int PyImaging_GetBuffer(PyObject* buffer, Py_buffer *view)
     view->itemsize = 0;
     view->internal = NULL;
 
+    if (writable)
+        status = PyObject_AsWriteBuffer(buffer, &view->buf, &view->len);
+    else
+        status = PyObject_AsReadBuffer(buffer, (void *) &view->buf,
+                                       &view->len);
+    if (status < 0)
+        return -1;
+
     Py_INCREF(buffer);
     view->obj = buffer;
 
-    return PyObject_AsReadBuffer(buffer, (void *) &view->buf, &view->len);
+    return 0;
+}
+#endif
+
+int PyImaging_GetBuffer(PyObject* buffer, Py_buffer *view)
+{
+    /* must call check_buffer first! */
+#if PY_VERSION_HEX >= 0x03000000
+    return PyObject_GetBuffer(buffer, view, PyBUF_SIMPLE);
+#else
+    /* Use new buffer protocol if available
+       (mmap doesn't support this in 2.7, go figure) */
+    if (PyObject_CheckBuffer(buffer)) {
+        return PyObject_GetBuffer(buffer, view, PyBUF_SIMPLE);
+    }
+
+    return _getbuffer_old(buffer, view, 0);
+#endif
+}
+
+int PyImaging_GetWritableBuffer(PyObject* buffer, Py_buffer *view)
+{
+    /* like PyImaging_GetBuffer, for buffers that will be written to */
+#if PY_VERSION_HEX >= 0x03000000
+    return PyObject_GetBuffer(buffer, view, PyBUF_WRITABLE);
+#else
+    if (PyObject_CheckBuffer(buffer)) {
+        return PyObject_GetBuffer(buffer, view, PyBUF_WRITABLE);
+    }
+
+    return _getbuffer_old(buffer, view, 1);
 #endif
 }
 
@@ -304,6 +440,15 @@ ImagingError_MemoryError(void)
     return PyErr_NoMemory();
 }
 
+static PyObject* MemoryBudgetError;
+
+void *
+ImagingError_MemoryBudget(void)
+{
+    PyErr_SetString(MemoryBudgetError, "image memory budget exceeded");
+    return NULL;
+}
+
 void *
 ImagingError_Mismatch(void)
 {
@@ -651,6 +796,142 @@ _getcount(PyObject* self, PyObject* args)
     return PyInt_FromLong(ImagingNewCount);
 }
 
+static PyObject*
+_get_pool_limit(PyObject* self, PyObject* args)
+{
+    if (!PyArg_ParseTuple(args, ":get_pool_limit"))
+        return NULL;
+
+    return PyInt_FromSsize_t(ImagingDefaultPool.bytes_max);
+}
+
+static PyObject*
+_set_pool_limit(PyObject* self, PyObject* args)
+{
+    Py_ssize_t bytes_max;
+
+    if (!PyArg_ParseTuple(args, "n:set_pool_limit", &bytes_max))
+        return NULL;
+
+    if (bytes_max < 0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "pool limit should be greater than or equal to 0");
+        return NULL;
+    }
+
+    ImagingPoolSetLimit(&ImagingDefaultPool, bytes_max);
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+static PyObject*
+_get_pool_usage(PyObject* self, PyObject* args)
+{
+    if (!PyArg_ParseTuple(args, ":get_pool_usage"))
+        return NULL;
+
+    return Py_BuildValue("in", ImagingDefaultPool.blocks,
+                         ImagingDefaultPool.bytes);
+}
+
+static PyObject*
+_clear_pool(PyObject* self, PyObject* args)
+{
+    if (!PyArg_ParseTuple(args, ":clear_pool"))
+        return NULL;
+
+    ImagingPoolClear(&ImagingDefaultPool);
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+static PyObject*
+_get_stats(PyObject* self, PyObject* args)
+{
+    if (!PyArg_ParseTuple(args, ":get_stats"))
+        return NULL;
+
+    return Py_BuildValue("{s:i,s:n,s:n,s:n,s:n,s:n}",
+                         "images", ImagingMemoryStats.images,
+                         "bytes", ImagingMemoryStats.bytes,
+                         "peak_bytes", ImagingMemoryStats.bytes_peak,
+                         "allocations", ImagingMemoryStats.allocs,
+                         "frees", ImagingMemoryStats.frees,
+                         "refusals", ImagingMemoryStats.refusals);
+}
+
+static PyObject*
+_get_memory_budget(PyObject* self, PyObject* args)
+{
+    if (!PyArg_ParseTuple(args, ":get_memory_budget"))
+        return NULL;
+
+    return Py_BuildValue("nd", ImagingMemoryStats.bytes_max,
+                         ImagingMemoryStats.timeout / 1000.0);
+}
+
+static PyObject*
+_set_memory_budget(PyObject* self, PyObject* args)
+{
+    Py_ssize_t bytes_max;
+    double timeout = 0.0;
+
+    if (!PyArg_ParseTuple(args, "n|d:set_memory_budget", &bytes_max, &timeout))
+        return NULL;
+
+    if (bytes_max < 0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "memory budget should be greater than or equal to 0");
+        return NULL;
+    }
+    if (timeout < 0 || timeout > INT_MAX / 1000) {
+        PyErr_SetString(PyExc_ValueError, "timeout out of range");
+        return NULL;
+    }
+
+    ImagingMemorySetBudget(bytes_max, (int) (timeout * 1000));
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+static PyObject*
+_get_aligned_storage(PyObject* self, PyObject* args)
+{
+    if (!PyArg_ParseTuple(args, ":get_aligned_storage"))
+        return NULL;
+
+    return PyBool_FromLong(ImagingAlignedStorage);
+}
+
+static PyObject*
+_set_aligned_storage(PyObject* self, PyObject* args)
+{
+    int aligned;
+
+    if (!PyArg_ParseTuple(args, "i:set_aligned_storage", &aligned))
+        return NULL;
+
+    ImagingAlignedStorage = (aligned != 0);
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+static PyObject*
+_reset_stats(PyObject* self, PyObject* args)
+{
+    if (!PyArg_ParseTuple(args, ":reset_stats"))
+        return NULL;
+
+    ImagingMemoryStatsReset();
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
 static PyObject*
 _linear_gradient(PyObject* self, PyObject* args)
 {
@@ -726,9 +1007,13 @@ _convert(ImagingObject* self, PyObject* args)
     char* mode;
     int dither = 0;
     ImagingObject *paletteimage = NULL;
+    ImagingObject *out = NULL;
 
-    if (!PyArg_ParseTuple(args, "s|iO", &mode, &dither, &paletteimage))
+    if (!PyArg_ParseTuple(args, "s|iOO&", &mode, &dither, &paletteimage,
+                          _getoutput, &out))
         return NULL;
+    if ((PyObject*) paletteimage == Py_None)
+        paletteimage = NULL;
     if (paletteimage != NULL) {
         if (!PyImaging_Check(paletteimage)) {
             PyObject_Print((PyObject *)paletteimage, stderr, 0);
@@ -741,6 +1026,12 @@ _convert(ImagingObject* self, PyObject* args)
         }
     }
 
+    if (out) {
+        if (strcmp(out->image->mode, mode) != 0)
+            return ImagingError_Mismatch();
+        return _newoutput(out, ImagingConvertInto(out->image, self->image, paletteimage ? paletteimage->image->palette : NULL, dither));
+    }
+
     return PyImagingNew(ImagingConvert(self->image, mode, paletteimage ? paletteimage->image->palette : NULL, dither));
 }
 
@@ -754,6 +1045,9 @@ _convert2(ImagingObject* self, PyObject* args)
                           &Imaging_Type, &imagep2))
         return NULL;
 
+    if (_unshare(imagep1) < 0)
+        return NULL;
+
     if (!ImagingConvert2(imagep1->image, imagep2->image))
         return NULL;
 
@@ -800,7 +1094,9 @@ _copy(ImagingObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, ""))
         return NULL;
 
-    return PyImagingNew(ImagingCopy(self->image));
+    return PyImagingNew(ImagingNewView(self->image, 0, 0,
+                                       self->image->xsize,
+                                       self->image->ysize));
 }
 
 static PyObject*
@@ -813,6 +1109,9 @@ _copy2(ImagingObject* self, PyObject* args)
                           &Imaging_Type, &imagep2))
         return NULL;
 
+    if (_unshare(imagep1) < 0)
+        return NULL;
+
     if (!ImagingCopy2(imagep1->image, imagep2->image))
         return NULL;
 
@@ -827,7 +1126,7 @@ _crop(ImagingObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "(iiii)", &x0, &y0, &x1, &y1))
         return NULL;
 
-    return PyImagingNew(ImagingCrop(self->image, x0, y0, x1, y1));
+    return PyImagingNew(ImagingNewView(self->image, x0, y0, x1, y1));
 }
 
 static PyObject*
@@ -1119,6 +1418,9 @@ _paste(ImagingObject* self, PyObject* args)
               &Imaging_Type, &maskp))
     return NULL;
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     if (PyImaging_Check(source))
         status = ImagingPaste(
             self->image, PyImaging_AsImaging(source),
@@ -1151,12 +1453,16 @@ _point(ImagingObject* self, PyObject* args)
     int n, i;
     int bands;
     Imaging im;
+    Imaging imOut;
 
     PyObject* list;
     char* mode;
-    if (!PyArg_ParseTuple(args, "Oz", &list, &mode))
+    ImagingObject* out = NULL;
+    if (!PyArg_ParseTuple(args, "Oz|O&", &list, &mode, _getoutput, &out))
     return NULL;
 
+    imOut = out ? out->image : NULL;
+
     if (mode && !strcmp(mode, "F")) {
         FLOAT32* data;
 
@@ -1165,7 +1471,7 @@ _point(ImagingObject* self, PyObject* args)
         data = getlist(list, &n, wrong_number, TYPE_FLOAT32);
         if (!data)
             return NULL;
-        im = ImagingPoint(self->image, mode, (void*) data);
+        im = ImagingPoint2(imOut, self->image, mode, (void*) data);
         free(data);
 
     } else if (!strcmp(self->image->mode, "I") && mode && !strcmp(mode, "L")) {
@@ -1177,7 +1483,7 @@ _point(ImagingObject* self, PyObject* args)
         data = getlist(list, &n, wrong_number, TYPE_UINT8);
         if (!data)
             return NULL;
-        im = ImagingPoint(self->image, mode, (void*) data);
+        im = ImagingPoint2(imOut, self->image, mode, (void*) data);
         free(data);
 
     } else {
@@ -1198,7 +1504,7 @@ _point(ImagingObject* self, PyObject* args)
             return NULL;
 
         if (mode && !strcmp(mode, "I"))
-            im = ImagingPoint(self->image, mode, (void*) data);
+            im = ImagingPoint2(imOut, self->image, mode, (void*) data);
         else if (mode && bands > 1) {
             for (i = 0; i < 256; i++) {
                 lut[i*4] = CLIP(data[i]);
@@ -1207,17 +1513,17 @@ _point(ImagingObject* self, PyObject* args)
                 if (n > 768)
                     lut[i*4+3] = CLIP(data[i+768]);
             }
-            im = ImagingPoint(self->image, mode, (void*) lut);
+            im = ImagingPoint2(imOut, self->image, mode, (void*) lut);
         } else {
             /* map individual bands */
             for (i = 0; i < n; i++)
                 lut[i] = CLIP(data[i]);
-            im = ImagingPoint(self->image, mode, (void*) lut);
+            im = ImagingPoint2(imOut, self->image, mode, (void*) lut);
         }
         free(data);
     }
 
-    return PyImagingNew(im);
+    return _newoutput(out, im);
 }
 
 static PyObject*
@@ -1225,10 +1531,12 @@ _point_transform(ImagingObject* self, PyObject* args)
 {
     double scale = 1.0;
     double offset = 0.0;
-    if (!PyArg_ParseTuple(args, "|dd", &scale, &offset))
+    ImagingObject* out = NULL;
+    if (!PyArg_ParseTuple(args, "|ddO&", &scale, &offset, _getoutput, &out))
     return NULL;
 
-    return PyImagingNew(ImagingPointTransform(self->image, scale, offset));
+    return _newoutput(out, ImagingPointTransform2(out ? out->image : NULL,
+                                                  self->image, scale, offset));
 }
 
 static PyObject*
@@ -1252,6 +1560,9 @@ _putdata(ImagingObject* self, PyObject* args)
         return NULL;
     }
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     image = self->image;
 
     n = PyObject_Length(data);
@@ -1419,6 +1730,9 @@ _putpalette(ImagingObject* self, PyObject* args)
         return NULL;
     }
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     ImagingPaletteDelete(self->image->palette);
 
     strcpy(self->image->mode, "P");
@@ -1449,6 +1763,9 @@ _putpalettealpha(ImagingObject* self, PyObject* args)
         return NULL;
     }
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     strcpy(self->image->palette->mode, "RGBA");
     self->image->palette->palette[index*4+3] = (UINT8) alpha;
 
@@ -1475,6 +1792,9 @@ _putpalettealphas(ImagingObject* self, PyObject* args)
         return NULL;
     }
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     strcpy(self->image->palette->mode, "RGBA");
     for (i=0; i<length; i++) {
         self->image->palette->palette[i*4+3] = (UINT8) values[i];
@@ -1495,6 +1815,9 @@ _putpixel(ImagingObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "(ii)O", &x, &y, &color))
         return NULL;
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     im = self->image;
 
     if (x < 0 || x >= im->xsize || y < 0 || y >= im->ysize) {
@@ -1529,10 +1852,12 @@ _resize(ImagingObject* self, PyObject* args)
 {
     Imaging imIn;
     Imaging imOut;
+    ImagingObject* out = NULL;
 
     int xsize, ysize;
     int filter = IMAGING_TRANSFORM_NEAREST;
-    if (!PyArg_ParseTuple(args, "(ii)|i", &xsize, &ysize, &filter))
+    if (!PyArg_ParseTuple(args, "(ii)|iO&", &xsize, &ysize, &filter,
+                          _getoutput, &out))
         return NULL;
 
     imIn = self->image;
@@ -1541,8 +1866,13 @@ _resize(ImagingObject* self, PyObject* args)
         return ImagingError_ValueError("height and width must be > 0");
     }
 
+    if (out && (strcmp(out->image->mode, imIn->mode) != 0 ||
+                out->image->xsize != xsize || out->image->ysize != ysize)) {
+        return ImagingError_Mismatch();
+    }
+
     if (imIn->xsize == xsize && imIn->ysize == ysize) {
-        imOut = ImagingCopy(imIn);
+        imOut = ImagingCopy2(out ? out->image : NULL, imIn);
     }
     else if ( ! filter) {
         double a[6];
@@ -1551,18 +1881,27 @@ _resize(ImagingObject* self, PyObject* args)
         a[1] = (double) imIn->xsize / xsize;
         a[5] = (double) imIn->ysize / ysize;
 
-        imOut = ImagingNew(imIn->mode, xsize, ysize);
+        if (out)
+            imOut = out->image;
+        else {
+            imOut = ImagingNew(imIn->mode, xsize, ysize);
+            if (!imOut)
+                return NULL;
+        }
 
         imOut = ImagingTransformAffine(
             imOut, imIn,
             0, 0, xsize, ysize,
             a, filter, 1);
     }
+    else if (out) {
+        imOut = ImagingResample2(out->image, imIn, filter);
+    }
     else {
         imOut = ImagingResample(imIn, xsize, ysize, filter);
     }
 
-    return PyImagingNew(imOut);
+    return _newoutput(out, imOut);
 }
 
 static PyObject*
@@ -1586,7 +1925,8 @@ _rotate(ImagingObject* self, PyObject* args)
     if (filter && imIn->type != IMAGING_TYPE_SPECIAL) {
         /* Rotate with resampling filter */
         imOut = ImagingNew(imIn->mode, imIn->xsize, imIn->ysize);
-    (void) ImagingRotate(imOut, imIn, theta, filter);
+        if (imOut)
+            (void) ImagingRotate(imOut, imIn, theta, filter);
     } else if ((theta == 90.0 || theta == 270.0)
             && (expand || imIn->xsize == imIn->ysize)) {
         /* Use fast version */
@@ -1630,6 +1970,9 @@ im_setmode(ImagingObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "s#:setmode", &mode, &modelen))
     return NULL;
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     im = self->image;
 
     /* move all logic in here to the libImaging primitive */
@@ -1680,6 +2023,9 @@ _transform2(ImagingObject* self, PyObject* args)
                           &filter, &fill))
     return NULL;
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     switch (method) {
     case IMAGING_TRANSFORM_AFFINE:
         n = 6;
@@ -1839,6 +2185,276 @@ _isblock(ImagingObject* self, PyObject* args)
     return PyInt_FromLong((long) self->image->block);
 }
 
+static PyObject*
+_rowbuffer(ImagingObject* self, PyObject* args)
+{
+    /* export rows y0 to y1 as a flat buffer of bytes, padding
+       included.  this requires each row to follow the previous one
+       directly in memory.  a readonly buffer is a snapshot: it holds
+       on to the memory without pinning the image, so later writes
+       copy the image rather than change the buffer */
+
+    RowBufferObject* buffer;
+    Imaging im = self->image;
+    int y;
+
+    int y0 = 0, y1 = im->ysize;
+    int readonly = 0;
+    if (!PyArg_ParseTuple(args, "|iii", &y0, &y1, &readonly))
+        return NULL;
+
+    if (!readonly) {
+        if (_pin(self) < 0)
+            return NULL;
+        im = self->image;
+    }
+
+    if (y0 < 0 || y1 > im->ysize || y0 > y1) {
+        PyErr_SetString(PyExc_ValueError, "row range out of range");
+        return NULL;
+    }
+
+    for (y = y0 + 1; y < y1; y++)
+        if (im->image[y] != im->image[y-1] + im->stride) {
+            PyErr_SetString(PyExc_BufferError, "rows are not contiguous");
+            return NULL;
+        }
+
+    buffer = PyObject_New(RowBufferObject, &RowBuffer_Type);
+    if (buffer == NULL)
+        return NULL;
+
+    if (readonly && !im->pinned) {
+        /* keep a reference to the memory, like readrows.  pinned
+           memory may already be written to through other exports, and
+           must stay with the image object */
+        im->refcount++;
+        buffer->image = NULL;
+        buffer->memory = im;
+    } else {
+        /* keep a reference to the image object */
+        Py_INCREF(self);
+        buffer->image = self;
+        buffer->memory = NULL;
+    }
+
+    buffer->buf = (y0 < y1) ? im->image[y0] : (char*) "";
+    buffer->len = (Py_ssize_t) (y1 - y0) * im->stride;
+    buffer->readonly = readonly || im->read_only;
+
+    return (PyObject*) buffer;
+}
+
+static Py_ssize_t
+_readinto_memory(PyObject* readinto, char* buf, Py_ssize_t size)
+{
+    /* call readinto with views of buf until size bytes have been read,
+       or no more data is returned.  returns the number of bytes read,
+       or -1 on error */
+
+    Py_buffer info;
+    PyObject* view;
+    PyObject* result;
+    Py_ssize_t n, done = 0;
+
+    while (done < size) {
+        if (PyBuffer_FillInfo(&info, NULL, buf + done, size - done, 0,
+                              PyBUF_CONTIG) < 0)
+            return -1;
+        view = PyMemoryView_FromBuffer(&info);
+        if (!view)
+            return -1;
+
+        result = PyObject_CallFunctionObjArgs(readinto, view, NULL);
+
+#if PY_VERSION_HEX >= 0x03020000
+        /* the memory must not be reachable through the view later on */
+        if (result) {
+            PyObject* released = PyObject_CallMethod(view, "release", NULL);
+            if (!released)
+                Py_CLEAR(result);
+            Py_XDECREF(released);
+        }
+#endif
+        Py_DECREF(view);
+        if (!result)
+            return -1;
+
+        if (result == Py_None)
+            n = 0;
+        else
+            n = PyNumber_AsSsize_t(result, PyExc_OverflowError);
+        Py_DECREF(result);
+        if (n == -1 && PyErr_Occurred())
+            return -1;
+
+        if (n <= 0)
+            break;
+        if (n > size - done) {
+            PyErr_SetString(PyExc_ValueError, "readinto returned too much data");
+            return -1;
+        }
+        done += n;
+    }
+
+    return done;
+}
+
+static PyObject*
+_readrows(ImagingObject* self, PyObject* args)
+{
+    /* read uncompressed pixel data, laid out in the file like it is in
+       memory, straight into the image.  rows of the tile are stride
+       bytes apart in the file, and stored bottom up if ystep is -1.
+       returns the number of rows read */
+
+    Imaging im;
+    PyObject* readinto;
+    int x0, y0, x1, y1, stride, ystep;
+    int y, yy, n;
+    Py_ssize_t rowsize, size, got;
+    char* padding = NULL;
+
+    if (!PyArg_ParseTuple(args, "O(iiii)ii:readrows", &readinto,
+                          &x0, &y0, &x1, &y1, &stride, &ystep))
+        return NULL;
+
+    if (_unshare(self) < 0)
+        return NULL;
+    im = self->image;
+
+    if (im->read_only) {
+        PyErr_SetString(PyExc_ValueError, "image is read-only");
+        return NULL;
+    }
+    if (x0 < 0 || y0 < 0 || x1 > im->xsize || y1 > im->ysize ||
+        x0 > x1 || y0 > y1) {
+        PyErr_SetString(PyExc_ValueError, "tile cannot extend outside image");
+        return NULL;
+    }
+    if (ystep != 1 && ystep != -1) {
+        PyErr_SetString(PyExc_ValueError, "row step must be 1 or -1");
+        return NULL;
+    }
+
+    rowsize = (Py_ssize_t) (x1 - x0) * im->pixelsize;
+    if (stride == 0)
+        stride = (int) rowsize;
+    if (stride < rowsize) {
+        PyErr_SetString(PyExc_ValueError, "stride is too small");
+        return NULL;
+    }
+    if (stride > rowsize) {
+        padding = malloc(stride - rowsize);
+        if (!padding)
+            return PyErr_NoMemory();
+    }
+
+    /* readinto may run arbitrary code; hold on to the memory until we
+       are done with it */
+    im->refcount++;
+
+    for (y = 0; y < y1 - y0; y += n) {
+        yy = (ystep > 0) ? y0 + y : y1 - 1 - y;
+
+        /* skip the padding after the previous row */
+        if (y > 0 && padding) {
+            got = _readinto_memory(readinto, padding, stride - rowsize);
+            if (got < 0)
+                goto error;
+            if (got < stride - rowsize)
+                break;
+        }
+
+        /* rows following each other both in the file and in memory
+           are read in one go */
+        n = 1;
+        if (ystep > 0 && !padding && rowsize == im->linesize)
+            while (y + n < y1 - y0 &&
+                   im->image[yy+n] == im->image[yy+n-1] + rowsize)
+                n++;
+
+        size = n * rowsize;
+        got = _readinto_memory(readinto,
+                               im->image[yy] + x0 * im->pixelsize, size);
+        if (got < 0)
+            goto error;
+        if (got < size) {
+            y += (int) (got / rowsize);
+            break;
+        }
+    }
+
+    free(padding);
+    ImagingDelete(im);
+    return PyInt_FromLong(y);
+
+  error:
+    free(padding);
+    ImagingDelete(im);
+    return NULL;
+}
+
+/* ring images: taller images whose rows cycle through the rows of
+   another image (the band).  a decoder writing to a ring image fills
+   the band over and over again */
+
+typedef struct ImagingRingInstance {
+    struct ImagingMemoryInstance im;
+    PyObject* band;
+} ImagingRingInstance;
+
+static void
+_ring_destroy(Imaging im)
+{
+    Py_XDECREF(((ImagingRingInstance*) im)->band);
+}
+
+static PyObject*
+_ring(ImagingObject* self, PyObject* args)
+{
+    Imaging im;
+    Imaging band;
+    int ysize, y;
+
+    if (!PyArg_ParseTuple(args, "i:ring", &ysize))
+        return NULL;
+
+    if (ysize < 0) {
+        PyErr_SetString(PyExc_ValueError, "height must be non-negative");
+        return NULL;
+    }
+    if (self->image->ysize <= 0) {
+        PyErr_SetString(PyExc_ValueError, "band must have rows");
+        return NULL;
+    }
+
+    /* the band is written behind its back from now on */
+    if (_pin(self) < 0)
+        return NULL;
+    band = self->image;
+
+    im = ImagingNewPrologueSubtype(band->mode, band->xsize, ysize,
+                                   sizeof(ImagingRingInstance));
+    if (!im)
+        return NULL;
+
+    for (y = 0; y < ysize; y++)
+        im->image[y] = band->image[y % band->ysize];
+
+    im->destroy = _ring_destroy;
+    im->read_only = band->read_only;
+    im->pinned = 1;
+
+    Py_INCREF(self);
+    ((ImagingRingInstance*) im)->band = (PyObject*) self;
+
+    if (!ImagingNewEpilogue(im))
+        return NULL;
+
+    return PyImagingNew(im);
+}
+
 static PyObject*
 _getbbox(ImagingObject* self, PyObject* args)
 {
@@ -1963,6 +2579,9 @@ _fillband(ImagingObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "ii", &band, &color))
         return NULL;
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     if (!ImagingFillBand(self->image, band, color))
         return NULL;
 
@@ -1980,6 +2599,9 @@ _putband(ImagingObject* self, PyObject* args)
                           &band))
         return NULL;
 
+    if (_unshare(self) < 0)
+        return NULL;
+
     if (!ImagingPutBand(self->image, imagep->image, band))
         return NULL;
 
@@ -1994,153 +2616,193 @@ _putband(ImagingObject* self, PyObject* args)
 static PyObject*
 _chop_invert(ImagingObject* self, PyObject* args)
 {
-    return PyImagingNew(ImagingNegative(self->image));
+    ImagingObject* out = NULL;
+
+    if (!PyArg_ParseTuple(args, "|O&", _getoutput, &out))
+        return NULL;
+
+    return _newoutput(out, ImagingNegative(out ? out->image : NULL,
+                                           self->image));
 }
 
 static PyObject*
 _chop_lighter(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopLighter(self->image, imagep->image));
+    return _newoutput(out, ImagingChopLighter(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_darker(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopDarker(self->image, imagep->image));
+    return _newoutput(out, ImagingChopDarker(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_difference(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopDifference(self->image, imagep->image));
+    return _newoutput(out, ImagingChopDifference(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_multiply(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopMultiply(self->image, imagep->image));
+    return _newoutput(out, ImagingChopMultiply(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_screen(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopScreen(self->image, imagep->image));
+    return _newoutput(out, ImagingChopScreen(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_add(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
     float scale;
     int offset;
 
     scale = 1.0;
     offset = 0;
 
-    if (!PyArg_ParseTuple(args, "O!|fi", &Imaging_Type, &imagep,
-                          &scale, &offset))
+    if (!PyArg_ParseTuple(args, "O!|fiO&", &Imaging_Type, &imagep,
+                          &scale, &offset, _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopAdd(self->image, imagep->image,
-                       scale, offset));
+    return _newoutput(out, ImagingChopAdd(out ? out->image : NULL,
+                                         self->image, imagep->image,
+                                         scale, offset));
 }
 
 static PyObject*
 _chop_subtract(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
     float scale;
     int offset;
 
     scale = 1.0;
     offset = 0;
 
-    if (!PyArg_ParseTuple(args, "O!|fi", &Imaging_Type, &imagep,
-                          &scale, &offset))
+    if (!PyArg_ParseTuple(args, "O!|fiO&", &Imaging_Type, &imagep,
+                          &scale, &offset, _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopSubtract(self->image, imagep->image,
-                        scale, offset));
+    return _newoutput(out, ImagingChopSubtract(out ? out->image : NULL,
+                                         self->image, imagep->image,
+                                         scale, offset));
 }
 
 static PyObject*
 _chop_and(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopAnd(self->image, imagep->image));
+    return _newoutput(out, ImagingChopAnd(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_or(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopOr(self->image, imagep->image));
+    return _newoutput(out, ImagingChopOr(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_xor(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopXor(self->image, imagep->image));
+    return _newoutput(out, ImagingChopXor(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_add_modulo(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopAddModulo(self->image, imagep->image));
+    return _newoutput(out, ImagingChopAddModulo(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 static PyObject*
 _chop_subtract_modulo(ImagingObject* self, PyObject* args)
 {
     ImagingObject* imagep;
+    ImagingObject* out = NULL;
 
-    if (!PyArg_ParseTuple(args, "O!", &Imaging_Type, &imagep))
+    if (!PyArg_ParseTuple(args, "O!|O&", &Imaging_Type, &imagep,
+                          _getoutput, &out))
         return NULL;
 
-    return PyImagingNew(ImagingChopSubtractModulo(self->image, imagep->image));
+    return _newoutput(out, ImagingChopSubtractModulo(out ? out->image : NULL,
+                                         self->image, imagep->image));
 }
 
 #endif
@@ -2396,6 +3058,9 @@ _draw_arc(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Offi|i", &data, &start, &end, &ink))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2431,6 +3096,9 @@ _draw_bitmap(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "OO!i", &data, &Imaging_Type, &bitmap, &ink))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2468,6 +3136,9 @@ _draw_chord(ImagingDrawObject* self, PyObject* args)
                           &data, &start, &end, &ink, &fill))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2503,6 +3174,9 @@ _draw_ellipse(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Oi|i", &data, &ink, &fill))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2534,6 +3208,9 @@ _draw_line(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "(ii)(ii)i", &x0, &y0, &x1, &y1, &ink))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     if (ImagingDrawLine(self->image->image, x0, y0, x1, y1,
                         &ink, self->blend) < 0)
         return NULL;
@@ -2554,6 +3231,9 @@ _draw_lines(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Oi|i", &data, &ink, &width))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2603,6 +3283,9 @@ _draw_point(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "(ii)i", &x, &y, &ink))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     if (ImagingDrawPoint(self->image->image, x, y, &ink, self->blend) < 0)
         return NULL;
 
@@ -2621,6 +3304,9 @@ _draw_points(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Oi", &data, &ink))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2656,6 +3342,9 @@ _draw_outline(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Oi|i", &outline_, &ink, &fill))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     outline = PyOutline_AsOutline(outline_);
     if (!outline) {
         PyErr_SetString(PyExc_TypeError, "expected outline object");
@@ -2684,6 +3373,9 @@ _draw_pieslice(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Offii", &data, &start, &end, &ink, &fill))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2720,6 +3412,9 @@ _draw_polygon(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Oi|i", &data, &ink, &fill))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2764,6 +3459,9 @@ _draw_rectangle(ImagingDrawObject* self, PyObject* args)
     if (!PyArg_ParseTuple(args, "Oi|i", &data, &ink, &fill))
         return NULL;
 
+    if (_unshare(self->image) < 0)
+        return NULL;
+
     n = PyPath_Flatten(data, &xy);
     if (n < 0)
         return NULL;
@@ -2854,7 +3552,7 @@ pixel_access_getitem(PixelAccessObject *self, PyObject *xy)
 static int
 pixel_access_setitem(PixelAccessObject *self, PyObject *xy, PyObject *color)
 {
-    Imaging im = self->image->image;
+    Imaging im;
     char ink[4];
     int x, y;
 
@@ -2863,6 +3561,11 @@ pixel_access_setitem(PixelAccessObject *self, PyObject *xy, PyObject *color)
         return -1;
     }
 
+    if (_unshare(self->image) < 0)
+        return -1;
+
+    im = self->image->image;
+
     if (_getxy(xy, &x, &y))
         return -1;
 
@@ -3053,6 +3756,9 @@ static struct PyMethodDef methods[] = {
     {"transform2", (PyCFunction)_transform2, 1},
 
     {"isblock", (PyCFunction)_isblock, 1},
+    {"rowbuffer", (PyCFunction)_rowbuffer, 1},
+    {"readrows", (PyCFunction)_readrows, 1},
+    {"ring", (PyCFunction)_ring, 1},
 
     {"getbbox", (PyCFunction)_getbbox, 1},
     {"getcolors", (PyCFunction)_getcolors, 1},
@@ -3133,15 +3839,26 @@ _getattr_bands(ImagingObject* self, void* closure)
     return PyInt_FromLong(self->image->bands);
 }
 
+static PyObject*
+_getattr_nbytes(ImagingObject* self, void* closure)
+{
+    return PyInt_FromSsize_t((Py_ssize_t) self->image->ysize *
+                             self->image->linesize);
+}
+
 static PyObject*
 _getattr_id(ImagingObject* self, void* closure)
 {
+    if (_pin(self) < 0)
+        return NULL;
     return PyInt_FromSsize_t((Py_ssize_t) self->image);
 }
 
 static PyObject*
 _getattr_ptr(ImagingObject* self, void* closure)
 {
+    if (_pin(self) < 0)
+        return NULL;
 #if PY_VERSION_HEX >= 0x02070000
     return PyCapsule_New(self->image, IMAGING_MAGIC, NULL);
 #else
@@ -3152,7 +3869,9 @@ _getattr_ptr(ImagingObject* self, void* closure)
 static PyObject*
 _getattr_unsafe_ptrs(ImagingObject* self, void* closure)
 {
-    return Py_BuildValue("(ss)(si)(si)(si)(si)(si)(sn)(sn)(sn)(sn)(sn)(si)(si)(sn)",
+    if (_pin(self) < 0)
+        return NULL;
+    return Py_BuildValue("(ss)(si)(si)(si)(si)(si)(sn)(sn)(sn)(sn)(sn)(si)(si)(si)(sn)",
                          "mode", self->image->mode,
                          "type", self->image->type,
                          "depth", self->image->depth,
@@ -3166,6 +3885,7 @@ _getattr_unsafe_ptrs(ImagingObject* self, void* closure)
                          "block", self->image->block,
                          "pixelsize", self->image->pixelsize,
                          "linesize", self->image->linesize,
+                         "stride", self->image->stride,
                          "destroy", self->image->destroy
                         );
 };
@@ -3175,6 +3895,7 @@ static struct PyGetSetDef getsetters[] = {
     { "mode",   (getter) _getattr_mode },
     { "size",   (getter) _getattr_size },
     { "bands",  (getter) _getattr_bands },
+    { "nbytes", (getter) _getattr_nbytes },
     { "id",     (getter) _getattr_id },
     { "ptr",    (getter) _getattr_ptr },
     { "unsafe_ptrs", (getter) _getattr_unsafe_ptrs },
@@ -3217,6 +3938,182 @@ static PySequenceMethods image_as_sequence = {
 };
 
 
+/* buffer interface */
+
+static struct {
+    const char* mode;
+    const char* format;
+    int itemsize;
+    int bands;
+    int bandstride;
+} buffer_formats[] = {
+    /* mode     format  itemsize  bands  band stride */
+    {"1",       "B",    1,        1,     0},
+    {"L",       "B",    1,        1,     0},
+    {"P",       "B",    1,        1,     0},
+    {"I",       "i",    4,        1,     0},
+    {"F",       "f",    4,        1,     0},
+    {"I;16",    "<H",   2,        1,     0},
+    {"I;16L",   "<H",   2,        1,     0},
+    {"I;16B",   ">H",   2,        1,     0},
+    {"I;16N",   "H",    2,        1,     0},
+    {"LA",      "B",    1,        2,     3},
+    {"PA",      "B",    1,        2,     3},
+    {"RGB",     "B",    1,        3,     1},
+    {"YCbCr",   "B",    1,        3,     1},
+    {"LAB",     "B",    1,        3,     1},
+    {"HSV",     "B",    1,        3,     1},
+    {"RGBA",    "B",    1,        4,     1},
+    {"RGBa",    "B",    1,        4,     1},
+    {"RGBX",    "B",    1,        4,     1},
+    {"CMYK",    "B",    1,        4,     1},
+    {NULL}
+};
+
+static int
+image_getbuffer(ImagingObject* self, Py_buffer* view, int flags)
+{
+    /* export the pixel memory of block images.  without PyBUF_ND,
+       the consumer gets the raw block (including padding bytes);
+       otherwise, the buffer is shaped (ysize, xsize[, bands]) */
+
+    Imaging im = self->image;
+    Py_ssize_t* layout = self->layout;
+    int i, contiguous;
+
+    view->obj = NULL;
+
+    for (i = 0; buffer_formats[i].mode; i++)
+        if (!strcmp(im->mode, buffer_formats[i].mode))
+            break;
+    if (!buffer_formats[i].mode) {
+        PyErr_SetString(PyExc_BufferError, wrong_mode);
+        return -1;
+    }
+
+    /* exported memory may be modified at any time, so it can't be
+       shared with other images */
+    if (_unshare(self) < 0)
+        return -1;
+    im = self->image;
+
+    if (!im->block) {
+        PyErr_SetString(PyExc_BufferError,
+                        "image is not stored in a single block");
+        return -1;
+    }
+
+    if (im->read_only && (flags & PyBUF_WRITABLE) == PyBUF_WRITABLE) {
+        PyErr_SetString(PyExc_BufferError, "image is read-only");
+        return -1;
+    }
+
+    im->pinned = 1;
+
+    view->buf = im->block;
+    view->readonly = im->read_only;
+    view->suboffsets = NULL;
+    view->internal = NULL;
+
+    if ((flags & PyBUF_ND) != PyBUF_ND) {
+        view->len = (Py_ssize_t) im->stride * im->ysize;
+        view->itemsize = 1;
+        view->format = (flags & PyBUF_FORMAT) ? "B" : NULL;
+        view->ndim = 1;
+        view->shape = NULL;
+        view->strides = NULL;
+    } else {
+        if (buffer_formats[i].bands == 1)
+            contiguous = (im->stride ==
+                          im->xsize * buffer_formats[i].itemsize);
+        else
+            contiguous = (buffer_formats[i].bands == im->pixelsize &&
+                          im->stride == im->linesize);
+        if (!contiguous && (flags & PyBUF_STRIDES) != PyBUF_STRIDES) {
+            PyErr_SetString(PyExc_BufferError, "image is not contiguous");
+            return -1;
+        }
+        if ((flags & PyBUF_F_CONTIGUOUS) == PyBUF_F_CONTIGUOUS ||
+            (!contiguous &&
+             ((flags & PyBUF_C_CONTIGUOUS) == PyBUF_C_CONTIGUOUS ||
+              (flags & PyBUF_ANY_CONTIGUOUS) == PyBUF_ANY_CONTIGUOUS))) {
+            PyErr_SetString(PyExc_BufferError, "image is not contiguous");
+            return -1;
+        }
+
+        /* the image is pinned, so its layout is the same for all
+           exports */
+        layout[0] = im->ysize;
+        layout[1] = im->xsize;
+        layout[2] = buffer_formats[i].bands;
+        layout[3] = im->stride;
+        layout[4] = im->pixelsize;
+        layout[5] = buffer_formats[i].bandstride;
+
+        view->itemsize = buffer_formats[i].itemsize;
+        view->format = (flags & PyBUF_FORMAT) ?
+            (char*) buffer_formats[i].format : NULL;
+        view->ndim = (buffer_formats[i].bands == 1) ? 2 : 3;
+        view->shape = layout;
+        view->strides = ((flags & PyBUF_STRIDES) == PyBUF_STRIDES) ?
+            layout + 3 : NULL;
+        view->len = (Py_ssize_t) im->ysize * im->xsize *
+            buffer_formats[i].bands * buffer_formats[i].itemsize;
+    }
+
+    Py_INCREF(self);
+    view->obj = (PyObject*) self;
+
+    return 0;
+}
+
+/* raw row buffer: a flat view of consecutive rows, padding included */
+
+static void
+rowbuffer_dealloc(RowBufferObject* self)
+{
+    Py_XDECREF(self->image);
+    if (self->memory)
+        ImagingDelete(self->memory);
+    PyObject_Del(self);
+}
+
+static int
+rowbuffer_getbuffer(RowBufferObject* self, Py_buffer* view, int flags)
+{
+    return PyBuffer_FillInfo(view, (PyObject*) self, self->buf, self->len,
+                             self->readonly, flags);
+}
+
+static PyBufferProcs rowbuffer_as_buffer = {
+#if PY_VERSION_HEX < 0x03000000
+    (readbufferproc) NULL, /*bf_getreadbuffer*/
+    (writebufferproc) NULL, /*bf_getwritebuffer*/
+    (segcountproc) NULL, /*bf_getsegcount*/
+    (charbufferproc) NULL, /*bf_getcharbuffer*/
+#endif
+    (getbufferproc) rowbuffer_getbuffer, /*bf_getbuffer*/
+    (releasebufferproc) NULL, /*bf_releasebuffer*/
+};
+
+static PyBufferProcs image_as_buffer = {
+#if PY_VERSION_HEX < 0x03000000
+    (readbufferproc) NULL, /*bf_getreadbuffer*/
+    (writebufferproc) NULL, /*bf_getwritebuffer*/
+    (segcountproc) NULL, /*bf_getsegcount*/
+    (charbufferproc) NULL, /*bf_getcharbuffer*/
+#endif
+    (getbufferproc) image_getbuffer, /*bf_getbuffer*/
+    (releasebufferproc) NULL, /*bf_releasebuffer*/
+};
+
+#if PY_VERSION_HEX < 0x03000000
+#define IMAGING_TPFLAGS (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_NEWBUFFER)
+#else
+#define IMAGING_TPFLAGS Py_TPFLAGS_DEFAULT
+#endif
+
+
 /* type description */
 
 static PyTypeObject Imaging_Type = {
@@ -3239,8 +4136,8 @@ static PyTypeObject Imaging_Type = {
     0,                          /*tp_str*/
     0,                          /*tp_getattro*/
     0,                          /*tp_setattro*/
-    0,                          /*tp_as_buffer*/
-    Py_TPFLAGS_DEFAULT,         /*tp_flags*/
+    &image_as_buffer,           /*tp_as_buffer*/
+    IMAGING_TPFLAGS,            /*tp_flags*/
     0,                          /*tp_doc*/
     0,                          /*tp_traverse*/
     0,                          /*tp_clear*/
@@ -3349,6 +4246,28 @@ static PyTypeObject PixelAccess_Type = {
     0 /*tp_hash*/
 };
 
+static PyTypeObject RowBuffer_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "RowBuffer", sizeof(RowBufferObject), 0,
+    /* methods */
+    (destructor)rowbuffer_dealloc, /*tp_dealloc*/
+    0, /*tp_print*/
+    0, /*tp_getattr*/
+    0, /*tp_setattr*/
+    0, /*tp_compare*/
+    0, /*tp_repr*/
+    0, /*tp_as_number */
+    0, /*tp_as_sequence */
+    0, /*tp_as_mapping */
+    0, /*tp_hash*/
+    0, /*tp_call*/
+    0, /*tp_str*/
+    0, /*tp_getattro*/
+    0, /*tp_setattro*/
+    &rowbuffer_as_buffer, /*tp_as_buffer*/
+    IMAGING_TPFLAGS, /*tp_flags*/
+};
+
 /* -------------------------------------------------------------------- */
 
 /* FIXME: this is something of a mess.  Should replace this with
@@ -3404,6 +4323,7 @@ extern PyObject* PyOutline_Create(ImagingObject* self, PyObject* args);
 
 extern PyObject* PyImaging_Mapper(PyObject* self, PyObject* args);
 extern PyObject* PyImaging_MapBuffer(PyObject* self, PyObject* args);
+extern PyObject* PyImaging_MapTiles(PyObject* self, PyObject* args);
 
 static PyMethodDef functions[] = {
 
@@ -3415,6 +4335,18 @@ static PyMethodDef functions[] = {
 
     {"getcount", (PyCFunction)_getcount, 1},
 
+    /* Memory management */
+    {"get_pool_limit", (PyCFunction)_get_pool_limit, 1},
+    {"set_pool_limit", (PyCFunction)_set_pool_limit, 1},
+    {"get_pool_usage", (PyCFunction)_get_pool_usage, 1},
+    {"clear_pool", (PyCFunction)_clear_pool, 1},
+    {"get_stats", (PyCFunction)_get_stats, 1},
+    {"reset_stats", (PyCFunction)_reset_stats, 1},
+    {"get_memory_budget", (PyCFunction)_get_memory_budget, 1},
+    {"set_memory_budget", (PyCFunction)_set_memory_budget, 1},
+    {"get_aligned_storage", (PyCFunction)_get_aligned_storage, 1},
+    {"set_aligned_storage", (PyCFunction)_set_aligned_storage, 1},
+
     /* Functions */
     {"convert", (PyCFunction)_convert2, 1},
     {"copy", (PyCFunction)_copy2, 1},
@@ -3462,6 +4394,7 @@ static PyMethodDef functions[] = {
     {"map", (PyCFunction)PyImaging_Mapper, 1},
 #endif
     {"map_buffer", (PyCFunction)PyImaging_MapBuffer, 1},
+    {"map_tiles", (PyCFunction)PyImaging_MapTiles, 1},
 #endif
 
     /* Display support */
@@ -3526,11 +4459,20 @@ setup_module(PyObject* m) {
     if (PyType_Ready(&ImagingDraw_Type) < 0)
         return -1;
 #endif
+    if (PyType_Ready(&RowBuffer_Type) < 0)
+        return -1;
+
     if (PyType_Ready(&PixelAccess_Type) < 0)
         return -1;
 
     ImagingAccessInit();
 
+    MemoryBudgetError = PyErr_NewException("PIL.Image.MemoryBudgetError",
+                                           PyExc_MemoryError, NULL);
+    if (!MemoryBudgetError)
+        return -1;
+    PyDict_SetItemString(d, "MemoryBudgetError", MemoryBudgetError);
+
 #ifdef HAVE_LIBJPEG
   {
     extern const char* ImagingJpegVersion(void);
@@ -53,6 +53,8 @@ typedef struct {
     Imaging im;
     PyObject* lock;
     int     handles_eof;
+    int     handles_region;
+    int     handles_row_limit;
 } ImagingDecoderObject;
 
 static PyTypeObject ImagingDecoderType;
@@ -96,6 +98,8 @@ PyImaging_DecoderNew(int contextsize)
 
     /* Most decoders don't want to handle EOF themselves */
     decoder->handles_eof = 0;
+    decoder->handles_region = 0;
+    decoder->handles_row_limit = 0;
 
     return decoder;
 }
@@ -114,19 +118,30 @@ _dealloc(ImagingDecoderObject* decoder)
 static PyObject*
 _decode(ImagingDecoderObject* decoder, PyObject* args)
 {
-    UINT8* buffer;
-    int bufsize, status;
+    Py_buffer buffer;
+    int status;
     ImagingSectionCookie cookie;
 
-    if (!PyArg_ParseTuple(args, PY_ARG_BYTES_LENGTH, &buffer, &bufsize))
+    /* accept any object with a buffer interface, such as a bytearray
+       or a memoryview of one, so callers can reuse their buffers */
+    if (!PyArg_ParseTuple(args, PY_ARG_BUFFER, &buffer))
         return NULL;
 
+    if (buffer.len > INT_MAX) {
+        PyBuffer_Release(&buffer);
+        PyErr_SetString(PyExc_OverflowError, "buffer is too large");
+        return NULL;
+    }
+
     ImagingSectionEnter(&cookie);
 
-    status = decoder->decode(decoder->im, &decoder->state, buffer, bufsize);
+    status = decoder->decode(decoder->im, &decoder->state,
+                             (UINT8*) buffer.buf, (int) buffer.len);
 
     ImagingSectionLeave(&cookie);
 
+    PyBuffer_Release(&buffer);
+
     return Py_BuildValue("ii", status, decoder->state.errcode);
 }
 
@@ -144,7 +159,7 @@ _decode_cleanup(ImagingDecoderObject* decoder, PyObject* args)
 
 
 
-extern Imaging PyImaging_AsImaging(PyObject *op);
+extern Imaging PyImaging_AsWritableImaging(PyObject *op);
 
 static PyObject*
 _setimage(ImagingDecoderObject* decoder, PyObject* args)
@@ -159,7 +174,7 @@ _setimage(ImagingDecoderObject* decoder, PyObject* args)
     /* FIXME: should publish the ImagingType descriptor */
     if (!PyArg_ParseTuple(args, "O|(iiii)", &op, &x0, &y0, &x1, &y1))
         return NULL;
-    im = PyImaging_AsImaging(op);
+    im = PyImaging_AsWritableImaging(op);
     if (!im)
         return NULL;
 
@@ -178,10 +193,24 @@ _setimage(ImagingDecoderObject* decoder, PyObject* args)
         state->ysize = y1 - y0;
     }
 
-    if (state->xsize <= 0 ||
-        state->xsize + state->xoff > (int) im->xsize ||
-        state->ysize <= 0 ||
-        state->ysize + state->yoff > (int) im->ysize) {
+    if (state->xsize <= 0 || state->ysize <= 0) {
+        PyErr_SetString(PyExc_ValueError, "tile cannot extend outside image");
+        return NULL;
+    }
+
+    if (decoder->handles_region) {
+        /* the decoder skips the parts of the tile outside the image */
+        if (state->xoff >= (int) im->xsize ||
+            state->xsize + state->xoff <= 0 ||
+            state->yoff >= (int) im->ysize ||
+            state->ysize + state->yoff <= 0) {
+            PyErr_SetString(PyExc_ValueError, "tile is outside image");
+            return NULL;
+        }
+    } else if (state->xoff < 0 ||
+               state->xsize + state->xoff > (int) im->xsize ||
+               state->yoff < 0 ||
+               state->ysize + state->yoff > (int) im->ysize) {
         PyErr_SetString(PyExc_ValueError, "tile cannot extend outside image");
         return NULL;
     }
@@ -211,6 +240,81 @@ _get_handles_eof(ImagingDecoderObject *decoder)
     return PyBool_FromLong(decoder->handles_eof);
 }
 
+static PyObject *
+_get_handles_region(ImagingDecoderObject *decoder)
+{
+    return PyBool_FromLong(decoder->handles_region);
+}
+
+static PyObject *
+_get_handles_row_limit(ImagingDecoderObject *decoder)
+{
+    return PyBool_FromLong(decoder->handles_row_limit);
+}
+
+static PyObject *
+_get_row(ImagingDecoderObject *decoder)
+{
+    return PyInt_FromLong(decoder->state.y);
+}
+
+static PyObject *
+_get_row_limit(ImagingDecoderObject *decoder)
+{
+    return PyInt_FromLong(decoder->state.ylimit);
+}
+
+static int
+_set_row_limit(ImagingDecoderObject *decoder, PyObject *value)
+{
+    /* the decoder returns once it has decoded the rows above the limit,
+       and continues when called again with a higher limit */
+    long ylimit;
+
+    if (!value) {
+        PyErr_SetString(PyExc_TypeError, "cannot delete row_limit");
+        return -1;
+    }
+    ylimit = PyInt_AsLong(value);
+    if (ylimit == -1 && PyErr_Occurred())
+        return -1;
+    if (!decoder->handles_row_limit) {
+        PyErr_SetString(PyExc_ValueError,
+                        "decoder does not support row limits");
+        return -1;
+    }
+    if (ylimit < 0 || ylimit > INT_MAX) {
+        PyErr_SetString(PyExc_ValueError, "row limit out of range");
+        return -1;
+    }
+    decoder->state.ylimit = (int) ylimit;
+    return 0;
+}
+
+static PyObject *
+_get_complete_data(ImagingDecoderObject *decoder)
+{
+    return PyBool_FromLong(decoder->state.complete);
+}
+
+static int
+_set_complete_data(ImagingDecoderObject *decoder, PyObject *value)
+{
+    /* promise that each call to decode gets all the data up to the end
+       of the file, so that the decoder never needs to wait for more */
+    int complete;
+
+    if (!value) {
+        PyErr_SetString(PyExc_TypeError, "cannot delete complete_data");
+        return -1;
+    }
+    complete = PyObject_IsTrue(value);
+    if (complete < 0)
+        return -1;
+    decoder->state.complete = complete;
+    return 0;
+}
+
 static struct PyMethodDef methods[] = {
     {"decode", (PyCFunction)_decode, 1},
     {"cleanup", (PyCFunction)_decode_cleanup, 1},
@@ -222,6 +326,22 @@ static struct PyGetSetDef getseters[] = {
     {"handles_eof", (getter)_get_handles_eof, NULL,
      "True if this decoder expects to handle EOF itself.",
      NULL},
+    {"handles_region", (getter)_get_handles_region, NULL,
+     "True if this decoder accepts tiles extending outside the image.",
+     NULL},
+    {"handles_row_limit", (getter)_get_handles_row_limit, NULL,
+     "True if this decoder can pause at a row limit.",
+     NULL},
+    {"row", (getter)_get_row, NULL,
+     "The row of the tile being decoded.",
+     NULL},
+    {"row_limit", (getter)_get_row_limit, (setter)_set_row_limit,
+     "If not zero, the decoder pauses once it reaches this row.",
+     NULL},
+    {"complete_data", (getter)_get_complete_data,
+     (setter)_set_complete_data,
+     "True if each call to decode gets all the remaining data.",
+     NULL},
     {NULL, NULL, NULL, NULL, NULL} /* sentinel */
 };
 
@@ -425,6 +545,7 @@ PyImaging_TiffLzwDecoderNew(PyObject* self, PyObject* args)
         return NULL;
 
     decoder->decode = ImagingLzwDecode;
+    decoder->handles_row_limit = 1;
 
     ((LZWSTATE*)decoder->state.context)->filter = filter;
 
@@ -520,6 +641,7 @@ PyImaging_PackbitsDecoderNew(PyObject* self, PyObject* args)
         return NULL;
 
     decoder->decode = ImagingPackbitsDecode;
+    decoder->handles_row_limit = 1;
 
     return (PyObject*) decoder;
 }
@@ -602,6 +724,8 @@ PyImaging_RawDecoderNew(PyObject* self, PyObject* args)
         return NULL;
 
     decoder->decode = ImagingRawDecode;
+    /* bottom-up images cannot be streamed from the top */
+    decoder->handles_row_limit = (ystep >= 0);
 
     decoder->state.ystep = ystep;
 
@@ -719,6 +843,8 @@ PyImaging_ZipDecoderNew(PyObject* self, PyObject* args)
         return NULL;
 
     decoder->decode = ImagingZipDecode;
+    /* interlaced images are decoded in several passes */
+    decoder->handles_row_limit = !interlaced;
 
     ((ZIPSTATE*)decoder->state.context)->interlaced = interlaced;
 
@@ -772,7 +898,9 @@ PyImaging_JpegDecoderNew(PyObject* self, PyObject* args)
     if (get_unpacker(decoder, mode, rawmode) < 0)
         return NULL;
 
+    decoder->handles_region = 1;
     decoder->decode = ImagingJpegDecode;
+    decoder->handles_row_limit = 1;
     decoder->cleanup = ImagingJpegDecodeCleanup;
 
     strncpy(((JPEGSTATE*)decoder->state.context)->rawmode, rawmode, 8);
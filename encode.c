@@ -44,6 +44,7 @@ typedef struct {
     struct ImagingCodecStateInstance state;
     Imaging im;
     PyObject* lock;
+    int handles_row_limit;
 } ImagingEncoderObject;
 
 static PyTypeObject ImagingEncoderType;
@@ -85,6 +86,9 @@ PyImaging_EncoderNew(int contextsize)
     encoder->lock = NULL;
     encoder->im = NULL;
 
+    /* Most encoders need the whole image */
+    encoder->handles_row_limit = 0;
+
     return encoder;
 }
 
@@ -249,6 +253,51 @@ _setimage(ImagingEncoderObject* encoder, PyObject* args)
     return Py_None;
 }
 
+static PyObject *
+_get_handles_row_limit(ImagingEncoderObject *encoder)
+{
+    return PyBool_FromLong(encoder->handles_row_limit);
+}
+
+static PyObject *
+_get_row(ImagingEncoderObject *encoder)
+{
+    return PyInt_FromLong(encoder->state.y);
+}
+
+static PyObject *
+_get_row_limit(ImagingEncoderObject *encoder)
+{
+    return PyInt_FromLong(encoder->state.ylimit);
+}
+
+static int
+_set_row_limit(ImagingEncoderObject *encoder, PyObject *value)
+{
+    /* the encoder returns once it has encoded the rows above the limit,
+       and continues when called again with a higher limit */
+    long ylimit;
+
+    if (!value) {
+        PyErr_SetString(PyExc_TypeError, "cannot delete row_limit");
+        return -1;
+    }
+    ylimit = PyInt_AsLong(value);
+    if (ylimit == -1 && PyErr_Occurred())
+        return -1;
+    if (!encoder->handles_row_limit) {
+        PyErr_SetString(PyExc_ValueError,
+                        "encoder does not support row limits");
+        return -1;
+    }
+    if (ylimit < 0 || ylimit > INT_MAX) {
+        PyErr_SetString(PyExc_ValueError, "row limit out of range");
+        return -1;
+    }
+    encoder->state.ylimit = (int) ylimit;
+    return 0;
+}
+
 static struct PyMethodDef methods[] = {
     {"encode", (PyCFunction)_encode, 1},
     {"cleanup", (PyCFunction)_encode_cleanup, 1},
@@ -257,6 +306,19 @@ static struct PyMethodDef methods[] = {
     {NULL, NULL} /* sentinel */
 };
 
+static struct PyGetSetDef getseters[] = {
+    {"handles_row_limit", (getter)_get_handles_row_limit, NULL,
+     "True if this encoder can pause at a row limit.",
+     NULL},
+    {"row", (getter)_get_row, NULL,
+     "The row of the tile being encoded.",
+     NULL},
+    {"row_limit", (getter)_get_row_limit, (setter)_set_row_limit,
+     "If not zero, the encoder pauses once it reaches this row.",
+     NULL},
+    {NULL, NULL, NULL, NULL, NULL} /* sentinel */
+};
+
 static PyTypeObject ImagingEncoderType = {
     PyVarObject_HEAD_INIT(NULL, 0)
     "ImagingEncoder",               /*tp_name*/
@@ -288,7 +350,7 @@ static PyTypeObject ImagingEncoderType = {
     0,                          /*tp_iternext*/
     methods,                    /*tp_methods*/
     0,                          /*tp_members*/
-    0,                          /*tp_getset*/
+    getseters,                  /*tp_getset*/
 };
 
 /* -------------------------------------------------------------------- */
@@ -422,6 +484,8 @@ PyImaging_RawEncoderNew(PyObject* self, PyObject* args)
         return NULL;
 
     encoder->encode = ImagingRawEncode;
+    /* bottom-up images cannot be written from the top */
+    encoder->handles_row_limit = (ystep >= 0);
 
     encoder->state.ystep = ystep;
     encoder->state.count = stride;
@@ -498,6 +562,7 @@ PyImaging_ZipEncoderNew(PyObject* self, PyObject* args)
         return NULL;
 
     encoder->encode = ImagingZipEncode;
+    encoder->handles_row_limit = 1;
 
     if (rawmode[0] == 'P')
         /* disable filtering */
@@ -652,6 +717,7 @@ PyImaging_JpegEncoderNew(PyObject* self, PyObject* args)
         rawExif = NULL;
 
     encoder->encode = ImagingJpegEncode;
+    encoder->handles_row_limit = 1;
 
     ((JPEGENCODERSTATE*)encoder->state.context)->quality = quality;
     ((JPEGENCODERSTATE*)encoder->state.context)->qtables = qarrays;
@@ -807,6 +873,7 @@ PyImaging_LibTiffEncoderNew(PyObject* self, PyObject* args)
     }
 
     encoder->encode  = ImagingLibTiffEncode;
+    encoder->handles_row_limit = 1;
 
     return (PyObject*) encoder;
 }
@@ -21,8 +21,7 @@
 
 #define	CHOP(operation, mode)\
     int x, y;\
-    Imaging imOut;\
-    imOut = create(imIn1, imIn2, mode);\
+    imOut = create(imOut, imIn1, imIn2, mode);\
     if (!imOut)\
 	return NULL;\
     for (y = 0; y < imOut->ysize; y++) {\
@@ -43,8 +42,7 @@
 
 #define	CHOP2(operation, mode)\
     int x, y;\
-    Imaging imOut;\
-    imOut = create(imIn1, imIn2, mode);\
+    imOut = create(imOut, imIn1, imIn2, mode);\
     if (!imOut)\
 	return NULL;\
     for (y = 0; y < imOut->ysize; y++) {\
@@ -58,7 +56,7 @@
     return imOut;
 
 static Imaging
-create(Imaging im1, Imaging im2, char* mode)
+create(Imaging imOut, Imaging im1, Imaging im2, char* mode)
 {
     int xsize, ysize;
 
@@ -72,77 +70,87 @@ create(Imaging im1, Imaging im2, char* mode)
     xsize = (im1->xsize < im2->xsize) ? im1->xsize : im2->xsize;
     ysize = (im1->ysize < im2->ysize) ? im1->ysize : im2->ysize;
 
+    if (imOut) {
+        /* make sure the output image matches */
+        if (strcmp(imOut->mode, im1->mode) != 0 ||
+            imOut->xsize != xsize || imOut->ysize != ysize)
+            return (Imaging) ImagingError_Mismatch();
+        return imOut;
+    }
+
     return ImagingNew(im1->mode, xsize, ysize);
 }
 
 Imaging
-ImagingChopLighter(Imaging imIn1, Imaging imIn2)
+ImagingChopLighter(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP((in1[x] > in2[x]) ? in1[x] : in2[x], NULL);
 }
 
 Imaging
-ImagingChopDarker(Imaging imIn1, Imaging imIn2)
+ImagingChopDarker(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP((in1[x] < in2[x]) ? in1[x] : in2[x], NULL);
 }
 
 Imaging
-ImagingChopDifference(Imaging imIn1, Imaging imIn2)
+ImagingChopDifference(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP(abs((int) in1[x] - (int) in2[x]), NULL);
 }
 
 Imaging
-ImagingChopMultiply(Imaging imIn1, Imaging imIn2)
+ImagingChopMultiply(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP((int) in1[x] * (int) in2[x] / 255, NULL);
 }
 
 Imaging
-ImagingChopScreen(Imaging imIn1, Imaging imIn2)
+ImagingChopScreen(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP(255 - ((int) (255 - in1[x]) * (int) (255 - in2[x])) / 255, NULL);
 }
 
 Imaging
-ImagingChopAdd(Imaging imIn1, Imaging imIn2, float scale, int offset)
+ImagingChopAdd(Imaging imOut, Imaging imIn1, Imaging imIn2,
+               float scale, int offset)
 {
     CHOP(((int) in1[x] + (int) in2[x]) / scale + offset, NULL);
 }
 
 Imaging
-ImagingChopSubtract(Imaging imIn1, Imaging imIn2, float scale, int offset)
+ImagingChopSubtract(Imaging imOut, Imaging imIn1, Imaging imIn2,
+                    float scale, int offset)
 {
     CHOP(((int) in1[x] - (int) in2[x]) / scale + offset, NULL);
 }
 
 Imaging
-ImagingChopAnd(Imaging imIn1, Imaging imIn2)
+ImagingChopAnd(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP2((in1[x] && in2[x]) ? 255 : 0, "1");
 }
 
 Imaging
-ImagingChopOr(Imaging imIn1, Imaging imIn2)
+ImagingChopOr(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP2((in1[x] || in2[x]) ? 255 : 0, "1");
 }
 
 Imaging
-ImagingChopXor(Imaging imIn1, Imaging imIn2)
+ImagingChopXor(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP2(((in1[x] != 0) ^ (in2[x] != 0)) ? 255 : 0, "1");
 }
 
 Imaging
-ImagingChopAddModulo(Imaging imIn1, Imaging imIn2)
+ImagingChopAddModulo(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP2(in1[x] + in2[x], NULL);
 }
 
 Imaging
-ImagingChopSubtractModulo(Imaging imIn1, Imaging imIn2)
+ImagingChopSubtractModulo(Imaging imOut, Imaging imIn1, Imaging imIn2)
 {
     CHOP2(in1[x] - in2[x], NULL);
 }
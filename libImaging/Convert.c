@@ -1007,6 +1007,7 @@ topalette(Imaging imOut, Imaging imIn, ImagingPalette inpalette, int dither)
     ImagingSectionCookie cookie;
     int x, y;
     ImagingPalette palette = inpalette;;
+    Imaging imTarget = imOut;
 
     /* Map L or RGB/RGBX/RGBA to palette image */
     if (strcmp(imIn->mode, "L") != 0 && strncmp(imIn->mode, "RGB", 3) != 0)
@@ -1047,7 +1048,8 @@ topalette(Imaging imOut, Imaging imIn, ImagingPalette inpalette, int dither)
 
         /* Create mapping cache */
         if (ImagingPaletteCachePrepare(palette) < 0) {
-            ImagingDelete(imOut);
+            if (!imTarget)
+                ImagingDelete(imOut);
             if (palette != inpalette)
               ImagingPaletteDelete(palette);
             return NULL;
@@ -1059,7 +1061,8 @@ topalette(Imaging imOut, Imaging imIn, ImagingPalette inpalette, int dither)
             int* errors;
             errors = calloc(imIn->xsize + 1, sizeof(int) * 3);
             if (!errors) {
-                ImagingDelete(imOut);
+                if (!imTarget)
+                    ImagingDelete(imOut);
                 return ImagingError_MemoryError();
             }
 
@@ -1154,6 +1157,7 @@ static Imaging
 tobilevel(Imaging imOut, Imaging imIn, int dither)
 {
     ImagingSectionCookie cookie;
+    Imaging imTarget = imOut;
     int x, y;
     int* errors;
 
@@ -1167,7 +1171,8 @@ tobilevel(Imaging imOut, Imaging imIn, int dither)
 
     errors = calloc(imIn->xsize + 1, sizeof(int));
     if (!errors) {
-        ImagingDelete(imOut);
+        if (!imTarget)
+            ImagingDelete(imOut);
         return ImagingError_MemoryError();
     }
 
@@ -1320,6 +1325,13 @@ ImagingConvert2(Imaging imOut, Imaging imIn)
     return convert(imOut, imIn, imOut->mode, NULL, 0);
 }
 
+Imaging
+ImagingConvertInto(Imaging imOut, Imaging imIn,
+                   ImagingPalette palette, int dither)
+{
+    return convert(imOut, imIn, imOut->mode, palette, dither);
+}
+
 
 Imaging
 ImagingConvertTransparent(Imaging imIn, const char *mode,
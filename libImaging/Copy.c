@@ -35,8 +35,10 @@ _copy(Imaging imOut, Imaging imIn)
     ImagingCopyInfo(imOut, imIn);
 
     ImagingSectionEnter(&cookie);
-    if (imIn->block != NULL && imOut->block != NULL)
-	memcpy(imOut->block, imIn->block, imIn->ysize * imIn->linesize);
+    if (imIn->block != NULL && imOut->block != NULL &&
+        imIn->stride == imOut->stride)
+	memcpy(imOut->block, imIn->block,
+               (Py_ssize_t) imIn->ysize * imIn->stride);
     else
         for (y = 0; y < imIn->ysize; y++)
             memcpy(imOut->image[y], imIn->image[y], imIn->linesize);
@@ -39,6 +39,13 @@ ImagingError_MemoryError(void)
     return NULL;
 }
 
+void *
+ImagingError_MemoryBudget(void)
+{
+    fprintf(stderr, "*** exception: memory budget exceeded\n");
+    return NULL;
+}
+
 void *
 ImagingError_ModeError(void)
 {
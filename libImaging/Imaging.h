@@ -98,6 +98,11 @@ struct ImagingMemoryInstance {
 
     int pixelsize;	/* Size of a pixel, in bytes (1, 2 or 4) */
     int linesize;	/* Size of a line, in bytes (xsize * pixelsize) */
+    int stride;		/* Size of a line including padding, in bytes */
+    int read_only;	/* Set if the raster data must not be modified */
+    int pinned;		/* Set if the raster data must not be shared */
+    int refcount;	/* Number of references (from views) */
+    Py_ssize_t allocated; /* Size of raster data allocated for this image */
 
     /* Virtual methods */
     void (*destroy)(Imaging im);
@@ -164,6 +169,7 @@ extern void    ImagingDelete(Imaging im);
 
 extern Imaging ImagingNewBlock(const char* mode, int xsize, int ysize);
 extern Imaging ImagingNewArray(const char* mode, int xsize, int ysize);
+extern Imaging ImagingNewArena(const char* mode, int xsize, int ysize);
 extern Imaging ImagingNewMap(const char* filename, int readonly,
                              const char* mode, int xsize, int ysize);
 
@@ -174,6 +180,80 @@ extern Imaging ImagingNewPrologueSubtype(const char *mode,
                                   int structure_size);
 extern Imaging ImagingNewEpilogue(Imaging im);
 
+/* If set, ImagingNewBlock, ImagingNewArray and ImagingNewArena start
+   each line at an IMAGING_ALIGNMENT byte boundary, and pad lines to a multiple of
+   IMAGING_ALIGNMENT bytes.  Rows of a block are stride bytes apart. */
+
+#define IMAGING_ALIGNMENT 64
+
+extern int ImagingAlignedStorage;
+
+/* Views */
+/* ----- */
+
+/* A view shares the raster data of a region of another image.  Views
+   and the images they share memory with must be unshared (replaced by
+   a copy) before they are modified; see ImagingIsShared. */
+
+extern Imaging ImagingNewView(Imaging im, int x0, int y0, int x1, int y1);
+extern int ImagingIsShared(Imaging im);
+
+/* Block pool */
+/* ---------- */
+
+/* Freed image blocks are kept in size bucketed free lists (linked
+   through the first word of each block), and handed out again by
+   ImagingNewBlock, ImagingNewArray and ImagingNewArena.  The pool
+   relies on the GIL. */
+
+#define IMAGING_POOL_BUCKETS 232
+
+typedef struct ImagingMemoryPoolInstance* ImagingMemoryPool;
+
+struct ImagingMemoryPoolInstance {
+    void* buckets[IMAGING_POOL_BUCKETS]; /* Free lists, one per size class */
+    int blocks;             /* Number of cached blocks */
+    Py_ssize_t bytes;       /* Total size of cached blocks */
+    Py_ssize_t bytes_max;   /* Upper limit for bytes (0 disables caching) */
+};
+
+extern struct ImagingMemoryPoolInstance ImagingDefaultPool;
+
+extern void* ImagingPoolAlloc(ImagingMemoryPool pool, Py_ssize_t size);
+extern void ImagingPoolFree(ImagingMemoryPool pool, void* block,
+                            Py_ssize_t size);
+extern void ImagingPoolSetLimit(ImagingMemoryPool pool, Py_ssize_t bytes_max);
+extern void ImagingPoolClear(ImagingMemoryPool pool);
+
+/* Memory accounting */
+/* ----------------- */
+
+/* Raster data allocated by ImagingNewBlock, ImagingNewArray and
+   ImagingNewArena is counted with the size it takes up in the block
+   pool.  Views, and
+   images mapping memory they do not own, allocate nothing.  Like the
+   block pool, this relies on the GIL.
+
+   If bytes_max is set, allocations that would take bytes over it wait
+   up to timeout milliseconds for other threads to release memory, and
+   then fail with ImagingError_MemoryBudget. */
+
+struct ImagingMemoryStatsInstance {
+    int images;             /* Number of live image objects */
+    Py_ssize_t bytes;       /* Raster data held by live images */
+    Py_ssize_t bytes_peak;  /* Highest value of bytes so far */
+    Py_ssize_t allocs;      /* Number of raster data allocations */
+    Py_ssize_t frees;       /* Number of raster data deallocations */
+    Py_ssize_t refusals;    /* Number of allocations refused by the budget */
+    Py_ssize_t bytes_max;   /* Upper limit for bytes (0 for no limit) */
+    int timeout;            /* Time to wait for memory, in milliseconds */
+};
+
+extern struct ImagingMemoryStatsInstance ImagingMemoryStats;
+
+extern void ImagingMemoryStatsReset(void);
+extern void ImagingMemorySetBudget(Py_ssize_t bytes_max, int timeout);
+
 extern void ImagingCopyInfo(Imaging destination, Imaging source);
 
 extern void ImagingHistogramDelete(ImagingHistogram histogram);
@@ -213,6 +293,7 @@ extern void ImagingSectionLeave(ImagingSectionCookie* cookie);
 
 extern void* ImagingError_IOError(void);
 extern void* ImagingError_MemoryError(void);
+extern void* ImagingError_MemoryBudget(void);
 extern void* ImagingError_ModeError(void); /* maps to ValueError by default */
 extern void* ImagingError_Mismatch(void); /* maps to ValueError by default */
 extern void* ImagingError_ValueError(const char* message);
@@ -275,15 +356,19 @@ extern int ImagingGetProjection(Imaging im, UINT8* xproj, UINT8* yproj);
 extern ImagingHistogram ImagingGetHistogram(
     Imaging im, Imaging mask, void *extrema);
 extern Imaging ImagingModeFilter(Imaging im, int size);
-extern Imaging ImagingNegative(Imaging im);
+extern Imaging ImagingNegative(Imaging imOut, Imaging im);
 extern Imaging ImagingOffset(Imaging im, int xoffset, int yoffset);
 extern int ImagingPaste(
     Imaging into, Imaging im, Imaging mask,
     int x0, int y0, int x1, int y1);
 extern Imaging ImagingPoint(
     Imaging im, const char* tablemode, const void* table);
+extern Imaging ImagingPoint2(
+    Imaging imOut, Imaging im, const char* tablemode, const void* table);
 extern Imaging ImagingPointTransform(
     Imaging imIn, double scale, double offset);
+extern Imaging ImagingPointTransform2(
+    Imaging imOut, Imaging imIn, double scale, double offset);
 extern Imaging ImagingPutBand(Imaging im, Imaging imIn, int band);
 extern Imaging ImagingRankFilter(Imaging im, int size, int rank);
 extern Imaging ImagingRotate(
@@ -292,6 +377,7 @@ extern Imaging ImagingRotate90(Imaging imOut, Imaging imIn);
 extern Imaging ImagingRotate180(Imaging imOut, Imaging imIn);
 extern Imaging ImagingRotate270(Imaging imOut, Imaging imIn);
 extern Imaging ImagingResample(Imaging imIn, int xsize, int ysize, int filter);
+extern Imaging ImagingResample2(Imaging imOut, Imaging imIn, int filter);
 extern Imaging ImagingTranspose(Imaging imOut, Imaging imIn);
 extern Imaging ImagingTransposeToNew(Imaging imIn);
 extern Imaging ImagingTransformPerspective(
@@ -314,25 +400,28 @@ extern Imaging ImagingBoxBlur(Imaging imOut, Imaging imIn, float radius, int n);
 
 extern Imaging ImagingCopy2(Imaging imOut, Imaging imIn);
 extern Imaging ImagingConvert2(Imaging imOut, Imaging imIn);
+extern Imaging ImagingConvertInto(
+    Imaging imOut, Imaging imIn, ImagingPalette palette, int dither);
 
 /* Channel operations */
+/* imOut may be NULL, in which case a new image is created */
 /* any mode, except "F" */
-extern Imaging ImagingChopLighter(Imaging imIn1, Imaging imIn2);
-extern Imaging ImagingChopDarker(Imaging imIn1, Imaging imIn2);
-extern Imaging ImagingChopDifference(Imaging imIn1, Imaging imIn2);
-extern Imaging ImagingChopMultiply(Imaging imIn1, Imaging imIn2);
-extern Imaging ImagingChopScreen(Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopLighter(Imaging imOut, Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopDarker(Imaging imOut, Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopDifference(Imaging imOut, Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopMultiply(Imaging imOut, Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopScreen(Imaging imOut, Imaging imIn1, Imaging imIn2);
 extern Imaging ImagingChopAdd(
-    Imaging imIn1, Imaging imIn2, float scale, int offset);
+    Imaging imOut, Imaging imIn1, Imaging imIn2, float scale, int offset);
 extern Imaging ImagingChopSubtract(
-    Imaging imIn1, Imaging imIn2, float scale, int offset);
-extern Imaging ImagingChopAddModulo(Imaging imIn1, Imaging imIn2);
-extern Imaging ImagingChopSubtractModulo(Imaging imIn1, Imaging imIn2);
+    Imaging imOut, Imaging imIn1, Imaging imIn2, float scale, int offset);
+extern Imaging ImagingChopAddModulo(Imaging imOut, Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopSubtractModulo(Imaging imOut, Imaging imIn1, Imaging imIn2);
 
 /* "1" images only */
-extern Imaging ImagingChopAnd(Imaging imIn1, Imaging imIn2);
-extern Imaging ImagingChopOr(Imaging imIn1, Imaging imIn2);
-extern Imaging ImagingChopXor(Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopAnd(Imaging imOut, Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopOr(Imaging imOut, Imaging imIn1, Imaging imIn2);
+extern Imaging ImagingChopXor(Imaging imOut, Imaging imIn1, Imaging imIn2);
 
 /* Image measurement */
 extern void ImagingCrack(Imaging im, int x0, int y0);
@@ -506,6 +595,8 @@ struct ImagingCodecStateInstance {
     int bits, bytes;
     UINT8 *buffer;
     void *context;
+    int ylimit; /* If set, decoders pause once y reaches this row */
+    int complete; /* If set, decoders are given all the remaining data */
 };
 
 /* Incremental encoding/decoding support */
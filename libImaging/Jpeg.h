@@ -10,6 +10,11 @@
 
 #include "jpeglib.h"
 
+#ifdef LIBJPEG_TURBO_VERSION_NUMBER
+/* libjpeg-turbo 2.0 and later can skip rows without decoding them */
+#define JPEG_SKIP_SCANLINES
+#endif
+
 #include <setjmp.h>
 
 
@@ -25,6 +30,7 @@ typedef struct {
 typedef struct {
     struct jpeg_source_mgr pub;
     int skip;
+    int eof; /* set once a fake EOI marker ends the data */
 } JPEGSOURCE;
 
 typedef struct {
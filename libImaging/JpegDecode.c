@@ -75,6 +75,38 @@ skip_input_data(j_decompress_ptr cinfo, long num_bytes)
 }
 
 
+/* -------------------------------------------------------------------- */
+/* Complete input handler                                               */
+/* -------------------------------------------------------------------- */
+
+METHODDEF(boolean)
+fill_input_buffer_complete(j_decompress_ptr cinfo)
+{
+    /* All data has been given to the decoder.  End it with a fake EOI
+       marker, like the standard memory source, instead of suspending */
+    static const JOCTET eoi[2] = { 0xFF, JPEG_EOI };
+    JPEGSOURCE* source = (JPEGSOURCE*) cinfo->src;
+
+    source->eof = 1;
+    source->pub.next_input_byte = eoi;
+    source->pub.bytes_in_buffer = 2;
+    return TRUE;
+}
+
+METHODDEF(void)
+skip_input_data_complete(j_decompress_ptr cinfo, long num_bytes)
+{
+    JPEGSOURCE* source = (JPEGSOURCE*) cinfo->src;
+
+    if (num_bytes > (long) source->pub.bytes_in_buffer)
+        fill_input_buffer_complete(cinfo);
+    else if (num_bytes > 0) {
+        source->pub.bytes_in_buffer -= num_bytes;
+        source->pub.next_input_byte += num_bytes;
+    }
+}
+
+
 GLOBAL(void)
 jpeg_buffer_src(j_decompress_ptr cinfo, JPEGSOURCE* source)
 {
@@ -114,11 +146,22 @@ output(j_common_ptr cinfo)
 /* Decoder                                                              */
 /* -------------------------------------------------------------------- */
 
+static int
+consumed(JPEGSTATE* context, UINT8* buf, int bytes)
+{
+    /* the number of bytes of buf used.  once the data has run out, the
+       source points to the fake EOI marker instead */
+    if (context->source.eof)
+        return bytes;
+    return context->source.pub.next_input_byte - buf;
+}
+
 int
 ImagingJpegDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 {
     JPEGSTATE* context = (JPEGSTATE*) state->context;
     int ok;
+    int x0, x1;
 
     if (setjmp(context->error.setjmp_buffer)) {
         /* JPEG error handler */
@@ -135,6 +178,11 @@ ImagingJpegDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
         context->error.pub.output_message = output;
         jpeg_create_decompress(&context->cinfo);
         jpeg_buffer_src(&context->cinfo, &context->source);
+        if (state->complete) {
+            context->source.pub.fill_input_buffer =
+                fill_input_buffer_complete;
+            context->source.pub.skip_input_data = skip_input_data_complete;
+        }
 
         /* Ready to decode */
         state->state = 1;
@@ -148,7 +196,7 @@ ImagingJpegDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
     if (context->source.skip > 0) {
         skip_input_data(&context->cinfo, context->source.skip);
         if (context->source.skip > 0)
-            return context->source.pub.next_input_byte - buf;
+            return consumed(context, buf, bytes);
     }
 
     switch (state->state) {
@@ -226,15 +274,33 @@ ImagingJpegDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 
     case 3:
 
-        /* Decompress a single line of data */
+        /* Decompress a single line of data.  If the tile extends
+           outside the image, only the part inside is stored, and
+           decoding stops at the last row of the image */
+        x0 = (state->xoff < 0) ? -state->xoff : 0;
+        x1 = state->xsize;
+        if (state->xoff + x1 > im->xsize)
+            x1 = im->xsize - state->xoff;
+#ifdef JPEG_SKIP_SCANLINES
+        /* Skip the rows above the image without decoding them.  libjpeg
+           can only do this if it never has to suspend */
+        if (state->complete && state->y + state->yoff < 0)
+            state->y += (int) jpeg_skip_scanlines(
+                &context->cinfo, (JDIMENSION) (-state->yoff - state->y));
+#endif
         ok = 1;
-        while (state->y < state->ysize) {
+        while (state->y < state->ysize && state->y + state->yoff < im->ysize) {
+            if (state->ylimit > 0 && state->y >= state->ylimit)
+                /* Pause at the row limit */
+                return consumed(context, buf, bytes);
             ok = jpeg_read_scanlines(&context->cinfo, &state->buffer, 1);
             if (ok != 1)
                 break;
-            state->shuffle((UINT8*) im->image[state->y + state->yoff] +
-                           state->xoff * im->pixelsize, state->buffer,
-                           state->xsize);
+            if (state->y + state->yoff >= 0)
+                state->shuffle((UINT8*) im->image[state->y + state->yoff] +
+                               (state->xoff + x0) * im->pixelsize,
+                               state->buffer + x0 * state->bits / 8,
+                               x1 - x0);
             state->y++;
         }
         if (ok != 1)
@@ -244,8 +310,10 @@ ImagingJpegDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 
     case 4:
 
-        /* Finish decompression */
-        if (!jpeg_finish_decompress(&context->cinfo)) {
+        /* Finish decompression, unless rows below the image were
+           skipped */
+        if (context->cinfo.output_scanline == context->cinfo.output_height &&
+            !jpeg_finish_decompress(&context->cinfo)) {
             /* FIXME: add strictness mode test */
             if (state->y < state->ysize)
                 break;
@@ -254,12 +322,15 @@ ImagingJpegDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
         /* Clean up */
         jpeg_destroy_decompress(&context->cinfo);
         /* if (jerr.pub.num_warnings) return BROKEN; */
+        if (context->source.eof)
+            /* the data ran out; the missing rows are filled in */
+            state->errcode = IMAGING_CODEC_BROKEN;
         return -1;
 
     }
 
     /* Return number of bytes consumed */
-    return context->source.pub.next_input_byte - buf;
+    return consumed(context, buf, bytes);
 
 }
 
@@ -267,6 +267,9 @@ ImagingJpegEncode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 
 	ok = 1;
 	while (state->y < state->ysize) {
+	    if (state->ylimit > 0 && state->y >= state->ylimit)
+		/* wait for more rows */
+		break;
 	    state->shuffle(state->buffer,
 			   (UINT8*) im->image[state->y + state->yoff] +
 			   state->xoff * im->pixelsize, state->xsize);
@@ -276,7 +279,7 @@ ImagingJpegEncode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 	    state->y++;
 	}
 
-	if (ok != 1)
+	if (ok != 1 || state->y < state->ysize)
 	    break;
 	state->state++;
 	/* fall through */
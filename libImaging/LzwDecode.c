@@ -222,6 +222,14 @@ ImagingLzwDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 		if (++state->y >= state->ysize)
 		    /* End of file (errcode = 0) */
 		    return -1;
+
+		if (state->ylimit > 0 && state->y >= state->ylimit) {
+		    /* Pause at the row limit.  The rest of the string is
+		       returned by the next call */
+		    if (c + 1 < i)
+			context->bufferindex = p + c + 1 - context->buffer;
+		    return ptr - buf;
+		}
 	    }
 	}
     }
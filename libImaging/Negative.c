@@ -21,15 +21,14 @@
 
 
 Imaging
-ImagingNegative(Imaging im)
+ImagingNegative(Imaging imOut, Imaging im)
 {
-    Imaging imOut;
     int x, y;
 
     if (!im)
 	return (Imaging) ImagingError_ModeError();
 
-    imOut = ImagingNew(im->mode, im->xsize, im->ysize);
+    imOut = ImagingNew2(im->mode, imOut, im);
     if (!imOut)
 	return NULL;
 
@@ -86,6 +86,10 @@ ImagingPackbitsDecode(Imaging im, ImagingCodecState state,
 		/* End of file (errcode = 0) */
 		return -1;
 	    }
+
+	    if (state->ylimit > 0 && state->y >= state->ylimit)
+		/* Pause at the row limit */
+		return ptr - buf;
 	}
 
     }
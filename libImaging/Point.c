@@ -128,13 +128,12 @@ im_point_32_8(Imaging imOut, Imaging imIn, im_point_context* context)
     }
 }
 
-Imaging
-ImagingPoint(Imaging imIn, const char* mode, const void* table)
+static Imaging
+point(Imaging imOut, Imaging imIn, const char* mode, const void* table)
 {
     /* lookup table transform */
 
     ImagingSectionCookie cookie;
-    Imaging imOut;
     im_point_context context;
     void (*point)(Imaging imIn, Imaging imOut, im_point_context* context);
 
@@ -150,7 +149,7 @@ ImagingPoint(Imaging imIn, const char* mode, const void* table)
     } else if (!imIn->image8 && strcmp(imIn->mode, mode) != 0)
         goto mode_mismatch;
 
-    imOut = ImagingNew(mode, imIn->xsize, imIn->ysize);
+    imOut = ImagingNew2(mode, imOut, imIn);
     if (!imOut)
 	return NULL;
 
@@ -197,14 +196,27 @@ ImagingPoint(Imaging imIn, const char* mode, const void* table)
         );
 }
 
+Imaging
+ImagingPoint(Imaging imIn, const char* mode, const void* table)
+{
+    return point(NULL, imIn, mode, table);
+}
 
 Imaging
-ImagingPointTransform(Imaging imIn, double scale, double offset)
+ImagingPoint2(Imaging imOut, Imaging imIn, const char* mode,
+              const void* table)
+{
+    return point(imOut, imIn, mode, table);
+}
+
+
+static Imaging
+point_transform(Imaging imOut, Imaging imIn, double scale, double offset)
 {
     /* scale/offset transform */
 
     ImagingSectionCookie cookie;
-    Imaging imOut;
+    Imaging imTarget = imOut;
     int x, y;
 
     if (!imIn || (strcmp(imIn->mode, "I") != 0 &&
@@ -212,7 +224,7 @@ ImagingPointTransform(Imaging imIn, double scale, double offset)
                   strcmp(imIn->mode, "F") != 0))
 	return (Imaging) ImagingError_ModeError();
 
-    imOut = ImagingNew(imIn->mode, imIn->xsize, imIn->ysize);
+    imOut = ImagingNew2(imIn->mode, imOut, imIn);
     if (!imOut)
 	return NULL;
 
@@ -255,9 +267,23 @@ ImagingPointTransform(Imaging imIn, double scale, double offset)
 	}
         /* FALL THROUGH */
     default:
-        ImagingDelete(imOut);
+        if (!imTarget)
+            ImagingDelete(imOut);
         return (Imaging) ImagingError_ValueError("internal error");
     }
 
     return imOut;
 }
+
+Imaging
+ImagingPointTransform(Imaging imIn, double scale, double offset)
+{
+    return point_transform(NULL, imIn, scale, offset);
+}
+
+Imaging
+ImagingPointTransform2(Imaging imOut, Imaging imIn, double scale,
+                       double offset)
+{
+    return point_transform(imOut, imIn, scale, offset);
+}
@@ -84,6 +84,11 @@ ImagingRawDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 
 	state->state = SKIP;
 
+	if (state->ylimit > 0 && state->ystep > 0 &&
+	    state->y >= state->ylimit)
+	    /* Pause at the row limit */
+	    return ptr - buf;
+
     }
 
 }
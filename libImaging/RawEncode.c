@@ -65,6 +65,11 @@ ImagingRawEncode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 
     while (bytes >= state->bytes) {
 
+	if (state->ylimit > 0 && state->ystep > 0 &&
+	    state->y >= state->ylimit)
+	    /* wait for more rows */
+	    break;
+
 	state->shuffle(ptr, (UINT8*) im->image[state->y + state->yoff] +
 		       state->xoff * im->pixelsize, state->xsize);
 
@@ -291,11 +291,10 @@ ImagingResampleHorizontal(Imaging imIn, int xsize, int filter)
 }
 
 
-Imaging
-ImagingResample(Imaging imIn, int xsize, int ysize, int filter)
+static Imaging
+resample(Imaging imOut, Imaging imIn, int xsize, int ysize, int filter)
 {
     Imaging imTemp1, imTemp2, imTemp3;
-    Imaging imOut;
 
     if (strcmp(imIn->mode, "P") == 0 || strcmp(imIn->mode, "1") == 0)
         return (Imaging) ImagingError_ModeError();
@@ -303,6 +302,10 @@ ImagingResample(Imaging imIn, int xsize, int ysize, int filter)
     if (imIn->type == IMAGING_TYPE_SPECIAL)
         return (Imaging) ImagingError_ModeError();
 
+    if (imOut && (strcmp(imOut->mode, imIn->mode) != 0 ||
+                  imOut->xsize != xsize || imOut->ysize != ysize))
+        return (Imaging) ImagingError_Mismatch();
+
     /* two-pass resize, first pass */
     imTemp1 = ImagingResampleHorizontal(imIn, xsize, filter);
     if ( ! imTemp1)
@@ -321,10 +324,25 @@ ImagingResample(Imaging imIn, int xsize, int ysize, int filter)
         return NULL;
 
     /* transpose result */
-    imOut = ImagingTransposeToNew(imTemp3);
+    if (imOut)
+        imOut = ImagingTranspose(imOut, imTemp3);
+    else
+        imOut = ImagingTransposeToNew(imTemp3);
     ImagingDelete(imTemp3);
     if ( ! imOut)
         return NULL;
 
     return imOut;
 }
+
+Imaging
+ImagingResample(Imaging imIn, int xsize, int ysize, int filter)
+{
+    return resample(NULL, imIn, xsize, ysize, filter);
+}
+
+Imaging
+ImagingResample2(Imaging imOut, Imaging imIn, int filter)
+{
+    return resample(imOut, imIn, imOut->xsize, imOut->ysize, filter);
+}
@@ -37,10 +37,15 @@
 
 #include "Imaging.h"
 #include <string.h>
+#ifndef _WIN32
+#include <unistd.h>
+#endif
 
 
 int ImagingNewCount = 0;
 
+struct ImagingMemoryStatsInstance ImagingMemoryStats;
+
 /* --------------------------------------------------------------------
  * Standard image object.
  */
@@ -201,6 +206,9 @@ ImagingNewPrologueSubtype(const char *mode, unsigned xsize, unsigned ysize,
     /* Setup image descriptor */
     strcpy(im->mode, mode);
 
+    /* no padding, unless the allocator adds it */
+    im->stride = im->linesize;
+
     ImagingSectionEnter(&cookie);
 
     /* Pointer array (allocate at least one line, to avoid MemoryError
@@ -214,7 +222,10 @@ ImagingNewPrologueSubtype(const char *mode, unsigned xsize, unsigned ysize,
         return (Imaging) ImagingError_MemoryError();
     }
 
+    im->refcount = 1;
+
     ImagingNewCount++;
+    ImagingMemoryStats.images++;
 
     return im;
 }
@@ -233,8 +244,17 @@ ImagingNewEpilogue(Imaging im)
     /* If the raster data allocator didn't setup a destructor,
        assume that it couldn't allocate the required amount of
        memory. */
-    if (!im->destroy)
+    if (!im->destroy) {
+        ImagingDelete(im);
         return (Imaging) ImagingError_MemoryError();
+    }
+
+    if (im->allocated) {
+        ImagingMemoryStats.bytes += im->allocated;
+        ImagingMemoryStats.allocs++;
+        if (ImagingMemoryStats.bytes > ImagingMemoryStats.bytes_peak)
+            ImagingMemoryStats.bytes_peak = ImagingMemoryStats.bytes;
+    }
 
     /* Initialize alias pointers to pixel data. */
     switch (im->pixelsize) {
@@ -255,6 +275,16 @@ ImagingDelete(Imaging im)
     if (!im)
         return;
 
+    /* still referenced by views */
+    if (--im->refcount > 0)
+        return;
+
+    ImagingMemoryStats.images--;
+    if (im->allocated) {
+        ImagingMemoryStats.bytes -= im->allocated;
+        ImagingMemoryStats.frees++;
+    }
+
     if (im->palette)
         ImagingPaletteDelete(im->palette);
 
@@ -268,6 +298,256 @@ ImagingDelete(Imaging im)
 }
 
 
+/* Block Pool */
+/* ---------- */
+/* Freed raster blocks are cached in free lists, one per size class.
+   Size classes are spaced a quarter octave apart, so a block is never
+   more than 25% larger than the request it serves.  Blocks are linked
+   through their first word, which is why the smallest class holds 64
+   bytes. */
+
+#define POOL_MIN_SHIFT  6
+#define POOL_DEFAULT_MAX (16*1024*1024L)
+
+struct ImagingMemoryPoolInstance ImagingDefaultPool = {
+    {NULL},             /* buckets */
+    0,                  /* blocks */
+    0,                  /* bytes */
+    POOL_DEFAULT_MAX,   /* bytes_max */
+};
+
+static int
+pool_bucket(Py_ssize_t size, Py_ssize_t* class_size)
+{
+    int shift = POOL_MIN_SHIFT;
+    Py_ssize_t step, n;
+
+    if (size <= ((Py_ssize_t) 1 << POOL_MIN_SHIFT)) {
+        *class_size = (Py_ssize_t) 1 << POOL_MIN_SHIFT;
+        return 0;
+    }
+
+    /* find shift so that 2**shift < size <= 2**(shift+1) */
+    while (((Py_ssize_t) 1 << (shift + 1)) < size)
+        shift++;
+
+    /* split the octave in four steps */
+    step = (Py_ssize_t) 1 << (shift - 2);
+    n = (size + step - 1) / step; /* 5..8 */
+
+    *class_size = n * step;
+
+    return 1 + (shift - POOL_MIN_SHIFT) * 4 + (int) (n - 5);
+}
+
+void*
+ImagingPoolAlloc(ImagingMemoryPool pool, Py_ssize_t size)
+{
+    void* block;
+    Py_ssize_t class_size;
+    int bucket;
+
+    bucket = pool_bucket(size, &class_size);
+
+    block = pool->buckets[bucket];
+    if (block) {
+        /* reuse a cached block */
+        pool->buckets[bucket] = *(void**) block;
+        pool->blocks--;
+        pool->bytes -= class_size;
+        memset(block, 0, class_size);
+        return block;
+    }
+
+    /* calloc can hand out fresh zero pages without touching them */
+    return calloc(1, class_size);
+}
+
+void
+ImagingPoolFree(ImagingMemoryPool pool, void* block, Py_ssize_t size)
+{
+    Py_ssize_t class_size;
+    int bucket;
+
+    if (!block)
+        return;
+
+    bucket = pool_bucket(size, &class_size);
+
+    if (pool->bytes + class_size > pool->bytes_max) {
+        free(block);
+        return;
+    }
+
+    *(void**) block = pool->buckets[bucket];
+    pool->buckets[bucket] = block;
+    pool->blocks++;
+    pool->bytes += class_size;
+}
+
+static void
+pool_trim(ImagingMemoryPool pool)
+{
+    void* block;
+    int bucket;
+    Py_ssize_t class_size;
+
+    /* release the largest blocks first */
+    for (bucket = IMAGING_POOL_BUCKETS - 1; bucket >= 0; bucket--) {
+        if (pool->bytes <= pool->bytes_max)
+            break;
+        if (!pool->buckets[bucket])
+            continue;
+        /* smallest size in this class */
+        if (bucket == 0)
+            class_size = (Py_ssize_t) 1 << POOL_MIN_SHIFT;
+        else
+            class_size = ((Py_ssize_t) 1 << (POOL_MIN_SHIFT +
+                                             (bucket - 1) / 4 - 2)) *
+                         (5 + (bucket - 1) % 4);
+        while (pool->buckets[bucket] && pool->bytes > pool->bytes_max) {
+            block = pool->buckets[bucket];
+            pool->buckets[bucket] = *(void**) block;
+            pool->blocks--;
+            pool->bytes -= class_size;
+            free(block);
+        }
+    }
+}
+
+void
+ImagingPoolSetLimit(ImagingMemoryPool pool, Py_ssize_t bytes_max)
+{
+    if (bytes_max < 0)
+        bytes_max = 0;
+    pool->bytes_max = bytes_max;
+    pool_trim(pool);
+}
+
+void
+ImagingPoolClear(ImagingMemoryPool pool)
+{
+    Py_ssize_t bytes_max = pool->bytes_max;
+
+    pool->bytes_max = 0;
+    pool_trim(pool);
+    pool->bytes_max = bytes_max;
+}
+
+
+/* Memory accounting */
+/* ----------------- */
+
+static Py_ssize_t
+pool_class_size(Py_ssize_t size)
+{
+    Py_ssize_t class_size;
+    pool_bucket(size, &class_size);
+    return class_size;
+}
+
+void
+ImagingMemoryStatsReset(void)
+{
+    /* restart the counters and the peak, but keep track of live data */
+    ImagingMemoryStats.bytes_peak = ImagingMemoryStats.bytes;
+    ImagingMemoryStats.allocs = 0;
+    ImagingMemoryStats.frees = 0;
+    ImagingMemoryStats.refusals = 0;
+}
+
+void
+ImagingMemorySetBudget(Py_ssize_t bytes_max, int timeout)
+{
+    ImagingMemoryStats.bytes_max = (bytes_max > 0) ? bytes_max : 0;
+    ImagingMemoryStats.timeout = (timeout > 0) ? timeout : 0;
+}
+
+/* interval at which waiting allocations look for released memory */
+#define BUDGET_POLL 5
+
+static void
+budget_sleep(int ms)
+{
+#ifdef _WIN32
+    Sleep(ms);
+#else
+    usleep(ms * 1000);
+#endif
+}
+
+static int
+budget_reserve(Py_ssize_t size)
+{
+    /* make sure that size more bytes fit into the memory budget,
+       waiting for other threads to release memory if necessary.
+       returns -1 if the budget refused the allocation */
+    ImagingSectionCookie cookie;
+    int waited = 0;
+
+    while (ImagingMemoryStats.bytes_max &&
+           ImagingMemoryStats.bytes + size > ImagingMemoryStats.bytes_max) {
+        if (size > ImagingMemoryStats.bytes_max ||
+            waited >= ImagingMemoryStats.timeout) {
+            ImagingMemoryStats.refusals++;
+            return -1;
+        }
+        ImagingSectionEnter(&cookie);
+        budget_sleep(BUDGET_POLL);
+        ImagingSectionLeave(&cookie);
+        waited += BUDGET_POLL;
+    }
+
+    return 0;
+}
+
+
+/* Aligned Storage */
+/* --------------- */
+/* Aligned buffers are taken from the pool with IMAGING_ALIGNMENT extra
+   bytes.  The distance from the start of the pool block to the aligned
+   buffer (1 to IMAGING_ALIGNMENT bytes) is kept in the byte just before
+   the buffer. */
+
+int ImagingAlignedStorage = 0;
+
+static char*
+pool_alloc_aligned(Py_ssize_t size)
+{
+    char* block;
+    int offset;
+
+    block = (char *) ImagingPoolAlloc(&ImagingDefaultPool,
+                                      size + IMAGING_ALIGNMENT);
+    if (!block)
+        return NULL;
+
+    offset = IMAGING_ALIGNMENT - (int) ((size_t) block % IMAGING_ALIGNMENT);
+    block[offset - 1] = (UINT8) offset;
+
+    return block + offset;
+}
+
+static void
+pool_free_aligned(char* block, Py_ssize_t size)
+{
+    if (block)
+        ImagingPoolFree(&ImagingDefaultPool, block - ((UINT8*) block)[-1],
+                        size + IMAGING_ALIGNMENT);
+}
+
+static int
+aligned_stride(Imaging im)
+{
+    /* pad lines to a multiple of the alignment */
+    if (im->linesize > INT_MAX - IMAGING_ALIGNMENT)
+        return -1;
+    im->stride = (im->linesize + IMAGING_ALIGNMENT - 1) &
+                 ~(IMAGING_ALIGNMENT - 1);
+    return 0;
+}
+
+
 /* Array Storage Type */
 /* ------------------ */
 /* Allocate image as an array of line buffers. */
@@ -280,38 +560,69 @@ ImagingDestroyArray(Imaging im)
     if (im->image)
         for (y = 0; y < im->ysize; y++)
             if (im->image[y])
-                free(im->image[y]);
+                ImagingPoolFree(&ImagingDefaultPool, im->image[y],
+                                im->stride);
+}
+
+static void
+ImagingDestroyAlignedArray(Imaging im)
+{
+    int y;
+
+    if (im->image)
+        for (y = 0; y < im->ysize; y++)
+            pool_free_aligned(im->image[y], im->stride);
 }
 
 Imaging
 ImagingNewArray(const char *mode, int xsize, int ysize)
 {
     Imaging im;
-    ImagingSectionCookie cookie;
 
     int y;
     char* p;
+    int aligned = ImagingAlignedStorage;
+    Py_ssize_t size;
 
     im = ImagingNewPrologue(mode, xsize, ysize);
     if (!im)
         return NULL;
 
-    ImagingSectionEnter(&cookie);
+    if (aligned && aligned_stride(im) < 0) {
+        ImagingDelete(im);
+        return (Imaging) ImagingError_MemoryError();
+    }
 
-    /* Allocate image as an array of lines */
+    size = pool_class_size(im->stride + (aligned ? IMAGING_ALIGNMENT : 0)) *
+           im->ysize;
+
+    if (budget_reserve(size) < 0) {
+        ImagingDelete(im);
+        return (Imaging) ImagingError_MemoryBudget();
+    }
+
+    /* Allocate image as an array of lines (the block pool relies on
+       the GIL, so we cannot release it here) */
     for (y = 0; y < im->ysize; y++) {
-        p = (char *) malloc(im->linesize);
+        if (aligned)
+            p = pool_alloc_aligned(im->stride);
+        else
+            p = (char *) ImagingPoolAlloc(&ImagingDefaultPool, im->stride);
         if (!p) {
-            ImagingDestroyArray(im);
+            if (aligned)
+                ImagingDestroyAlignedArray(im);
+            else
+                ImagingDestroyArray(im);
             break;
         }
         im->image[y] = p;
     }
 
-    ImagingSectionLeave(&cookie);
-
-    if (y == im->ysize)
-        im->destroy = ImagingDestroyArray;
+    if (y == im->ysize) {
+        im->destroy = aligned ? ImagingDestroyAlignedArray :
+                                ImagingDestroyArray;
+        im->allocated = size;
+    }
 
     return ImagingNewEpilogue(im);
 }
@@ -321,48 +632,272 @@ ImagingNewArray(const char *mode, int xsize, int ysize)
 /* ------------------ */
 /* Allocate image as a single block. */
 
+static Py_ssize_t
+ImagingBlockSize(Imaging im)
+{
+    Py_ssize_t bytes = (Py_ssize_t) im->ysize * im->stride;
+    if (bytes <= 0)
+        /* some platforms return NULL for malloc(0); this fix
+           prevents MemoryError on zero-sized images on such
+           platforms */
+        bytes = 1;
+    return bytes;
+}
+
 static void
 ImagingDestroyBlock(Imaging im)
 {
     if (im->block)
-        free(im->block);
+        ImagingPoolFree(&ImagingDefaultPool, im->block, ImagingBlockSize(im));
 }
 
-Imaging
-ImagingNewBlock(const char *mode, int xsize, int ysize)
+static void
+ImagingDestroyAlignedBlock(Imaging im)
+{
+    pool_free_aligned(im->block, ImagingBlockSize(im));
+}
+
+static Imaging
+new_block(const char *mode, int xsize, int ysize, int *refused)
 {
     Imaging im;
     Py_ssize_t y, i;
-    Py_ssize_t bytes;
+    int aligned = ImagingAlignedStorage;
+    Py_ssize_t size;
 
     im = ImagingNewPrologue(mode, xsize, ysize);
     if (!im)
         return NULL;
 
-    /* Use a single block */
-    bytes = (Py_ssize_t) im->ysize * im->linesize;
-    if (bytes <= 0)
-        /* some platforms return NULL for malloc(0); this fix
-           prevents MemoryError on zero-sized images on such
-           platforms */
-        bytes = 1;
-    im->block = (char *) malloc(bytes);
+    if (aligned && aligned_stride(im) < 0) {
+        ImagingDelete(im);
+        return (Imaging) ImagingError_MemoryError();
+    }
 
-    if (im->block) {
-        memset(im->block, 0, bytes);
+    size = pool_class_size(ImagingBlockSize(im) +
+                           (aligned ? IMAGING_ALIGNMENT : 0));
+
+    if (budget_reserve(size) < 0) {
+        ImagingDelete(im);
+        *refused = 1;
+        return (Imaging) ImagingError_MemoryBudget();
+    }
+
+    /* Use a single block (zero filled) */
+    if (aligned)
+        im->block = pool_alloc_aligned(ImagingBlockSize(im));
+    else
+        im->block = (char *) ImagingPoolAlloc(&ImagingDefaultPool,
+                                              ImagingBlockSize(im));
 
+    if (im->block) {
         for (y = i = 0; y < im->ysize; y++) {
             im->image[y] = im->block + i;
-            i += im->linesize;
+            i += im->stride;
         }
 
-        im->destroy = ImagingDestroyBlock;
+        im->destroy = aligned ? ImagingDestroyAlignedBlock :
+                                ImagingDestroyBlock;
+        im->allocated = size;
+
+    }
+
+    return ImagingNewEpilogue(im);
+}
+
+Imaging
+ImagingNewBlock(const char *mode, int xsize, int ysize)
+{
+    int refused = 0;
+    return new_block(mode, xsize, ysize, &refused);
+}
+
+/* Arena Storage Type */
+/* ------------------ */
+/* Allocate image as a few large chunks, each holding as many lines as
+   fit into ARENA_CHUNK bytes.  The first line of each chunk points to
+   the start of the chunk. */
+
+#define ARENA_CHUNK     (16*1024*1024L)
+
+static int
+arena_lines(Imaging im)
+{
+    /* lines per chunk */
+    Py_ssize_t lines = ARENA_CHUNK / ((im->stride > 0) ? im->stride : 1);
+    if (lines > im->ysize)
+        lines = im->ysize;
+    return (lines > 0) ? (int) lines : 1;
+}
+
+static Py_ssize_t
+arena_chunk_size(Imaging im, int y, int lines)
+{
+    if (lines > im->ysize - y)
+        lines = im->ysize - y;
+    return (Py_ssize_t) lines * im->stride;
+}
+
+static void
+arena_free(Imaging im, int aligned)
+{
+    int y, lines;
+
+    if (!im->image)
+        return;
+
+    lines = arena_lines(im);
+    for (y = 0; y < im->ysize; y += lines) {
+        if (!im->image[y])
+            continue;
+        if (aligned)
+            pool_free_aligned(im->image[y], arena_chunk_size(im, y, lines));
+        else
+            ImagingPoolFree(&ImagingDefaultPool, im->image[y],
+                            arena_chunk_size(im, y, lines));
+    }
+}
+
+static void
+ImagingDestroyArena(Imaging im)
+{
+    arena_free(im, 0);
+}
+
+static void
+ImagingDestroyAlignedArena(Imaging im)
+{
+    arena_free(im, 1);
+}
+
+static Imaging
+new_arena(const char *mode, int xsize, int ysize, int *refused)
+{
+    Imaging im;
+    int y, i, lines;
+    char* p;
+    int aligned = ImagingAlignedStorage;
+    Py_ssize_t size = 0;
+
+    im = ImagingNewPrologue(mode, xsize, ysize);
+    if (!im)
+        return NULL;
+
+    if (aligned && aligned_stride(im) < 0) {
+        ImagingDelete(im);
+        return (Imaging) ImagingError_MemoryError();
+    }
+
+    lines = arena_lines(im);
+    for (y = 0; y < im->ysize; y += lines)
+        size += pool_class_size(arena_chunk_size(im, y, lines) +
+                                (aligned ? IMAGING_ALIGNMENT : 0));
 
+    if (budget_reserve(size) < 0) {
+        ImagingDelete(im);
+        *refused = 1;
+        return (Imaging) ImagingError_MemoryBudget();
+    }
+
+    for (y = 0; y < im->ysize; y += lines) {
+        if (aligned)
+            p = pool_alloc_aligned(arena_chunk_size(im, y, lines));
+        else
+            p = (char *) ImagingPoolAlloc(&ImagingDefaultPool,
+                                          arena_chunk_size(im, y, lines));
+        if (!p) {
+            arena_free(im, aligned);
+            break;
+        }
+        for (i = y; i < y + lines && i < im->ysize; i++) {
+            im->image[i] = p;
+            p += im->stride;
+        }
+    }
+
+    if (y >= im->ysize) {
+        im->destroy = aligned ? ImagingDestroyAlignedArena :
+                                ImagingDestroyArena;
+        im->allocated = size;
     }
 
     return ImagingNewEpilogue(im);
 }
 
+Imaging
+ImagingNewArena(const char *mode, int xsize, int ysize)
+{
+    int refused = 0;
+    return new_arena(mode, xsize, ysize, &refused);
+}
+
+/* View Storage Type */
+/* ----------------- */
+/* Share the raster data of another image (the base).  Each view holds
+   a reference to its base, so the base is shared as long as views of
+   it exist. */
+
+typedef struct ImagingViewInstance {
+    struct ImagingMemoryInstance im;
+    Imaging base;
+} ImagingViewInstance;
+
+static void
+ImagingDestroyView(Imaging im)
+{
+    ImagingDelete(((ImagingViewInstance*) im)->base);
+}
+
+Imaging
+ImagingNewView(Imaging im, int x0, int y0, int x1, int y1)
+{
+    Imaging view;
+    Imaging base;
+    int y, offset;
+
+    /* images that may change behind our back, and regions extending
+       outside the image, are copied instead */
+    if (im->pinned || x0 < 0 || y0 < 0 || x1 > im->xsize ||
+        y1 > im->ysize || x0 > x1 || y0 > y1)
+        return ImagingCrop(im, x0, y0, x1, y1);
+
+    view = ImagingNewPrologueSubtype(im->mode, x1 - x0, y1 - y0,
+                                     sizeof(ImagingViewInstance));
+    if (!view)
+        return NULL;
+
+    ImagingCopyInfo(view, im);
+
+    view->stride = im->stride;
+
+    offset = x0 * im->pixelsize;
+    for (y = y0; y < y1; y++)
+        view->image[y-y0] = im->image[y] + offset;
+
+    /* full width regions of single block images are single blocks */
+    if (im->block && x0 == 0 && x1 == im->xsize)
+        view->block = im->block + (Py_ssize_t) y0 * im->stride;
+
+    view->read_only = im->read_only;
+
+    /* views of views share the memory of the original base */
+    base = (im->destroy == ImagingDestroyView) ?
+        ((ImagingViewInstance*) im)->base : im;
+    base->refcount++;
+    ((ImagingViewInstance*) view)->base = base;
+
+    view->destroy = ImagingDestroyView;
+
+    return ImagingNewEpilogue(view);
+}
+
+int
+ImagingIsShared(Imaging im)
+{
+    return im->refcount > 1 || im->destroy == ImagingDestroyView;
+}
+
+
 /* --------------------------------------------------------------------
  * Create a new, internally allocated, image.
  */
@@ -376,6 +911,7 @@ Imaging
 ImagingNew(const char* mode, int xsize, int ysize)
 {
     int bytes;
+    int refused = 0;
     Imaging im;
 
     if (strlen(mode) == 1) {
@@ -387,11 +923,24 @@ ImagingNew(const char* mode, int xsize, int ysize)
         bytes = strlen(mode); /* close enough */
 
     if ((int64_t) xsize * (int64_t) ysize * bytes <= THRESHOLD) {
-        im = ImagingNewBlock(mode, xsize, ysize);
+        im = new_block(mode, xsize, ysize, &refused);
         if (im)
             return im;
+        /* the budget applies to arrays as well */
+        if (refused)
+            return NULL;
         /* assume memory error; try allocating in array mode instead */
         ImagingError_Clear();
+    } else {
+        /* large images are allocated in chunks, to keep the number of
+           allocations down without asking for one huge block */
+        im = new_arena(mode, xsize, ysize, &refused);
+        if (im)
+            return im;
+        if (refused)
+            return NULL;
+        /* try allocating in array mode instead */
+        ImagingError_Clear();
     }
 
     return ImagingNewArray(mode, xsize, ysize);
@@ -187,8 +187,8 @@ int ImagingLibTiffDecode(Imaging im, ImagingCodecState state, UINT8* buffer, int
 		   im->mode, im->type, im->bands, im->xsize, im->ysize));
 	TRACE(("Image: image8 %p, image32 %p, image %p, block %p \n",
 		   im->image8, im->image32, im->image, im->block));
-	TRACE(("Image: pixelsize: %d, linesize %d \n",
-		   im->pixelsize, im->linesize));
+	TRACE(("Image: pixelsize: %d, linesize %d, stride %d \n",
+		   im->pixelsize, im->linesize, im->stride));
 
 	dump_state(clientstate);
 	clientstate->size = bytes;
@@ -369,14 +369,18 @@ int ImagingLibTiffEncode(Imaging im, ImagingCodecState state, UINT8* buffer, int
 		   im->mode, im->type, im->bands, im->xsize, im->ysize));
 	TRACE(("Image: image8 %p, image32 %p, image %p, block %p \n",
 		   im->image8, im->image32, im->image, im->block));
-	TRACE(("Image: pixelsize: %d, linesize %d \n",
-		   im->pixelsize, im->linesize));
+	TRACE(("Image: pixelsize: %d, linesize %d, stride %d \n",
+		   im->pixelsize, im->linesize, im->stride));
 
 	dump_state(clientstate);
 
 	if (state->state == 0) {
 		TRACE(("Encoding line bt line"));
 		while(state->y < state->ysize){
+			if (state->ylimit > 0 && state->y >= state->ylimit) {
+				/* wait for more rows */
+				return 0;
+			}
 			state->shuffle(state->buffer,
 						   (UINT8*) im->image[state->y + state->yoff] +
 						   state->xoff * im->pixelsize,
@@ -102,8 +102,9 @@ ImagingZipDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
     context->z_stream.next_in = buf;
     context->z_stream.avail_in = bytes;
 
-    /* Decompress what we've got this far */
-    while (context->z_stream.avail_in > 0) {
+    /* Decompress what we've got this far.  After pausing at a row
+       limit, zlib may hold enough data for more rows */
+    while (context->z_stream.avail_in > 0 || state->ylimit > 0) {
 
 	context->z_stream.next_out = state->buffer + context->last_output;
 	context->z_stream.avail_out =
@@ -111,7 +112,8 @@ ImagingZipDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 
 	err = inflate(&context->z_stream, Z_NO_FLUSH);
 
-	if (err < 0) {
+	/* Z_BUF_ERROR means that more input is needed */
+	if (err < 0 && err != Z_BUF_ERROR) {
 	    /* Something went wrong inside the compression library */
 	    if (err == Z_DATA_ERROR)
 		state->errcode = IMAGING_CODEC_BROKEN;
@@ -262,6 +264,10 @@ ImagingZipDecode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 	state->buffer = context->previous;
 	context->previous = ptr;
 
+	if (state->ylimit > 0 && state->y >= state->ylimit)
+	    /* Pause at the row limit */
+	    return bytes - context->z_stream.avail_in;
+
     }
 
     return bytes; /* consumed all of it */
@@ -154,6 +154,12 @@ ImagingZipEncode(Imaging im, ImagingCodecState state, UINT8* buf, int bytes)
 
 		}
 
+		if (state->ylimit > 0 && state->y >= state->ylimit) {
+		    /* Wait for more rows */
+		    ImagingSectionLeave(&cookie);
+		    return bytes - context->z_stream.avail_out;
+		}
+
 		/* Stuff image data into the compressor */
 		state->shuffle(state->buffer+1,
 			       (UINT8*) im->image[state->y + state->yoff] +
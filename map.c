@@ -27,6 +27,7 @@
 /* compatibility wrappers (defined in _imaging.c) */
 extern int PyImaging_CheckBuffer(PyObject* buffer);
 extern int PyImaging_GetBuffer(PyObject* buffer, Py_buffer *view);
+extern int PyImaging_GetWritableBuffer(PyObject* buffer, Py_buffer *view);
 
 /* -------------------------------------------------------------------- */
 /* Standard mapper */
@@ -228,6 +229,7 @@ mapping_readimage(ImagingMapperObject* mapper, PyObject* args)
             im->image[ysize-y-1] = mapper->base + mapper->offset + y * stride;
 
     im->destroy = ImagingDestroyMap;
+    im->read_only = 1;
 
     if (!ImagingNewEpilogue(im))
         return NULL;
@@ -308,6 +310,29 @@ mapping_destroy_buffer(Imaging im)
     Py_XDECREF(buffer->target);
 }
 
+static void
+mapping_find_block(Imaging im, Py_buffer* view)
+{
+    /* rows the same distance apart make up a block with that stride,
+       as long as the buffer also holds the padding of the last row */
+    Py_ssize_t stride, y;
+
+    if (im->ysize <= 0)
+        return;
+
+    stride = (im->ysize > 1) ? im->image[1] - im->image[0] : im->linesize;
+    if (stride < im->linesize || stride > INT_MAX)
+        return;
+    for (y = 2; y < im->ysize; y++)
+        if (im->image[y] != im->image[y-1] + stride)
+            return;
+    if (im->image[0] + im->ysize * stride > (char*) view->buf + view->len)
+        return;
+
+    im->block = im->image[0];
+    im->stride = (int) stride;
+}
+
 PyObject*
 PyImaging_MapBuffer(PyObject* self, PyObject* args)
 {
@@ -323,9 +348,11 @@ PyImaging_MapBuffer(PyObject* self, PyObject* args)
     int xsize, ysize;
     int stride;
     int ystep;
+    int readonly = 1;
 
-    if (!PyArg_ParseTuple(args, "O(ii)sOn(sii)", &target, &xsize, &ysize,
-                          &codec, &bbox, &offset, &mode, &stride, &ystep))
+    if (!PyArg_ParseTuple(args, "O(ii)sOn(sii)|i", &target, &xsize, &ysize,
+                          &codec, &bbox, &offset, &mode, &stride, &ystep,
+                          &readonly))
         return NULL;
 
     if (!PyImaging_CheckBuffer(target)) {
@@ -333,36 +360,53 @@ PyImaging_MapBuffer(PyObject* self, PyObject* args)
         return NULL;
     }
 
-    if (stride <= 0) {
-        if (!strcmp(mode, "L") || !strcmp(mode, "P"))
-            stride = xsize;
-        else if (!strncmp(mode, "I;16", 4))
-            stride = xsize * 2;
-        else
-            stride = xsize * 4;
+    if (offset < 0) {
+        PyErr_SetString(PyExc_ValueError, "offset must be non-negative");
+        return NULL;
     }
 
-    size = (Py_ssize_t) ysize * stride;
+    im = ImagingNewPrologueSubtype(
+        mode, xsize, ysize, sizeof(ImagingBufferInstance)
+        );
+    if (!im)
+        return NULL;
+
+    /* rows may be padded, but must not overlap */
+    if (stride <= 0)
+        stride = im->linesize;
+    else if (stride < im->linesize) {
+        ImagingDelete(im);
+        PyErr_SetString(PyExc_ValueError, "stride is too small");
+        return NULL;
+    }
+
+    /* the last row doesn't need any padding */
+    size = (ysize > 0) ? (Py_ssize_t) (ysize - 1) * stride + im->linesize : 0;
 
     /* check buffer size */
-    if (PyImaging_GetBuffer(target, &view) < 0)
+    if (readonly) {
+        if (PyImaging_GetBuffer(target, &view) < 0) {
+            ImagingDelete(im);
+            return NULL;
+        }
+    } else if (PyImaging_GetWritableBuffer(target, &view) < 0) {
+        ImagingDelete(im);
         return NULL;
+    }
 
     if (view.len < 0) {
+        PyBuffer_Release(&view);
+        ImagingDelete(im);
         PyErr_SetString(PyExc_ValueError, "buffer has negative size");
         return NULL;
     }
     if (offset + size > view.len) {
+        PyBuffer_Release(&view);
+        ImagingDelete(im);
         PyErr_SetString(PyExc_ValueError, "buffer is not large enough");
         return NULL;
     }
 
-    im = ImagingNewPrologueSubtype(
-        mode, xsize, ysize, sizeof(ImagingBufferInstance)
-        );
-    if (!im)
-        return NULL;
-
     /* setup file pointers */
     if (ystep > 0)
         for (y = 0; y < ysize; y++)
@@ -371,7 +415,12 @@ PyImaging_MapBuffer(PyObject* self, PyObject* args)
         for (y = 0; y < ysize; y++)
             im->image[ysize-y-1] = (char*)view.buf + offset + y * stride;
 
+    mapping_find_block(im, &view);
+
     im->destroy = mapping_destroy_buffer;
+    im->read_only = view.readonly;
+    /* the buffer may be modified by its owner, so don't share it */
+    im->pinned = !view.readonly;
 
     Py_INCREF(target);
     ((ImagingBufferInstance*) im)->target = target;
@@ -383,3 +432,113 @@ PyImaging_MapBuffer(PyObject* self, PyObject* args)
     return PyImagingNew(im);
 }
 
+
+PyObject*
+PyImaging_MapTiles(PyObject* self, PyObject* args)
+{
+    /* map raw image data stored as full width strips in a buffer.
+       each strip is given as (y0, y1, offset, stride, ystep), with
+       rows stored bottom up if ystep is negative.  together, the
+       strips must cover the whole image */
+
+    Py_ssize_t y, size;
+    Imaging im;
+
+    PyObject* target;
+    PyObject* tiles;
+    PyObject* tile;
+    Py_buffer view;
+    char* mode;
+    Py_ssize_t i, offset;
+    int xsize, ysize;
+    int y0, y1, stride, ystep;
+
+    if (!PyArg_ParseTuple(args, "O(ii)sO!", &target, &xsize, &ysize,
+                          &mode, &PyList_Type, &tiles))
+        return NULL;
+
+    if (!PyImaging_CheckBuffer(target)) {
+        PyErr_SetString(PyExc_TypeError, "expected string or buffer");
+        return NULL;
+    }
+
+    im = ImagingNewPrologueSubtype(
+        mode, xsize, ysize, sizeof(ImagingBufferInstance)
+        );
+    if (!im)
+        return NULL;
+
+    if (PyImaging_GetBuffer(target, &view) < 0) {
+        ImagingDelete(im);
+        return NULL;
+    }
+
+    for (i = 0; i < PyList_GET_SIZE(tiles); i++) {
+        tile = PyList_GET_ITEM(tiles, i);
+        if (!PyArg_ParseTuple(tile, "iinii", &y0, &y1, &offset, &stride,
+                              &ystep))
+            goto error;
+
+        if (y0 < 0 || y1 > ysize || y0 > y1) {
+            PyErr_SetString(PyExc_ValueError,
+                            "tile cannot extend outside image");
+            goto error;
+        }
+        if (offset < 0) {
+            PyErr_SetString(PyExc_ValueError, "offset must be non-negative");
+            goto error;
+        }
+        if (stride <= 0)
+            stride = im->linesize;
+        else if (stride < im->linesize) {
+            PyErr_SetString(PyExc_ValueError, "stride is too small");
+            goto error;
+        }
+
+        /* the last row doesn't need any padding */
+        size = (y1 > y0) ?
+            (Py_ssize_t) (y1 - y0 - 1) * stride + im->linesize : 0;
+        if (offset + size > view.len) {
+            PyErr_SetString(PyExc_ValueError, "buffer is not large enough");
+            goto error;
+        }
+
+        if (ystep > 0)
+            for (y = y0; y < y1; y++)
+                im->image[y] = (char*)view.buf + offset +
+                               (y - y0) * stride;
+        else
+            for (y = y0; y < y1; y++)
+                im->image[y1-(y-y0)-1] = (char*)view.buf + offset +
+                                         (y - y0) * stride;
+    }
+
+    for (y = 0; y < ysize; y++)
+        if (!im->image[y]) {
+            PyErr_SetString(PyExc_ValueError,
+                            "tiles do not cover the image");
+            goto error;
+        }
+
+    mapping_find_block(im, &view);
+
+    im->destroy = mapping_destroy_buffer;
+    /* file data is mapped for reading, even from a writable buffer */
+    im->read_only = 1;
+    /* the buffer may be modified by its owner, so don't share it */
+    im->pinned = !view.readonly;
+
+    Py_INCREF(target);
+    ((ImagingBufferInstance*) im)->target = target;
+    ((ImagingBufferInstance*) im)->view = view;
+
+    if (!ImagingNewEpilogue(im))
+        return NULL;
+
+    return PyImagingNew(im);
+
+  error:
+    PyBuffer_Release(&view);
+    ImagingDelete(im);
+    return NULL;
+}
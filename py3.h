@@ -12,6 +12,7 @@
 
 #if PY_VERSION_HEX >= 0x03000000
 #define PY_ARG_BYTES_LENGTH             "y#"
+#define PY_ARG_BUFFER                   "y*"
 
 /* Map PyInt -> PyLong */
 #define PyInt_AsLong                PyLong_AsLong
@@ -22,6 +23,7 @@
 
 #else   /* PY_VERSION_HEX < 0x03000000 */
 #define PY_ARG_BYTES_LENGTH             "s#"
+#define PY_ARG_BUFFER                   "s*"
 
 #if !defined(KEEP_PY_UNICODE)
 /* Map PyUnicode -> PyString */